@@ -0,0 +1,45 @@
+"""Trigram and full-text indexes for food search
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # Build concurrently so large catalogs stay writable during the migration
+    with op.get_context().autocommit_block():
+        # Serves ILIKE '%query%' and similarity (%) lookups on food names
+        op.create_index(
+            'idx_foods_name_trgm',
+            'foods',
+            ['name'],
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+        # Must match app.services.food_search_service.food_search_document()
+        op.create_index(
+            'idx_foods_search_tsv',
+            'foods',
+            [sa.text("to_tsvector('simple'::regconfig, name || ' ' || coalesce(brand, ''))")],
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_foods_search_tsv', table_name='foods', postgresql_concurrently=True)
+        op.drop_index('idx_foods_name_trgm', table_name='foods', postgresql_concurrently=True)
@@ -0,0 +1,69 @@
+"""Make (source, source_id) unique on foods
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+# Rows sharing (source, source_id) with an older row, mapped to the row kept
+DUPLICATES_CTE = """
+    WITH duplicates AS (
+        SELECT id, keep_id FROM (
+            SELECT id, first_value(id) OVER (
+                PARTITION BY source, source_id ORDER BY created_at, id
+            ) AS keep_id
+            FROM foods
+            WHERE source_id IS NOT NULL
+        ) ranked
+        WHERE id <> keep_id
+    )
+"""
+
+
+def upgrade() -> None:
+    # Concurrent external imports could have inserted the same item twice.
+    # Point references at the oldest copy and drop the rest before the
+    # unique index is built.
+    for table in ('meal_logs', 'recipe_ingredients', 'favorites'):
+        op.execute(
+            DUPLICATES_CTE
+            + f"UPDATE {table} SET food_id = duplicates.keep_id "
+            f"FROM duplicates WHERE {table}.food_id = duplicates.id"
+        )
+    op.execute(
+        DUPLICATES_CTE
+        + "DELETE FROM foods USING duplicates WHERE foods.id = duplicates.id"
+    )
+
+    # Build the unique index next to the old one so lookups by source_id
+    # stay indexed, then swap names once it exists
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_foods_source_id_unique',
+            'foods',
+            ['source', 'source_id'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.drop_index('idx_foods_source_id', table_name='foods', postgresql_concurrently=True)
+        op.execute('ALTER INDEX idx_foods_source_id_unique RENAME TO idx_foods_source_id')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_foods_source_id_plain',
+            'foods',
+            ['source', 'source_id'],
+            postgresql_concurrently=True,
+        )
+        op.drop_index('idx_foods_source_id', table_name='foods', postgresql_concurrently=True)
+        op.execute('ALTER INDEX idx_foods_source_id_plain RENAME TO idx_foods_source_id')
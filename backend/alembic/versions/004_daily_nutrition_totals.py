@@ -0,0 +1,48 @@
+"""Add daily_nutrition_totals rollup table
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'daily_nutrition_totals',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('logged_date', sa.Date(), nullable=False),
+        sa.Column('meal_type', sa.String(20), nullable=False),
+        sa.Column('calories', sa.Numeric(10, 2), nullable=False, server_default='0'),
+        sa.Column('protein_g', sa.Numeric(10, 2), nullable=False, server_default='0'),
+        sa.Column('carbs_g', sa.Numeric(10, 2), nullable=False, server_default='0'),
+        sa.Column('fats_g', sa.Numeric(10, 2), nullable=False, server_default='0'),
+        sa.Column('log_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('user_id', 'logged_date', 'meal_type'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    )
+
+    # Backfill from existing logs
+    op.execute("""
+        INSERT INTO daily_nutrition_totals
+            (user_id, logged_date, meal_type, calories, protein_g, carbs_g, fats_g, log_count)
+        SELECT user_id, logged_date, meal_type,
+               COALESCE(SUM(calories), 0), COALESCE(SUM(protein_g), 0),
+               COALESCE(SUM(carbs_g), 0), COALESCE(SUM(fats_g), 0), COUNT(*)
+        FROM meal_logs
+        GROUP BY user_id, logged_date, meal_type
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('daily_nutrition_totals')
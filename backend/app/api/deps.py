@@ -1,13 +1,119 @@
 """API dependencies."""
+import hmac
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from typing import Generator
+from sqlalchemy.orm import Session, make_transient_to_detached
+from typing import Any, Dict, Generator, Optional
+from app.config import settings
 from app.database import get_db
 from app.utils.auth import verify_token
+from app.utils.cache import local_cache, MISSING
 from app.models.user import User
 
 security = HTTPBearer()
+metrics_security = HTTPBearer(auto_error=False)
+
+# Local cache prefix for authenticated user rows
+USER_CACHE_PREFIX = "auth_user:"
+
+# Columns never kept in the cached user snapshot; they are loaded from
+# the database if a handler reads them
+USER_CACHE_EXCLUDED_COLUMNS = frozenset({"password_hash"})
+
+
+def user_cache_key(user_id) -> str:
+    """
+    Get the local cache key for an authenticated user.
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        Cache key
+    """
+    return f"{USER_CACHE_PREFIX}{user_id}"
+
+
+def cache_user(user: User) -> None:
+    """
+    Keep a snapshot of a user row in the in-process cache.
+
+    Credential columns are left out (see USER_CACHE_EXCLUDED_COLUMNS).
+
+    Args:
+        user: Loaded user
+    """
+    snapshot: Dict[str, Any] = {
+        column.key: getattr(user, column.key)
+        for column in User.__table__.columns
+        if column.key not in USER_CACHE_EXCLUDED_COLUMNS
+    }
+    local_cache.set(
+        user_cache_key(user.id),
+        snapshot,
+        size=len(str(snapshot)),
+        ttl=settings.AUTH_USER_CACHE_TTL_SECONDS
+    )
+
+
+def evict_cached_user(user_id) -> None:
+    """
+    Drop a user from this process's cache.
+
+    Other workers are notified with cache_evict_local.
+
+    Args:
+        user_id: User ID
+    """
+    local_cache.delete(user_cache_key(user_id))
+
+
+def load_cached_user(db: Session, user_id: str) -> Optional[User]:
+    """
+    Attach a cached user to the session without querying the database.
+
+    The returned instance is persistent in db, so handlers can modify and
+    commit it as if it had been loaded.
+
+    Args:
+        db: Database session
+        user_id: User ID
+
+    Returns:
+        User or None if not cached
+    """
+    snapshot = local_cache.get(user_cache_key(user_id))
+    if snapshot is MISSING:
+        return None
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def require_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(metrics_security)
+) -> None:
+    """
+    Dependency restricting operational endpoints to holders of METRICS_TOKEN.
+
+    Args:
+        credentials: HTTP authorization credentials
+
+    Raises:
+        HTTPException: 404 if no METRICS_TOKEN is configured, 401 if the
+            bearer token doesn't match it
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if credentials is None or not hmac.compare_digest(
+        credentials.credentials.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
 
 def get_current_user(
@@ -53,14 +159,17 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    # Get user from the short-lived local cache, then the database
+    user = load_cached_user(db, user_id)
+    if user is None:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        cache_user(user)
 
     if not user.is_active:
         raise HTTPException(
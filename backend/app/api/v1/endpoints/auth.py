@@ -1,16 +1,20 @@
 """Authentication endpoints."""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from typing import Optional
 from app.database import get_db
-from app.schemas.auth_schema import LoginRequest, TokenResponse
+from app.api.deps import security
+from app.schemas.auth_schema import LoginRequest, RefreshTokenRequest, TokenResponse
 from app.schemas.user_schema import UserCreate, UserResponse
 from app.services.auth_service import AuthService
+from app.utils.auth import revoke_token, verify_token
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """
     Register a new user.
 
@@ -21,12 +25,12 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     Returns:
         Created user
     """
-    user = AuthService.register_user(db, user_data)
+    user = await AuthService.register_user(db, user_data)
     return UserResponse.model_validate(user)
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     """
     Login user and return access/refresh tokens.
 
@@ -37,4 +41,52 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     Returns:
         Token response with access and refresh tokens
     """
-    return AuthService.login_user(db, login_data)
+    return await AuthService.login_user(db, login_data)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    refresh_data: Optional[RefreshTokenRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    Revoke the presented access token and, if given, its refresh token.
+
+    Args:
+        refresh_data: Optional refresh token issued with the access token
+        credentials: HTTP authorization credentials
+
+    Raises:
+        HTTPException: If a token is invalid or could not be revoked
+    """
+    payload = verify_token(credentials.credentials, check_revocation=False)
+    if not payload or not payload.get("jti"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    payloads = [payload]
+
+    if refresh_data is not None:
+        # Checked before anything is revoked, so a bad request revokes nothing
+        refresh_payload = verify_token(refresh_data.refresh_token, check_revocation=False)
+        if (
+            not refresh_payload
+            or refresh_payload.get("type") != "refresh"
+            or refresh_payload.get("sub") != payload.get("sub")
+            or not refresh_payload.get("jti")
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid refresh token"
+            )
+        payloads.append(refresh_payload)
+
+    for token_payload in payloads:
+        if not await revoke_token(token_payload):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Could not revoke token, try again"
+            )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,40 +1,75 @@
 """Food endpoints."""
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_db
 from app.api.deps import get_current_user
 from app.models.user import User
-from app.schemas.food_schema import FoodResponse, FoodCreate, FoodSearchResponse
-from app.services.food_service import FoodService
+from app.schemas.food_schema import FoodResponse, FoodCreate, FoodSearchResponse, FoodSuggestion
+from app.services.food_service import AsyncFoodService, FoodService
+from app.utils.autocomplete import publish_autocomplete_entries
 
 router = APIRouter(prefix="/foods", tags=["foods"])
 
 
 @router.get("/search", response_model=List[FoodResponse])
 async def search_foods(
+    response: Response,
     q: str = Query(..., min_length=2, description="Search query"),
     limit: int = Query(20, ge=1, le=100),
+    background: Optional[bool] = Query(None, description="Fetch external foods in the background"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Search for foods.
 
+    In background mode local results are returned at once and external
+    foods are fetched afterwards; the X-Enrichment-Pending header tells the
+    client to repeat the search shortly for the enriched set.
+
     Args:
+        response: Outgoing response
         q: Search query
         limit: Maximum number of results
+        background: Override FOOD_SEARCH_BACKGROUND_ENRICHMENT
         current_user: Current authenticated user
-        db: Database session
+        db: Async database session
 
     Returns:
         List of matching foods
     """
-    food_service = FoodService(db)
-    results = await food_service.search_foods(q, limit)
+    food_service = AsyncFoodService(db)
+    results = await food_service.search_foods(q, limit, background=background)
+    if food_service.enrichment_pending:
+        response.headers["X-Enrichment-Pending"] = "true"
     return results
 
 
+@router.get("/autocomplete", response_model=List[FoodSuggestion])
+def autocomplete_foods(
+    q: str = Query(..., min_length=1, description="Partial search text"),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Suggest foods while the user is typing.
+
+    Served from the in-memory autocomplete index; fetch the full record
+    with GET /foods/{food_id} once a suggestion is picked.
+
+    Args:
+        q: Partial search text
+        limit: Maximum number of suggestions
+        current_user: Current authenticated user
+
+    Returns:
+        List of food ids, names and brands
+    """
+    return FoodService.autocomplete(q, limit)
+
+
 @router.get("/{food_id}", response_model=FoodResponse)
 def get_food(
     food_id: str,
@@ -60,14 +95,19 @@ def get_food(
 @router.post("", response_model=FoodResponse, status_code=201)
 def create_custom_food(
     food_data: FoodCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Create custom food.
 
+    Other workers add the food to their autocomplete index once the
+    response has been sent.
+
     Args:
         food_data: Food creation data
+        background_tasks: Tasks run after the response
         current_user: Current authenticated user
         db: Database session
 
@@ -76,4 +116,5 @@ def create_custom_food(
     """
     food_service = FoodService(db)
     food = food_service.create_custom_food(food_data, str(current_user.id))
+    background_tasks.add_task(publish_autocomplete_entries, [food])
     return FoodResponse.model_validate(food)
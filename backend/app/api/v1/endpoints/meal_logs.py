@@ -1,11 +1,18 @@
 """Meal log endpoints."""
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
 from datetime import date
+from typing import Optional
 from app.database import get_db
 from app.api.deps import get_current_user
 from app.models.user import User
-from app.schemas.meal_log_schema import MealLogCreate, MealLogResponse, MealLogsResponse
+from app.schemas.meal_log_schema import (
+    MealLogBatchCreate, MealLogBatchResponse, MealLogCopyRequest, MealLogCopyResponse,
+    MealLogCreate, MealLogResponse, MealLogsResponse, SummaryRangeResponse
+)
+from app.services.meal_log_export import EXPORT_FORMATS, PARQUET_AVAILABLE, MealLogExporter
 from app.services.meal_log_service import MealLogService
 
 router = APIRouter(prefix="/meal-logs", tags=["meal-logs"])
@@ -29,8 +36,7 @@ def get_meal_logs(
         Meal logs and daily summary
     """
     meal_log_service = MealLogService(db)
-    logs = meal_log_service.get_daily_logs(str(current_user.id), date)
-    summary = meal_log_service.calculate_daily_summary(str(current_user.id), date)
+    logs, summary = meal_log_service.get_daily_logs_with_summary(current_user, date)
 
     return MealLogsResponse(
         logs=[MealLogResponse.model_validate(log) for log in logs],
@@ -38,6 +44,69 @@ def get_meal_logs(
     )
 
 
+@router.get("/summary", response_model=SummaryRangeResponse)
+def get_meal_log_summary(
+    start: date = Query(..., description="First date (YYYY-MM-DD)"),
+    end: date = Query(..., description="Last date, inclusive (YYYY-MM-DD)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get daily nutrition totals for a date range.
+
+    Args:
+        start: First date
+        end: Last date (inclusive)
+        current_user: Current authenticated user
+        db: Database session
+
+    Returns:
+        Per-day summaries and averages over logged days
+    """
+    meal_log_service = MealLogService(db)
+    return meal_log_service.get_summary_range(str(current_user.id), start, end)
+
+
+@router.get("/export")
+def export_meal_logs(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson|parquet)$"),
+    start: Optional[date] = Query(None, description="First date (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="Last date, inclusive (YYYY-MM-DD)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream the user's meal log history as CSV, NDJSON or Parquet.
+
+    Args:
+        export_format: Output format
+        start: Only export from this date
+        end: Only export up to this date
+        current_user: Current authenticated user
+        db: Database session
+
+    Returns:
+        Streaming file download
+    """
+    if export_format == "parquet" and not PARQUET_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet export is not available on this server"
+        )
+
+    # The stream outlives the request's session, so it reads through its
+    # own, closed by the response even if the body is never iterated
+    export_db = Session(bind=db.get_bind(), autoflush=False)
+    exporter = MealLogExporter(export_db)
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        exporter.stream(export_format, str(current_user.id), start, end),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="meal-logs.{extension}"'},
+        background=BackgroundTask(export_db.close)
+    )
+
+
 @router.post("", response_model=MealLogResponse, status_code=201)
 def create_meal_log(
     log_data: MealLogCreate,
@@ -60,6 +129,58 @@ def create_meal_log(
     return MealLogResponse.model_validate(meal_log)
 
 
+@router.post("/batch", response_model=MealLogBatchResponse, status_code=201)
+def create_meal_logs(
+    batch: MealLogBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Create several meal log entries in one transaction.
+
+    If any entry is invalid nothing is saved and the response lists the
+    index and reason of each invalid entry.
+
+    Args:
+        batch: Meal log entries
+        current_user: Current authenticated user
+        db: Database session
+
+    Returns:
+        Created meal logs, in request order
+    """
+    meal_log_service = MealLogService(db)
+    meal_logs = meal_log_service.create_meal_logs(batch.entries, str(current_user.id))
+    return MealLogBatchResponse(logs=[MealLogResponse.model_validate(log) for log in meal_logs])
+
+
+@router.post("/copy", response_model=MealLogCopyResponse, status_code=201)
+def copy_meal_logs(
+    copy_request: MealLogCopyRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Copy a day's logs, or one meal's, to other dates.
+
+    Args:
+        copy_request: Source date, target dates and optional meal type
+        current_user: Current authenticated user
+        db: Database session
+
+    Returns:
+        Number of meal logs created
+    """
+    meal_log_service = MealLogService(db)
+    copied = meal_log_service.copy_meal_logs(
+        str(current_user.id),
+        copy_request.source_date,
+        copy_request.target_dates,
+        copy_request.meal_type
+    )
+    return MealLogCopyResponse(copied=copied)
+
+
 @router.delete("/{log_id}", status_code=204)
 def delete_meal_log(
     log_id: str,
@@ -36,7 +36,7 @@ def get_recipes(
     # Calculate nutrition for each recipe
     results = []
     for recipe in recipes:
-        nutrition = recipe_service.calculate_recipe_nutrition(str(recipe.id))
+        nutrition = recipe_service.calculate_nutrition_for(recipe)
         recipe_response = RecipeResponse.model_validate(recipe)
         recipe_response.nutrition_total = nutrition['total']
         recipe_response.nutrition_per_serving = nutrition['per_serving']
@@ -92,7 +92,7 @@ def get_recipe(
     """
     recipe_service = RecipeService(db)
     recipe = recipe_service.get_recipe_by_id(recipe_id, str(current_user.id))
-    nutrition = recipe_service.calculate_recipe_nutrition(recipe_id)
+    nutrition = recipe_service.calculate_nutrition_for(recipe)
 
     recipe_response = RecipeResponse.model_validate(recipe)
     recipe_response.nutrition_total = nutrition['total']
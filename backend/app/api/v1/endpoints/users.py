@@ -1,8 +1,9 @@
 """User endpoints."""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.api.deps import get_current_user
+from app.api.deps import evict_cached_user, get_current_user, user_cache_key
+from app.utils.cache import cache_evict_local
 from app.models.user import User
 from app.schemas.user_schema import UserResponse, UserUpdate, UserGoalsUpdate
 
@@ -26,6 +27,7 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
 @router.patch("/me", response_model=UserResponse)
 def update_user_profile(
     user_update: UserUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -34,6 +36,7 @@ def update_user_profile(
 
     Args:
         user_update: User update data
+        background_tasks: Tasks run after the response
         current_user: Current authenticated user
         db: Database session
 
@@ -47,12 +50,17 @@ def update_user_profile(
     db.commit()
     db.refresh(current_user)
 
+    # Drop the cached row now and on the other workers after the response
+    evict_cached_user(current_user.id)
+    background_tasks.add_task(cache_evict_local, user_cache_key(current_user.id))
+
     return UserResponse.model_validate(current_user)
 
 
 @router.patch("/me/goals", response_model=UserResponse)
 def update_user_goals(
     goals_update: UserGoalsUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -61,6 +69,7 @@ def update_user_goals(
 
     Args:
         goals_update: Goals update data
+        background_tasks: Tasks run after the response
         current_user: Current authenticated user
         db: Database session
 
@@ -74,4 +83,8 @@ def update_user_goals(
     db.commit()
     db.refresh(current_user)
 
+    # Drop the cached row now and on the other workers after the response
+    evict_cached_user(current_user.id)
+    background_tasks.add_task(cache_evict_local, user_cache_key(current_user.id))
+
     return UserResponse.model_validate(current_user)
@@ -1,9 +1,18 @@
 """Database connection and session management."""
+from typing import AsyncGenerator, Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
+# Async drivers used for each sync database backend
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
@@ -32,3 +41,82 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def async_database_url(url: str) -> str:
+    """
+    Get the async driver equivalent of a database URL.
+
+    Args:
+        url: Sync SQLAlchemy database URL
+
+    Returns:
+        URL using asyncpg for PostgreSQL and aiosqlite for SQLite
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+# Created on first use so deployments without the async drivers keep working
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Get the async database engine, creating it on first use.
+
+    Returns:
+        AsyncEngine for DATABASE_URL
+    """
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            async_database_url(settings.DATABASE_URL),
+            echo=settings.DEBUG,
+            pool_pre_ping=True,
+            pool_size=5,
+            max_overflow=10
+        )
+    return _async_engine
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """
+    Get the async session factory, creating it on first use.
+
+    Objects are not expired on commit: attribute access after a commit would
+    otherwise need I/O, which an AsyncSession cannot do implicitly.
+
+    Returns:
+        async_sessionmaker bound to the async engine
+    """
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency function to get an async database session.
+
+    Use from async endpoints; sync endpoints keep using get_db until they
+    are migrated.
+
+    Yields:
+        AsyncSession: SQLAlchemy async database session
+    """
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Close pooled async connections, if the engine was ever created."""
+    if _async_engine is not None:
+        await _async_engine.dispose()
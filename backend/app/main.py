@@ -1,8 +1,16 @@
 """FastAPI main application."""
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.api.v1.router import api_router
+from app.api.deps import require_metrics_token
+from app.services.food_service import food_search_flight, food_search_hits, background_stats
+from app.utils.http_client import http_clients
+from app.utils.cache import cache_stats, start_invalidation_listener, stop_invalidation_listener
+from app.utils.loop_monitor import loop_monitor
+from app.utils.auth import password_pool
+from app.utils.rate_limit import RateLimitMiddleware, rate_limiter
+from app.utils.revocation import revocation_list
 import os
 
 # Only import database if not in test mode
@@ -20,11 +28,40 @@ app = FastAPI(
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup."""
+    """Initialize database and in-memory indexes on startup."""
+    if settings.LOOP_MONITOR_ENABLED:
+        await loop_monitor.start()
+
     if os.getenv("TESTING") != "1":
-        from app.database import Base, engine
+        from app.database import Base, engine, SessionLocal
+        from app.services.food_service import FoodService
         Base.metadata.create_all(bind=engine)
 
+        db = SessionLocal()
+        try:
+            FoodService.build_autocomplete_index(db)
+        finally:
+            db.close()
+
+        start_invalidation_listener()
+        revocation_list.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared connections on shutdown."""
+    from app.database import dispose_async_engine
+
+    await loop_monitor.stop()
+    await stop_invalidation_listener()
+    await revocation_list.stop()
+    await http_clients.aclose()
+    await dispose_async_engine()
+
+
+# Rate limit hot routes (see RATE_LIMIT_RULES); added before CORS so
+# 429 responses still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -54,6 +91,22 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)])
+def metrics():
+    """Runtime metrics for capacity planning (requires METRICS_TOKEN)."""
+    return {
+        "http_client": http_clients.stats(),
+        "cache": cache_stats(),
+        "food_search_singleflight": food_search_flight.stats(),
+        "food_search_background": dict(background_stats),
+        "event_loop": loop_monitor.stats(),
+        "password_hashing": password_pool.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "token_revocation": revocation_list.stats(),
+        "food_search_queries": food_search_hits.report(hit_outcomes=("local", "hit", "negative_hit")),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
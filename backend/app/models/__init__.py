@@ -2,7 +2,7 @@
 from app.models.user import User
 from app.models.food import Food, NutritionInfo
 from app.models.recipe import Recipe, RecipeIngredient
-from app.models.meal_log import MealLog, Favorite, WaterLog
+from app.models.meal_log import MealLog, DailyNutritionTotal, Favorite, WaterLog
 
 __all__ = [
     "User",
@@ -11,6 +11,7 @@ __all__ = [
     "Recipe",
     "RecipeIngredient",
     "MealLog",
+    "DailyNutritionTotal",
     "Favorite",
     "WaterLog",
 ]
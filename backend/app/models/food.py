@@ -1,6 +1,6 @@
 """Food and nutrition models."""
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Numeric, ForeignKey, CheckConstraint
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import Column, String, Boolean, DateTime, Text, Numeric, ForeignKey, CheckConstraint, Index
+from app.models.types import UUID, JSONType
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
@@ -33,6 +33,8 @@ class Food(Base):
 
     __table_args__ = (
         CheckConstraint("source IN ('openfoodfacts', 'usda', 'custom')", name='valid_source'),
+        # Unique so external imports can upsert with ON CONFLICT (source, source_id)
+        Index('idx_foods_source_id', 'source', 'source_id', unique=True),
     )
 
 
@@ -64,7 +66,7 @@ class NutritionInfo(Base):
     sodium_mg = Column(Numeric(6, 2))
 
     # Micronutrients (JSONB for flexibility)
-    micronutrients = Column(JSONB)
+    micronutrients = Column(JSONType)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -1,6 +1,6 @@
 """Meal logging and tracking models."""
 from sqlalchemy import Column, String, Text, Date, Time, DateTime, Numeric, ForeignKey, CheckConstraint, Integer
-from sqlalchemy.dialects.postgresql import UUID
+from app.models.types import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
@@ -50,6 +50,25 @@ class MealLog(Base):
     )
 
 
+class DailyNutritionTotal(Base):
+    """Per-day, per-meal-type nutrition totals maintained alongside meal logs."""
+
+    __tablename__ = "daily_nutrition_totals"
+
+    # A day's rows share the (user_id, logged_date) key prefix
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    logged_date = Column(Date, primary_key=True)
+    meal_type = Column(String(20), primary_key=True)
+
+    calories = Column(Numeric(10, 2), nullable=False, default=0)
+    protein_g = Column(Numeric(10, 2), nullable=False, default=0)
+    carbs_g = Column(Numeric(10, 2), nullable=False, default=0)
+    fats_g = Column(Numeric(10, 2), nullable=False, default=0)
+    log_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class Favorite(Base):
     """User favorites for foods and recipes."""
 
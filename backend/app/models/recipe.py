@@ -1,6 +1,6 @@
 """Recipe models."""
 from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, Numeric, ForeignKey, CheckConstraint
-from sqlalchemy.dialects.postgresql import UUID
+from app.models.types import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
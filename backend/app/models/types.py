@@ -1,5 +1,6 @@
 """Custom database types for SQLAlchemy."""
-from sqlalchemy import TypeDecorator, String
+from sqlalchemy import TypeDecorator, String, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from uuid import UUID as PyUUID
 import uuid
 
@@ -12,10 +13,15 @@ class UUID(TypeDecorator):
     impl = String(36)
     cache_ok = True
 
+    def __init__(self, as_uuid: bool = True):
+        # Accepted for drop-in compatibility with postgresql.UUID; values are
+        # always returned as uuid.UUID objects.
+        super().__init__()
+
     def load_dialect_impl(self, dialect):
         if dialect.name == 'postgresql':
             from sqlalchemy.dialects.postgresql import UUID as PG_UUID
-            return dialect.type_descriptor(PG_UUID())
+            return dialect.type_descriptor(PG_UUID(as_uuid=False))
         else:
             return dialect.type_descriptor(String(36))
 
@@ -36,3 +42,7 @@ class UUID(TypeDecorator):
             if isinstance(value, PyUUID):
                 return value
             return uuid.UUID(value)
+
+
+# JSONB on PostgreSQL, plain JSON everywhere else (e.g. the SQLite test backend)
+JSONType = JSON().with_variant(JSONB(), 'postgresql')
@@ -1,6 +1,6 @@
 """User model."""
 from sqlalchemy import Column, String, Boolean, DateTime, Date, Numeric, Integer, CheckConstraint
-from sqlalchemy.dialects.postgresql import UUID
+from app.models.types import UUID
 from sqlalchemy.sql import func
 import uuid
 from app.database import Base
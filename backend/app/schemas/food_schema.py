@@ -62,6 +62,13 @@ class FoodResponse(FoodBase):
         from_attributes = True
 
 
+class FoodSuggestion(BaseModel):
+    """Lightweight autocomplete suggestion."""
+    id: UUID
+    name: str
+    brand: Optional[str] = None
+
+
 class FoodSearchResponse(BaseModel):
     """Schema for food search response."""
     results: list[FoodResponse]
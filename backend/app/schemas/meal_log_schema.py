@@ -27,6 +27,23 @@ class MealLogCreate(MealLogBase):
         pass
 
 
+class MealLogBatchCreate(BaseModel):
+    """Schema for creating several meal logs at once."""
+    entries: List[MealLogCreate] = Field(..., min_length=1)
+
+
+class MealLogCopyRequest(BaseModel):
+    """Schema for copying a day's (or one meal's) logs to other dates."""
+    source_date: date
+    target_dates: List[date] = Field(..., min_length=1)
+    meal_type: Optional[str] = Field(None, pattern='^(breakfast|lunch|dinner|snack)$')
+
+
+class MealLogCopyResponse(BaseModel):
+    """Response for a meal log copy."""
+    copied: int
+
+
 class MealLogResponse(MealLogBase):
     """Schema for meal log response."""
     id: UUID
@@ -43,12 +60,27 @@ class MealLogResponse(MealLogBase):
         from_attributes = True
 
 
+class MealLogBatchResponse(BaseModel):
+    """Response for a batch of created meal logs."""
+    logs: List[MealLogResponse]
+
+
+class MealTypeTotals(BaseModel):
+    """Nutrition totals for one meal type."""
+    calories: float
+    protein_g: float
+    carbs_g: float
+    fats_g: float
+    entry_count: int
+
+
 class DailySummary(BaseModel):
     """Daily nutrition summary."""
     total_calories: float
     total_protein_g: float
     total_carbs_g: float
     total_fats_g: float
+    by_meal_type: Dict[str, MealTypeTotals] = {}
     calorie_target: Optional[int] = None
     protein_target_g: Optional[float] = None
     carbs_target_g: Optional[float] = None
@@ -79,3 +111,4 @@ class SummaryRangeResponse(BaseModel):
     """Response for summary over date range."""
     daily_summaries: List[DailySummaryItem]
     averages: Dict[str, float]
+    days_logged: int
@@ -1,10 +1,14 @@
 """Authentication service."""
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from app.models.user import User
 from app.schemas.auth_schema import LoginRequest, TokenResponse
 from app.schemas.user_schema import UserCreate, UserResponse
-from app.utils.auth import hash_password, verify_password, create_access_token, create_refresh_token
+from app.utils.auth import (
+    hash_password_async, verify_password_async, password_needs_rehash,
+    create_access_token, create_refresh_token,
+)
 from app.config import settings
 
 
@@ -12,10 +16,13 @@ class AuthService:
     """Service for authentication operations."""
 
     @staticmethod
-    def register_user(db: Session, user_data: UserCreate) -> User:
+    async def register_user(db: Session, user_data: UserCreate) -> User:
         """
         Register a new user.
 
+        Database calls run in the threadpool and hashing on the password
+        pool, so neither blocks the event loop.
+
         Args:
             db: Database session
             user_data: User registration data
@@ -27,7 +34,9 @@ class AuthService:
             HTTPException: If email already exists
         """
         # Check if user with email exists
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
+        existing_user = await run_in_threadpool(
+            lambda: db.query(User).filter(User.email == user_data.email).first()
+        )
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -35,7 +44,7 @@ class AuthService:
             )
 
         # Create user with hashed password
-        hashed_pw = hash_password(user_data.password)
+        hashed_pw = await hash_password_async(user_data.password)
         user = User(
             email=user_data.email,
             password_hash=hashed_pw,
@@ -43,17 +52,22 @@ class AuthService:
             last_name=user_data.last_name
         )
 
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+        def save():
+            db.add(user)
+            db.commit()
+            db.refresh(user)
 
+        await run_in_threadpool(save)
         return user
 
     @staticmethod
-    def login_user(db: Session, login_data: LoginRequest) -> TokenResponse:
+    async def login_user(db: Session, login_data: LoginRequest) -> TokenResponse:
         """
         Login user and return tokens.
 
+        Hashes made with a bcrypt cost other than BCRYPT_ROUNDS are
+        replaced with a fresh hash of the verified password.
+
         Args:
             db: Database session
             login_data: Login credentials
@@ -65,7 +79,9 @@ class AuthService:
             HTTPException: If credentials are invalid
         """
         # Find user by email
-        user = db.query(User).filter(User.email == login_data.email).first()
+        user = await run_in_threadpool(
+            lambda: db.query(User).filter(User.email == login_data.email).first()
+        )
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -73,12 +89,17 @@ class AuthService:
             )
 
         # Verify password
-        if not verify_password(login_data.password, user.password_hash):
+        if not await verify_password_async(login_data.password, user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
 
+        # Upgrade (or downgrade) the stored hash to the configured cost
+        if password_needs_rehash(user.password_hash):
+            user.password_hash = await hash_password_async(login_data.password)
+            await run_in_threadpool(db.commit)
+
         # Create tokens
         access_token = create_access_token(str(user.id))
         refresh_token = create_refresh_token(str(user.id))
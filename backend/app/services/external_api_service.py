@@ -1,192 +1,144 @@
-"""External API service for food data (mocked for MVP)."""
-from typing import List, Optional, Dict, Any
-import uuid
+"""External API service for food data."""
+from typing import List, Optional, Dict, Any, Tuple
+import asyncio
+from app.config import settings
+from app.services.food_providers import FoodProvider, build_providers
 
 
 class ExternalAPIService:
     """
     Service for external food APIs.
-    For MVP, this uses mocked data instead of real API calls.
+
+    Queries every configured provider concurrently under one deadline,
+    hedges slow providers with a duplicate request, and merges whatever
+    has arrived when the deadline hits. With the default settings the
+    only provider is the built-in mock data used for the MVP.
     """
 
-    # Mock food database for demo purposes
-    MOCK_FOODS = [
-        {
-            "name": "Chicken Breast, Raw",
-            "brand": "Generic",
-            "source": "usda",
-            "source_id": "171077",
-            "description": "Raw chicken breast without skin",
-            "nutrition": {
-                "serving_size": 100,
-                "serving_unit": "g",
-                "calories": 165,
-                "protein_g": 31.0,
-                "carbs_g": 0.0,
-                "fats_g": 3.6,
-                "saturated_fat_g": 1.0,
-                "cholesterol_mg": 85,
-                "sodium_mg": 74,
-            }
-        },
-        {
-            "name": "Brown Rice, Cooked",
-            "brand": "Generic",
-            "source": "usda",
-            "source_id": "168878",
-            "description": "Cooked brown rice",
-            "nutrition": {
-                "serving_size": 100,
-                "serving_unit": "g",
-                "calories": 112,
-                "protein_g": 2.6,
-                "carbs_g": 23.5,
-                "fats_g": 0.9,
-                "fiber_g": 1.8,
-                "sodium_mg": 5,
-            }
-        },
-        {
-            "name": "Broccoli, Raw",
-            "brand": None,
-            "source": "usda",
-            "source_id": "170379",
-            "description": "Raw broccoli florets",
-            "nutrition": {
-                "serving_size": 100,
-                "serving_unit": "g",
-                "calories": 34,
-                "protein_g": 2.8,
-                "carbs_g": 6.6,
-                "fats_g": 0.4,
-                "fiber_g": 2.6,
-                "sugar_g": 1.7,
-                "sodium_mg": 33,
-            }
-        },
-        {
-            "name": "Salmon, Atlantic, Raw",
-            "brand": "Generic",
-            "source": "usda",
-            "source_id": "175167",
-            "description": "Raw Atlantic salmon",
-            "nutrition": {
-                "serving_size": 100,
-                "serving_unit": "g",
-                "calories": 208,
-                "protein_g": 20.4,
-                "carbs_g": 0.0,
-                "fats_g": 13.4,
-                "saturated_fat_g": 3.1,
-                "cholesterol_mg": 55,
-                "sodium_mg": 59,
-            }
-        },
-        {
-            "name": "Oatmeal, Dry",
-            "brand": "Generic",
-            "source": "usda",
-            "source_id": "173904",
-            "description": "Dry rolled oats",
-            "nutrition": {
-                "serving_size": 50,
-                "serving_unit": "g",
-                "calories": 190,
-                "protein_g": 6.8,
-                "carbs_g": 32.0,
-                "fats_g": 3.4,
-                "fiber_g": 5.0,
-                "sugar_g": 1.0,
-                "sodium_mg": 5,
-            }
-        },
-        {
-            "name": "Eggs, Whole, Raw",
-            "brand": "Generic",
-            "source": "usda",
-            "source_id": "173424",
-            "description": "Whole raw eggs",
-            "nutrition": {
-                "serving_size": 50,
-                "serving_unit": "g",
-                "calories": 72,
-                "protein_g": 6.3,
-                "carbs_g": 0.4,
-                "fats_g": 4.8,
-                "saturated_fat_g": 1.6,
-                "cholesterol_mg": 186,
-                "sodium_mg": 71,
-            }
-        },
-        {
-            "name": "Banana, Raw",
-            "brand": None,
-            "source": "usda",
-            "source_id": "173944",
-            "description": "Fresh banana",
-            "nutrition": {
-                "serving_size": 100,
-                "serving_unit": "g",
-                "calories": 89,
-                "protein_g": 1.1,
-                "carbs_g": 22.8,
-                "fats_g": 0.3,
-                "fiber_g": 2.6,
-                "sugar_g": 12.2,
-                "sodium_mg": 1,
-            }
-        },
-        {
-            "name": "Greek Yogurt, Plain, Nonfat",
-            "brand": "Generic",
-            "source": "usda",
-            "source_id": "170903",
-            "description": "Plain nonfat Greek yogurt",
-            "nutrition": {
-                "serving_size": 100,
-                "serving_unit": "g",
-                "calories": 59,
-                "protein_g": 10.2,
-                "carbs_g": 3.6,
-                "fats_g": 0.4,
-                "sugar_g": 3.2,
-                "sodium_mg": 36,
-            }
-        },
-    ]
-
-    async def search_openfoodfacts(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    def __init__(
+        self,
+        providers: Optional[List[FoodProvider]] = None,
+        deadline: Optional[float] = None,
+        hedge_delay: Optional[float] = None
+    ):
+        self.providers = providers if providers is not None else build_providers(settings.FOOD_PROVIDERS)
+        self.deadline = deadline if deadline is not None else settings.FOOD_PROVIDER_DEADLINE_SECONDS
+        self.hedge_delay = hedge_delay if hedge_delay is not None else settings.FOOD_PROVIDER_HEDGE_DELAY_SECONDS
+
+    async def search_all(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
         """
-        Search OpenFoodFacts API (mocked).
+        Search all providers concurrently.
+
+        Providers that have not answered by the deadline are cancelled and
+        their results dropped; provider errors are logged and ignored.
 
         Args:
             query: Search query
             limit: Maximum number of results
 
         Returns:
-            List of food items
+            Merged list of food items, deduplicated by source id
         """
-        # For MVP, return mocked data matching the query
-        query_lower = query.lower()
-        results = [
-            food for food in self.MOCK_FOODS
-            if query_lower in food["name"].lower()
+        if not self.providers:
+            return []
+
+        tasks = [
+            asyncio.create_task(self._hedged_search(provider, query, limit))
+            for provider in self.providers
         ]
-        return results[:limit]
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        provider_results = []
+        for provider, task in zip(self.providers, tasks):
+            if task not in done:
+                print(f"Food provider {provider.name} missed the {self.deadline}s deadline")
+            elif task.exception() is not None:
+                print(f"Food provider {provider.name} error: {task.exception()!r}")
+            else:
+                provider_results.append(task.result())
 
-    async def search_usda(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        return self.merge_results(provider_results, limit)
+
+    async def _hedged_search(self, provider: FoodProvider, query: str, limit: int) -> List[Dict[str, Any]]:
         """
-        Search USDA API (mocked).
+        Search one provider, sending a second request if the first is slow.
 
         Args:
+            provider: Provider to query
             query: Search query
             limit: Maximum number of results
 
         Returns:
-            List of food items
+            Results of whichever attempt succeeds first
+
+        Raises:
+            Exception: The last error if every attempt fails
+        """
+        attempts = [asyncio.create_task(provider.search(query, limit))]
+        can_hedge = provider.hedge and self.hedge_delay > 0
+        try:
+            while True:
+                timeout = self.hedge_delay if can_hedge else None
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # First attempt is slow: hedge once with a duplicate request
+                    attempts.append(asyncio.create_task(provider.search(query, limit)))
+                    can_hedge = False
+                    continue
+
+                error = None
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                    attempts.remove(task)
+                if not attempts and not can_hedge:
+                    raise error
+                if not attempts:
+                    # Failed before the hedge delay: retry once immediately
+                    attempts.append(asyncio.create_task(provider.search(query, limit)))
+                    can_hedge = False
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+    @staticmethod
+    def merge_results(provider_results: List[List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+        """
+        Interleave provider results and drop duplicates.
+
+        Results are taken round-robin so every provider is represented
+        within the limit; duplicates are identified by (source, source_id).
+
+        Args:
+            provider_results: Results per provider, in provider order
+            limit: Maximum number of results
+
+        Returns:
+            Merged list of food items
         """
-        # For MVP, return same mocked data
-        return await self.search_openfoodfacts(query, limit)
+        merged = []
+        seen: set[Tuple[str, str]] = set()
+        longest = max((len(results) for results in provider_results), default=0)
+        for position in range(longest):
+            for results in provider_results:
+                if position >= len(results):
+                    continue
+                food = results[position]
+                key = (food["source"], str(food["source_id"]))
+                if key in seen:
+                    continue
+                seen.add(key)
+                merged.append(food)
+                if len(merged) >= limit:
+                    return merged
+        return merged
 
     async def get_by_barcode_openfoodfacts(self, barcode: str) -> Optional[Dict[str, Any]]:
         """
@@ -0,0 +1,450 @@
+"""External food data providers."""
+import math
+from typing import List, Optional, Dict, Any
+from app.config import settings
+from app.utils.http_client import http_clients
+
+
+def parse_number(value: Any) -> Optional[float]:
+    """
+    Read a numeric field from a provider response.
+
+    Providers are inconsistent about types: numbers may arrive as strings,
+    empty strings or free text. Anything that isn't a finite number is
+    treated as missing rather than discarding the whole result set.
+
+    Args:
+        value: Raw field value
+
+    Returns:
+        The value as a float, or None if missing or not numeric
+    """
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def truncate(value: Optional[str], length: int = 255) -> Optional[str]:
+    """
+    Strip a text field and cut it to the column length.
+
+    Args:
+        value: Raw text
+        length: Maximum length
+
+    Returns:
+        Truncated text, or None if empty
+    """
+    value = (value or "").strip()
+    return value[:length] or None
+
+
+class FoodProvider:
+    """
+    Base class for external food data sources.
+
+    Providers return foods normalized to the dict shape consumed by
+    FoodService._save_external_foods: name, brand, source, source_id,
+    description and a nutrition dict per serving.
+    """
+
+    name = "base"
+
+    # Whether a slow request may be duplicated (hedged); only safe for
+    # idempotent lookups
+    hedge = True
+
+    async def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Search the provider for foods.
+
+        Args:
+            query: Search query
+            limit: Maximum number of results
+
+        Returns:
+            List of normalized food items
+        """
+        raise NotImplementedError
+
+
+class MockFoodProvider(FoodProvider):
+    """Provider backed by built-in demo data (used for the MVP)."""
+
+    name = "mock"
+    hedge = False
+
+    # Mock food database for demo purposes
+    MOCK_FOODS = [
+        {
+            "name": "Chicken Breast, Raw",
+            "brand": "Generic",
+            "source": "usda",
+            "source_id": "171077",
+            "description": "Raw chicken breast without skin",
+            "nutrition": {
+                "serving_size": 100,
+                "serving_unit": "g",
+                "calories": 165,
+                "protein_g": 31.0,
+                "carbs_g": 0.0,
+                "fats_g": 3.6,
+                "saturated_fat_g": 1.0,
+                "cholesterol_mg": 85,
+                "sodium_mg": 74,
+            }
+        },
+        {
+            "name": "Brown Rice, Cooked",
+            "brand": "Generic",
+            "source": "usda",
+            "source_id": "168878",
+            "description": "Cooked brown rice",
+            "nutrition": {
+                "serving_size": 100,
+                "serving_unit": "g",
+                "calories": 112,
+                "protein_g": 2.6,
+                "carbs_g": 23.5,
+                "fats_g": 0.9,
+                "fiber_g": 1.8,
+                "sodium_mg": 5,
+            }
+        },
+        {
+            "name": "Broccoli, Raw",
+            "brand": None,
+            "source": "usda",
+            "source_id": "170379",
+            "description": "Raw broccoli florets",
+            "nutrition": {
+                "serving_size": 100,
+                "serving_unit": "g",
+                "calories": 34,
+                "protein_g": 2.8,
+                "carbs_g": 6.6,
+                "fats_g": 0.4,
+                "fiber_g": 2.6,
+                "sugar_g": 1.7,
+                "sodium_mg": 33,
+            }
+        },
+        {
+            "name": "Salmon, Atlantic, Raw",
+            "brand": "Generic",
+            "source": "usda",
+            "source_id": "175167",
+            "description": "Raw Atlantic salmon",
+            "nutrition": {
+                "serving_size": 100,
+                "serving_unit": "g",
+                "calories": 208,
+                "protein_g": 20.4,
+                "carbs_g": 0.0,
+                "fats_g": 13.4,
+                "saturated_fat_g": 3.1,
+                "cholesterol_mg": 55,
+                "sodium_mg": 59,
+            }
+        },
+        {
+            "name": "Oatmeal, Dry",
+            "brand": "Generic",
+            "source": "usda",
+            "source_id": "173904",
+            "description": "Dry rolled oats",
+            "nutrition": {
+                "serving_size": 50,
+                "serving_unit": "g",
+                "calories": 190,
+                "protein_g": 6.8,
+                "carbs_g": 32.0,
+                "fats_g": 3.4,
+                "fiber_g": 5.0,
+                "sugar_g": 1.0,
+                "sodium_mg": 5,
+            }
+        },
+        {
+            "name": "Eggs, Whole, Raw",
+            "brand": "Generic",
+            "source": "usda",
+            "source_id": "173424",
+            "description": "Whole raw eggs",
+            "nutrition": {
+                "serving_size": 50,
+                "serving_unit": "g",
+                "calories": 72,
+                "protein_g": 6.3,
+                "carbs_g": 0.4,
+                "fats_g": 4.8,
+                "saturated_fat_g": 1.6,
+                "cholesterol_mg": 186,
+                "sodium_mg": 71,
+            }
+        },
+        {
+            "name": "Banana, Raw",
+            "brand": None,
+            "source": "usda",
+            "source_id": "173944",
+            "description": "Fresh banana",
+            "nutrition": {
+                "serving_size": 100,
+                "serving_unit": "g",
+                "calories": 89,
+                "protein_g": 1.1,
+                "carbs_g": 22.8,
+                "fats_g": 0.3,
+                "fiber_g": 2.6,
+                "sugar_g": 12.2,
+                "sodium_mg": 1,
+            }
+        },
+        {
+            "name": "Greek Yogurt, Plain, Nonfat",
+            "brand": "Generic",
+            "source": "usda",
+            "source_id": "170903",
+            "description": "Plain nonfat Greek yogurt",
+            "nutrition": {
+                "serving_size": 100,
+                "serving_unit": "g",
+                "calories": 59,
+                "protein_g": 10.2,
+                "carbs_g": 3.6,
+                "fats_g": 0.4,
+                "sugar_g": 3.2,
+                "sodium_mg": 36,
+            }
+        },
+    ]
+
+    async def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Search the built-in demo data.
+
+        Args:
+            query: Search query
+            limit: Maximum number of results
+
+        Returns:
+            List of food items
+        """
+        query_lower = query.lower()
+        results = [
+            food for food in self.MOCK_FOODS
+            if query_lower in food["name"].lower()
+        ]
+        return results[:limit]
+
+
+class OpenFoodFactsProvider(FoodProvider):
+    """Provider for the OpenFoodFacts product search API."""
+
+    name = "openfoodfacts"
+
+    FIELDS = "code,product_name,brands,generic_name,nutriments"
+
+    def __init__(self, base_url: Optional[str] = None, timeout: Optional[float] = None):
+        self.base_url = (base_url or settings.OPENFOODFACTS_API_URL).rstrip("/")
+        self.timeout = timeout or settings.FOOD_PROVIDER_TIMEOUT_SECONDS
+
+    async def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Search OpenFoodFacts products.
+
+        Args:
+            query: Search query
+            limit: Maximum number of results
+
+        Returns:
+            List of normalized food items
+        """
+        response = await http_clients.get(self.base_url).get(
+            f"{self.base_url}/search",
+            params={"search_terms": query, "page_size": limit, "fields": self.FIELDS},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        products = response.json().get("products", [])
+
+        results = []
+        for product in products:
+            food = self.parse_product(product)
+            if food:
+                results.append(food)
+        return results[:limit]
+
+    @staticmethod
+    def parse_product(product: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Convert an OpenFoodFacts product into a normalized food item.
+
+        Nutrition is reported per 100 g; sodium and cholesterol are
+        converted from grams to milligrams.
+
+        Args:
+            product: Product from the search response
+
+        Returns:
+            Normalized food item, or None if name, code or energy is missing
+        """
+        nutriments = product.get("nutriments") or {}
+        name = truncate(product.get("product_name"))
+        calories = parse_number(nutriments.get("energy-kcal_100g"))
+        if not name or not product.get("code") or calories is None:
+            return None
+
+        def grams(key: str) -> Optional[float]:
+            return parse_number(nutriments.get(key))
+
+        def milligrams(key: str) -> Optional[float]:
+            value = grams(key)
+            return value * 1000 if value is not None else None
+
+        return {
+            "name": name,
+            "brand": truncate((product.get("brands") or "").split(",")[0]),
+            "source": "openfoodfacts",
+            "source_id": str(product["code"]),
+            "description": product.get("generic_name") or None,
+            "nutrition": {
+                "serving_size": 100,
+                "serving_unit": "g",
+                "calories": calories,
+                "protein_g": grams("proteins_100g") or 0,
+                "carbs_g": grams("carbohydrates_100g") or 0,
+                "fats_g": grams("fat_100g") or 0,
+                "fiber_g": grams("fiber_100g"),
+                "sugar_g": grams("sugars_100g"),
+                "saturated_fat_g": grams("saturated-fat_100g"),
+                "trans_fat_g": grams("trans-fat_100g"),
+                "cholesterol_mg": milligrams("cholesterol_100g"),
+                "sodium_mg": milligrams("sodium_100g"),
+            },
+        }
+
+
+class USDAProvider(FoodProvider):
+    """Provider for the USDA FoodData Central search API."""
+
+    name = "usda"
+
+    # FoodData Central nutrient numbers -> normalized nutrition keys
+    NUTRIENTS = {
+        "208": "calories",
+        "203": "protein_g",
+        "205": "carbs_g",
+        "204": "fats_g",
+        "291": "fiber_g",
+        "269": "sugar_g",
+        "606": "saturated_fat_g",
+        "605": "trans_fat_g",
+        "601": "cholesterol_mg",
+        "307": "sodium_mg",
+    }
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None
+    ):
+        self.base_url = (base_url or settings.USDA_API_URL).rstrip("/")
+        self.api_key = api_key or settings.USDA_API_KEY
+        self.timeout = timeout or settings.FOOD_PROVIDER_TIMEOUT_SECONDS
+
+    async def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Search USDA FoodData Central.
+
+        Args:
+            query: Search query
+            limit: Maximum number of results
+
+        Returns:
+            List of normalized food items
+        """
+        response = await http_clients.get(self.base_url).get(
+            f"{self.base_url}/foods/search",
+            params={"query": query, "pageSize": limit, "api_key": self.api_key},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        foods = response.json().get("foods", [])
+
+        results = []
+        for food in foods:
+            parsed = self.parse_food(food)
+            if parsed:
+                results.append(parsed)
+        return results[:limit]
+
+    @classmethod
+    def parse_food(cls, food: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Convert a FoodData Central search hit into a normalized food item.
+
+        Search hits report nutrients per 100 g.
+
+        Args:
+            food: Food from the search response
+
+        Returns:
+            Normalized food item, or None if description, id or energy is missing
+        """
+        nutrition: Dict[str, Any] = {"serving_size": 100, "serving_unit": "g"}
+        for nutrient in food.get("foodNutrients", []):
+            key = cls.NUTRIENTS.get(str(nutrient.get("nutrientNumber")))
+            value = parse_number(nutrient.get("value"))
+            if key and value is not None:
+                nutrition[key] = value
+
+        name = truncate(food.get("description"))
+        if not name or not food.get("fdcId") or "calories" not in nutrition:
+            return None
+
+        for key in ("protein_g", "carbs_g", "fats_g"):
+            nutrition.setdefault(key, 0)
+
+        return {
+            "name": name,
+            "brand": truncate(food.get("brandOwner") or food.get("brandName")),
+            "source": "usda",
+            "source_id": str(food["fdcId"]),
+            "description": food.get("additionalDescriptions") or None,
+            "nutrition": nutrition,
+        }
+
+
+PROVIDERS = {
+    MockFoodProvider.name: MockFoodProvider,
+    OpenFoodFactsProvider.name: OpenFoodFactsProvider,
+    USDAProvider.name: USDAProvider,
+}
+
+
+def build_providers(names: List[str]) -> List[FoodProvider]:
+    """
+    Instantiate providers by name.
+
+    Args:
+        names: Provider names, e.g. ["openfoodfacts", "usda"]
+
+    Returns:
+        List of providers in the given order
+
+    Raises:
+        ValueError: If a name is unknown
+    """
+    providers = []
+    for name in names:
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown food provider: {name}")
+        providers.append(PROVIDERS[name]())
+    return providers
@@ -0,0 +1,163 @@
+"""Ranked food search backed by trigram and full-text indexes."""
+import unicodedata
+from sqlalchemy.orm import Session
+from sqlalchemy import case, func, or_, literal_column
+from typing import List
+from app.models.food import Food
+from app.services.load_options import food_load_options
+from app.utils.autocomplete import fold_text
+
+# Text search configuration used by the idx_foods_search_tsv expression index.
+# 'simple' avoids language-specific stemming of brand and product names.
+SEARCH_TS_CONFIG = literal_column("'simple'::regconfig")
+
+
+def escape_like(value: str) -> str:
+    """
+    Escape LIKE wildcards so user input is matched literally.
+
+    Args:
+        value: Raw search text
+
+    Returns:
+        Text safe to embed in a LIKE pattern using '\\' as escape character
+    """
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def singularize(word: str) -> str:
+    """
+    Strip common English plural endings from a word.
+
+    Args:
+        word: Lowercase word
+
+    Returns:
+        Singular form, or the word unchanged if it does not look plural
+    """
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "ches", "shes", "xes", "oes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
+
+
+def normalize_query(query: str, fold_accents: bool = True, stem: bool = False) -> str:
+    """
+    Normalize a search query so equivalent spellings compare equal.
+
+    Case, unicode compatibility forms and whitespace are always normalized.
+
+    Args:
+        query: Raw search text
+        fold_accents: Strip accents ("Crème" becomes "creme")
+        stem: Reduce plural words to their singular form
+
+    Returns:
+        Normalized query
+    """
+    text = unicodedata.normalize("NFKC", query).casefold()
+    if fold_accents:
+        text = fold_text(text)
+    words = text.split()
+    if stem:
+        words = [singularize(word) for word in words]
+    return " ".join(words)
+
+
+def food_search_document():
+    """
+    Build the tsvector expression indexed by idx_foods_search_tsv.
+
+    The expression must stay identical to the one in migration 002,
+    otherwise PostgreSQL will not use the index.
+    """
+    return func.to_tsvector(
+        SEARCH_TS_CONFIG,
+        Food.name + literal_column("' '") + func.coalesce(Food.brand, literal_column("''"))
+    )
+
+
+class FoodSearchService:
+    """
+    Service for ranked searches over the local food catalog.
+
+    On PostgreSQL candidates are found through the pg_trgm index on
+    foods.name (substring and fuzzy matches) and the full-text index over
+    name and brand. Other backends (SQLite in tests) fall back to a
+    portable LIKE scan with the same ranking rules.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search(self, query: str, limit: int = 20) -> List[Food]:
+        """
+        Search foods ranked by relevance.
+
+        Exact name matches come first, then prefix matches, then the rest
+        ordered by text rank and similarity.
+
+        Args:
+            query: Search query
+            limit: Maximum number of results
+
+        Returns:
+            List of matching foods, best match first
+        """
+        query = normalize_query(query, fold_accents=False)
+        if not query:
+            return []
+
+        if self.db.get_bind().dialect.name == "postgresql":
+            return self._search_postgresql(query, limit)
+        return self._search_portable(query, limit)
+
+    @staticmethod
+    def _match_rank(query: str):
+        """Rank expression: 0 for exact, 1 for prefix, 2 for other matches."""
+        query_lower = query.lower()
+        name_lower = func.lower(Food.name)
+        return case(
+            (name_lower == query_lower, 0),
+            (name_lower.like(f"{escape_like(query_lower)}%", escape="\\"), 1),
+            else_=2,
+        )
+
+    def _search_postgresql(self, query: str, limit: int) -> List[Food]:
+        """Search using pg_trgm and full-text indexes."""
+        pattern = f"%{escape_like(query)}%"
+        document = food_search_document()
+        ts_query = func.plainto_tsquery(SEARCH_TS_CONFIG, query)
+
+        return self.db.query(Food).options(*food_load_options()).filter(
+            or_(
+                Food.name.ilike(pattern, escape="\\"),
+                Food.name.op("%")(query),
+                document.op("@@")(ts_query),
+            )
+        ).order_by(
+            self._match_rank(query),
+            func.ts_rank(document, ts_query).desc(),
+            func.similarity(Food.name, query).desc(),
+            Food.name,
+        ).limit(limit).all()
+
+    def _search_portable(self, query: str, limit: int) -> List[Food]:
+        """Search using a LIKE scan for backends without trigram support."""
+        pattern = f"%{escape_like(query)}%"
+
+        return self.db.query(Food).options(*food_load_options()).filter(
+            or_(
+                Food.name.ilike(pattern, escape="\\"),
+                Food.brand.ilike(pattern, escape="\\"),
+            )
+        ).order_by(
+            self._match_rank(query),
+            func.length(Food.name),
+            Food.name,
+        ).limit(limit).all()
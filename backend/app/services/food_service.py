@@ -1,68 +1,367 @@
 """Food service for searching and managing foods."""
+from sqlalchemy import insert, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 import uuid
 from fastapi import HTTPException, status
 from app.models.food import Food, NutritionInfo
-from app.schemas.food_schema import FoodCreate, FoodResponse
+from app.schemas.food_schema import FoodCreate, FoodResponse, FoodSuggestion
 from app.services.external_api_service import ExternalAPIService
-from app.utils.cache import cache_get, cache_set
+from app.services.food_search_service import FoodSearchService, normalize_query
+from app.services.load_options import food_load_options
+from app.utils.cache import KeyHitTracker, cache_acquire_lock, cache_get_swr, cache_release_lock, cache_set_swr
+from app.utils.autocomplete import autocomplete_index, publish_autocomplete_entries
+from app.utils.singleflight import SingleFlight
+from app.config import settings
+import asyncio
+import time
 
+# Cache tag shared by all food search results (see cache_invalidate_tag)
+FOOD_SEARCH_CACHE_TAG = "food_search"
 
-class FoodService:
-    """Service for food operations."""
+# How often a worker waiting on another worker's lock re-checks the cache
+LOCK_POLL_INTERVAL_SECONDS = 0.05
 
-    def __init__(self, db: Session):
+# Coalesces identical external searches running in this process
+food_search_flight = SingleFlight()
+
+# Per-query cache outcomes for the /metrics hit-rate report
+FOOD_SEARCH_OUTCOMES = ("local", "hit", "negative_hit", "miss")
+food_search_hits = KeyHitTracker(settings.FOOD_SEARCH_STATS_MAX_QUERIES, FOOD_SEARCH_OUTCOMES)
+
+# Background refreshes and enrichments, kept referenced until done
+_background_tasks: Set[asyncio.Task] = set()
+
+background_stats: Dict[str, int] = {
+    "refreshes": 0,
+    "enrichments": 0,
+    "deduplicated": 0,
+    "succeeded": 0,
+    "failed": 0,
+    "skipped": 0,
+}
+
+
+def food_search_cache_key(query: str) -> str:
+    """
+    Get the cache key for a food search.
+
+    Args:
+        query: Search query
+
+    Returns:
+        Cache key shared by all spellings of the query
+    """
+    return f"food_search:{normalize_query(query, stem=settings.FOOD_SEARCH_STEM_PLURALS)}"
+
+
+class FoodSearchFlow:
+    """
+    Cached, coalesced food search shared by the sync and async services.
+
+    Subclasses provide the database access: _search_local,
+    _persist_external_foods, _background_service and _close.
+    """
+
+    def __init__(self, db):
         self.db = db
         self.external_api = ExternalAPIService()
-
-    async def search_foods(self, query: str, limit: int = 20) -> List[FoodResponse]:
+        # Set by search_foods when external results are still being fetched
+        self.enrichment_pending = False
+
+    async def search_foods(
+        self,
+        query: str,
+        limit: int = 20,
+        background: Optional[bool] = None
+    ) -> List[FoodResponse]:
         """
         Search for foods in local database and external APIs.
 
         Args:
             query: Search query
             limit: Maximum number of results
+            background: On a cache miss, return local results at once and
+                fetch external foods in the background (defaults to
+                FOOD_SEARCH_BACKGROUND_ENRICHMENT); sets enrichment_pending
 
         Returns:
             List of food items
         """
-        # 1. Check local database first
-        local_results = self.db.query(Food).filter(
-            Food.name.ilike(f"%{query}%")
-        ).limit(limit).all()
+        # 1. Check local database first (indexed, ranked by relevance)
+        query = normalize_query(query, fold_accents=False)
+        local_results = await self._search_local(query, limit)
 
+        # 2. Check Redis cache under the normalized query
+        cache_key = food_search_cache_key(query)
         if len(local_results) >= 5:
+            food_search_hits.record(cache_key, "local")
+            return [FoodResponse.model_validate(food) for food in local_results]
+
+        cached = await cache_get_swr(cache_key, beta=settings.FOOD_SEARCH_CACHE_BETA)
+        if cached is not None:
+            food_search_hits.record(cache_key, "hit" if cached.value else "negative_hit")
+            if cached.refresh:
+                self._schedule_background_search(
+                    query, limit, cache_key, "refreshes", seen_soft_expiry=cached.soft_expires_at
+                )
+            return self._cached_responses(cached.value, local_results, limit)
+
+        # 3. Search external APIs once for all concurrent requests
+        food_search_hits.record(cache_key, "miss")
+        if background is None:
+            background = settings.FOOD_SEARCH_BACKGROUND_ENRICHMENT
+        if background:
+            # The next search for this query is served from the cache
+            self._schedule_background_search(query, limit, cache_key, "enrichments")
+            self.enrichment_pending = True
             return [FoodResponse.model_validate(food) for food in local_results]
 
-        # 2. Check Redis cache
-        cache_key = f"food_search:{query}"
-        cached_results = await cache_get(cache_key)
+        return await food_search_flight.do(
+            f"{cache_key}:{limit}",
+            lambda: self._flight_search(query, limit, cache_key)
+        )
+
+    async def _flight_search(self, query: str, limit: int, cache_key: str) -> List[FoodResponse]:
+        """
+        Run a search shared by concurrent requests with a session of its own.
+
+        The task outlives a cancelled leader, whose session is closed when
+        its request ends, so it must not touch that session.
+
+        Args:
+            query: Search query
+            limit: Maximum number of results
+            cache_key: Cache key for this query
+
+        Returns:
+            List of food items
+        """
+        service = self._background_service()
+        try:
+            local_results = await service._search_local(query, limit)
+            return await service._search_external(query, limit, cache_key, local_results)
+        finally:
+            await service._close()
+
+    @staticmethod
+    def _cached_responses(cached_results: list, local_results: List[Food], limit: int) -> List[FoodResponse]:
+        """
+        Build responses from a cached search.
+
+        A cached empty result only records that external APIs had nothing;
+        foods created locally since then are still returned.
+
+        Args:
+            cached_results: Cached food dictionaries
+            local_results: Foods found locally
+            limit: Maximum number of results
+
+        Returns:
+            List of food items
+        """
         if cached_results:
-            return [FoodResponse(**result) for result in cached_results]
-
-        # 3. Search external APIs
-        external_results = await self.external_api.search_openfoodfacts(query, limit)
-
-        # 4. Save external results to database
-        saved_foods = []
-        for result in external_results:
-            food = self._save_external_food(result)
-            if food:
-                saved_foods.append(food)
-
-        # 5. Combine and cache results
-        all_foods = list(local_results) + saved_foods
-        food_responses = [FoodResponse.model_validate(food) for food in all_foods[:limit]]
-
-        # Cache for 1 hour
-        await cache_set(
-            cache_key,
-            [food.model_dump() for food in food_responses],
-            ttl=3600
+            return [FoodResponse(**result) for result in cached_results[:limit]]
+        return [FoodResponse.model_validate(food) for food in local_results]
+
+    async def _search_external(
+        self,
+        query: str,
+        limit: int,
+        cache_key: str,
+        local_results: List[Food],
+        refresh: bool = False,
+        seen_soft_expiry: Optional[float] = None
+    ) -> Optional[List[FoodResponse]]:
+        """
+        Fetch external results and populate the search cache.
+
+        A Redis lock ensures only one worker fills a given cache key; the
+        others wait for its result and only fetch themselves if it does not
+        show up before FOOD_SEARCH_LOCK_WAIT_SECONDS.
+
+        Args:
+            query: Search query
+            limit: Maximum number of results
+            cache_key: Cache key for this query
+            local_results: Foods already found locally
+            refresh: Replace the entry even if it is still fresh; skipped if
+                another worker is at it or has rewritten the entry since
+            seen_soft_expiry: soft_expires_at of the entry when the refresh
+                was queued, None if there was no entry
+
+        Returns:
+            List of food items, or None if a refresh was skipped
+        """
+        token = await cache_acquire_lock(cache_key, settings.FOOD_SEARCH_LOCK_TTL_SECONDS)
+        if token is None:
+            if refresh:
+                return None
+            cached_results = await self._wait_for_cache(cache_key)
+            if cached_results is not None:
+                return self._cached_responses(cached_results, local_results, limit)
+
+        try:
+            # Another worker may have filled the cache before we got the lock
+            if token is not None:
+                cached = await cache_get_swr(cache_key, beta=0)
+                # An early refresh replaces an entry that isn't stale yet, so
+                # only a newer write than the one it was queued for counts
+                if cached is not None and not (refresh and cached.soft_expires_at == seen_soft_expiry):
+                    return self._cached_responses(cached.value, local_results, limit)
+
+            started = time.monotonic()
+            external_results = await self.external_api.search_all(query, limit)
+
+            # Save external results to database in one batch
+            saved_foods = await self._persist_external_foods(external_results)
+            await publish_autocomplete_entries(saved_foods)
+
+            # Combine and cache results
+            all_foods = list(local_results) + saved_foods
+            food_responses = [FoodResponse.model_validate(food) for food in all_foods[:limit]]
+
+            # Searches that found nothing are retried sooner
+            if food_responses:
+                soft_ttl = settings.FOOD_SEARCH_CACHE_SOFT_TTL_SECONDS
+                hard_ttl = settings.FOOD_SEARCH_CACHE_HARD_TTL_SECONDS
+            else:
+                soft_ttl = hard_ttl = settings.FOOD_SEARCH_NEGATIVE_TTL_SECONDS
+            await cache_set_swr(
+                cache_key,
+                [food.model_dump(mode="json") for food in food_responses],
+                soft_ttl=soft_ttl,
+                hard_ttl=hard_ttl,
+                delta=time.monotonic() - started,
+                tags=[FOOD_SEARCH_CACHE_TAG]
+            )
+
+            return food_responses
+        finally:
+            if token is not None:
+                await cache_release_lock(cache_key, token)
+
+    async def _wait_for_cache(self, cache_key: str) -> Optional[list]:
+        """
+        Poll the cache while another worker populates it.
+
+        Args:
+            cache_key: Cache key being populated
+
+        Returns:
+            Cached results, or None if they did not appear in time
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.FOOD_SEARCH_LOCK_WAIT_SECONDS
+        while loop.time() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL_SECONDS)
+            cached = await cache_get_swr(cache_key, beta=0)
+            if cached is not None:
+                return cached.value
+        return None
+
+    def _schedule_background_search(
+        self,
+        query: str,
+        limit: int,
+        cache_key: str,
+        kind: str,
+        seen_soft_expiry: Optional[float] = None
+    ) -> None:
+        """
+        Populate a search cache entry in the background.
+
+        At most one job per query runs in this process; across workers the
+        cache lock makes any duplicate a no-op.
+
+        Args:
+            query: Search query
+            limit: Maximum number of results
+            cache_key: Cache key for this query
+            kind: "refreshes" for stale entries, "enrichments" for misses
+            seen_soft_expiry: soft_expires_at of the entry being refreshed
+        """
+        flight_key = f"{cache_key}:background"
+        if flight_key in food_search_flight:
+            background_stats["deduplicated"] += 1
+            return
+        background_stats[kind] += 1
+        task = food_search_flight.start(
+            flight_key, lambda: self._background_search(query, limit, cache_key, seen_soft_expiry)
         )
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    async def _background_search(
+        self,
+        query: str,
+        limit: int,
+        cache_key: str,
+        seen_soft_expiry: Optional[float] = None
+    ) -> None:
+        """
+        Fetch external results for a search with a session of its own.
+
+        The request that queued the job may have closed its session by the
+        time this runs.
 
-        return food_responses
+        Args:
+            query: Search query
+            limit: Maximum number of results
+            cache_key: Cache key for this query
+            seen_soft_expiry: soft_expires_at of the entry being refreshed
+        """
+        service = self._background_service()
+        try:
+            local_results = await service._search_local(query, limit)
+            result = await service._search_external(
+                query, limit, cache_key, local_results, refresh=True, seen_soft_expiry=seen_soft_expiry
+            )
+            background_stats["succeeded" if result is not None else "skipped"] += 1
+        except Exception as e:
+            background_stats["failed"] += 1
+            print(f"Food search background error: {e}")
+        finally:
+            await service._close()
+
+    async def _search_local(self, query: str, limit: int) -> List[Food]:
+        """Run the ranked local search."""
+        raise NotImplementedError
+
+    async def _persist_external_foods(self, foods_data: List[dict]) -> List[Food]:
+        """Save external foods, returning them with their nutrition loaded."""
+        raise NotImplementedError
+
+    def _background_service(self) -> "FoodSearchFlow":
+        """Create a service on a new session for work outliving the request."""
+        raise NotImplementedError
+
+    async def _close(self) -> None:
+        """Close the service's session."""
+        raise NotImplementedError
+
+
+class FoodService(FoodSearchFlow):
+    """Service for food operations."""
+
+    def __init__(self, db: Session):
+        super().__init__(db)
+        self.search_engine = FoodSearchService(db)
+
+    async def _search_local(self, query: str, limit: int) -> List[Food]:
+        return self.search_engine.search(query, limit)
+
+    async def _persist_external_foods(self, foods_data: List[dict]) -> List[Food]:
+        return self._save_external_foods(foods_data)
+
+    def _background_service(self) -> "FoodService":
+        service = FoodService(Session(bind=self.db.get_bind()))
+        service.external_api = self.external_api
+        return service
+
+    async def _close(self) -> None:
+        self.db.close()
 
     def _save_external_food(self, food_data: dict) -> Optional[Food]:
         """
@@ -74,53 +373,111 @@ class FoodService:
         Returns:
             Saved food object or None if already exists
         """
-        # Check if food already exists
-        existing = self.db.query(Food).filter(
-            Food.source == food_data["source"],
-            Food.source_id == food_data["source_id"]
-        ).first()
+        foods = self._save_external_foods([food_data])
+        return foods[0] if foods else None
 
-        if existing:
-            return existing
+    def _save_external_foods(self, foods_data: List[dict]) -> List[Food]:
+        """
+        Save a batch of external food data in a single transaction.
 
-        # Create food
-        food = Food(
-            id=uuid.uuid4(),
-            name=food_data["name"],
-            brand=food_data.get("brand"),
-            source=food_data["source"],
-            source_id=food_data["source_id"],
-            description=food_data.get("description"),
-            is_verified=True if food_data["source"] == "usda" else False
-        )
+        Existing (source, source_id) pairs are resolved with one query, new
+        foods and their nutrition rows are written with multi-row inserts,
+        and concurrent writers are tolerated through ON CONFLICT DO NOTHING
+        on the unique idx_foods_source_id index.
 
-        self.db.add(food)
-        self.db.flush()
+        Args:
+            foods_data: List of external food data
 
-        # Create nutrition info
-        nutrition_data = food_data["nutrition"]
-        nutrition = NutritionInfo(
-            id=uuid.uuid4(),
-            food_id=food.id,
-            serving_size=nutrition_data["serving_size"],
-            serving_unit=nutrition_data["serving_unit"],
-            calories=nutrition_data["calories"],
-            protein_g=nutrition_data.get("protein_g", 0),
-            carbs_g=nutrition_data.get("carbs_g", 0),
-            fats_g=nutrition_data.get("fats_g", 0),
-            fiber_g=nutrition_data.get("fiber_g"),
-            sugar_g=nutrition_data.get("sugar_g"),
-            saturated_fat_g=nutrition_data.get("saturated_fat_g"),
-            trans_fat_g=nutrition_data.get("trans_fat_g"),
-            cholesterol_mg=nutrition_data.get("cholesterol_mg"),
-            sodium_mg=nutrition_data.get("sodium_mg"),
-        )
+        Returns:
+            Saved or already existing foods, in input order
+        """
+        # Deduplicate the batch, keeping the first occurrence of each key
+        by_key = {}
+        for food_data in foods_data:
+            by_key.setdefault((food_data["source"], food_data["source_id"]), food_data)
+        if not by_key:
+            return []
+
+        source_keys = tuple_(Food.source, Food.source_id).in_(list(by_key))
+        existing = {
+            (row.source, row.source_id)
+            for row in self.db.query(Food.source, Food.source_id).filter(source_keys)
+        }
+
+        food_rows = []
+        nutrition_rows = {}
+        for key, food_data in by_key.items():
+            if key in existing:
+                continue
+            food_id = uuid.uuid4()
+            food_rows.append({
+                "id": food_id,
+                "name": food_data["name"],
+                "brand": food_data.get("brand"),
+                "source": food_data["source"],
+                "source_id": food_data["source_id"],
+                "description": food_data.get("description"),
+                "is_verified": food_data["source"] == "usda",
+            })
+            nutrition_data = food_data["nutrition"]
+            nutrition_rows[food_id] = {
+                "id": uuid.uuid4(),
+                "food_id": food_id,
+                "serving_size": nutrition_data["serving_size"],
+                "serving_unit": nutrition_data["serving_unit"],
+                "calories": nutrition_data["calories"],
+                "protein_g": nutrition_data.get("protein_g", 0),
+                "carbs_g": nutrition_data.get("carbs_g", 0),
+                "fats_g": nutrition_data.get("fats_g", 0),
+                "fiber_g": nutrition_data.get("fiber_g"),
+                "sugar_g": nutrition_data.get("sugar_g"),
+                "saturated_fat_g": nutrition_data.get("saturated_fat_g"),
+                "trans_fat_g": nutrition_data.get("trans_fat_g"),
+                "cholesterol_mg": nutrition_data.get("cholesterol_mg"),
+                "sodium_mg": nutrition_data.get("sodium_mg"),
+            }
+
+        inserted_ids = set()
+        if food_rows:
+            inserted_ids = self._insert_foods_ignoring_conflicts(food_rows)
+            if inserted_ids:
+                self.db.execute(
+                    insert(NutritionInfo),
+                    [nutrition_rows[food_id] for food_id in nutrition_rows if food_id in inserted_ids]
+                )
+            self.db.commit()
+
+            for row in food_rows:
+                if row["id"] in inserted_ids:
+                    autocomplete_index.add(row["id"], row["name"], row["brand"])
+
+        foods = self.db.query(Food).options(*food_load_options()).filter(source_keys).all()
+        foods_by_key = {(food.source, food.source_id): food for food in foods}
+        return [foods_by_key[key] for key in by_key if key in foods_by_key]
+
+    def _insert_foods_ignoring_conflicts(self, rows: List[dict]) -> set:
+        """
+        Insert food rows in one statement, skipping existing source keys.
 
-        self.db.add(nutrition)
-        self.db.commit()
-        self.db.refresh(food)
+        Args:
+            rows: Food column values
 
-        return food
+        Returns:
+            IDs of the rows that were actually inserted
+        """
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            self.db.execute(insert(Food), rows)
+            return {row["id"] for row in rows}
+
+        stmt = dialect_insert(Food).values(rows).on_conflict_do_nothing(
+            index_elements=["source", "source_id"]
+        ).returning(Food.id)
+        return {food_id for (food_id,) in self.db.execute(stmt)}
 
     def get_food_by_id(self, food_id: str) -> Food:
         """
@@ -135,7 +492,7 @@ class FoodService:
         Raises:
             HTTPException: If food not found
         """
-        food = self.db.query(Food).filter(Food.id == food_id).first()
+        food = self.db.query(Food).options(*food_load_options()).filter(Food.id == food_id).first()
         if not food:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -192,5 +549,67 @@ class FoodService:
         self.db.add(nutrition)
         self.db.commit()
         self.db.refresh(food)
+        autocomplete_index.add(food.id, food.name, food.brand)
 
         return food
+
+    @staticmethod
+    def autocomplete(query: str, limit: int = 10) -> List[FoodSuggestion]:
+        """
+        Suggest foods for partially typed text from the in-memory index.
+
+        Needs no database session.
+
+        Args:
+            query: Partial search text
+            limit: Maximum number of suggestions
+
+        Returns:
+            List of lightweight food suggestions
+        """
+        return [
+            FoodSuggestion(**suggestion)
+            for suggestion in autocomplete_index.search(query, limit)
+        ]
+
+    @staticmethod
+    def build_autocomplete_index(db: Session) -> int:
+        """
+        Load all food names and brands into the autocomplete index.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of indexed foods
+        """
+        rows = db.query(Food.id, Food.name, Food.brand).yield_per(5000)
+        return autocomplete_index.build(rows)
+
+
+class AsyncFoodService(FoodSearchFlow):
+    """
+    Food search on an AsyncSession.
+
+    Shares the caching, coalescing and background flow of FoodSearchFlow;
+    database work runs through AsyncSession.run_sync, so the event loop
+    awaits queries instead of blocking on them. Only the search is
+    offered here; other food operations remain on FoodService and get_db.
+    """
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db)
+
+    async def _search_local(self, query: str, limit: int) -> List[Food]:
+        return await self.db.run_sync(lambda session: FoodSearchService(session).search(query, limit))
+
+    async def _persist_external_foods(self, foods_data: List[dict]) -> List[Food]:
+        return await self.db.run_sync(lambda session: FoodService(session)._save_external_foods(foods_data))
+
+    def _background_service(self) -> "AsyncFoodService":
+        service = AsyncFoodService(AsyncSession(bind=self.db.bind, autoflush=False, expire_on_commit=False))
+        service.external_api = self.external_api
+        return service
+
+    async def _close(self) -> None:
+        await self.db.close()
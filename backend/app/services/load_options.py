@@ -0,0 +1,49 @@
+"""Eager loading strategies matching the response schemas.
+
+Each helper returns the loader options needed to serialize a model with its
+response schema without lazy loads, so list endpoints issue a fixed number
+of queries however many rows they return.
+"""
+from typing import List
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+from app.models.food import Food
+from app.models.meal_log import MealLog
+from app.models.recipe import Recipe, RecipeIngredient
+
+
+def food_load_options() -> List[LoaderOption]:
+    """
+    Get loader options for FoodResponse.
+
+    Returns:
+        Options loading the food's nutrition
+    """
+    return [selectinload(Food.nutrition)]
+
+
+def recipe_load_options() -> List[LoaderOption]:
+    """
+    Get loader options for RecipeResponse and recipe nutrition.
+
+    Returns:
+        Options loading ingredients with their foods and nutrition
+    """
+    return [
+        selectinload(Recipe.ingredients)
+        .selectinload(RecipeIngredient.food)
+        .options(*food_load_options())
+    ]
+
+
+def meal_log_load_options() -> List[LoaderOption]:
+    """
+    Get loader options for MealLogResponse.
+
+    Returns:
+        Options loading the logged food or recipe graph
+    """
+    return [
+        selectinload(MealLog.food).options(*food_load_options()),
+        selectinload(MealLog.recipe).options(*recipe_load_options()),
+    ]
@@ -0,0 +1,219 @@
+"""Streaming meal log exports."""
+import csv
+import io
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Iterator, List, Optional, Sequence
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.food import Food
+from app.models.meal_log import MealLog
+from app.models.recipe import Recipe
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+PARQUET_AVAILABLE = pyarrow is not None
+
+EXPORT_COLUMNS = (
+    "id", "logged_date", "logged_time", "meal_type",
+    "food_id", "food_name", "recipe_id", "recipe_name",
+    "quantity", "unit", "calories", "protein_g", "carbs_g", "fats_g",
+    "notes", "created_at",
+)
+
+# Format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting bytes until they are taken.
+
+    Tracks its own position so the Parquet writer's offsets stay right
+    after earlier bytes have been handed out.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class MealLogExporter:
+    """
+    Export a user's meal logs in fixed-size batches.
+
+    Rows are fetched with yield_per (a server-side cursor on PostgreSQL)
+    and encoded batch by batch, so memory use does not grow with the
+    length of the history. Food and recipe names are joined in the same
+    query rather than loaded per row.
+    """
+
+    def __init__(self, db: Session, batch_size: int = settings.MEAL_LOG_EXPORT_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+
+    def batches(
+        self,
+        user_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Iterator[Sequence[tuple]]:
+        """
+        Fetch the user's logs in batches of rows ordered by date.
+
+        Args:
+            user_id: User ID
+            start_date: Only export from this date (inclusive)
+            end_date: Only export up to this date (inclusive)
+
+        Yields:
+            Lists of rows with the EXPORT_COLUMNS values
+        """
+        conditions = [MealLog.user_id == user_id]
+        if start_date is not None:
+            conditions.append(MealLog.logged_date >= start_date)
+        if end_date is not None:
+            conditions.append(MealLog.logged_date <= end_date)
+
+        stmt = select(
+            MealLog.id, MealLog.logged_date, MealLog.logged_time, MealLog.meal_type,
+            MealLog.food_id, Food.name, MealLog.recipe_id, Recipe.name,
+            MealLog.quantity, MealLog.unit,
+            MealLog.calories, MealLog.protein_g, MealLog.carbs_g, MealLog.fats_g,
+            MealLog.notes, MealLog.created_at,
+        ).outerjoin(Food, MealLog.food_id == Food.id).outerjoin(
+            Recipe, MealLog.recipe_id == Recipe.id
+        ).where(*conditions).order_by(
+            MealLog.logged_date, MealLog.logged_time, MealLog.created_at
+        ).execution_options(yield_per=self.batch_size)
+
+        for partition in self.db.execute(stmt).partitions():
+            yield partition
+
+    def stream(
+        self,
+        export_format: str,
+        user_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Iterator[bytes]:
+        """
+        Encode the user's logs, closing the session when done.
+
+        Args:
+            export_format: "csv", "ndjson" or "parquet"
+            user_id: User ID
+            start_date: Only export from this date (inclusive)
+            end_date: Only export up to this date (inclusive)
+
+        Yields:
+            Encoded chunks, one or more per batch
+        """
+        encode = {"csv": self.csv, "ndjson": self.ndjson, "parquet": self.parquet}[export_format]
+        try:
+            yield from encode(self.batches(user_id, start_date, end_date))
+        finally:
+            self.db.close()
+
+    def csv(self, batches: Iterator[Sequence[tuple]]) -> Iterator[bytes]:
+        """Encode batches as CSV with a header row."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue().encode()
+        for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(
+                ["" if value is None else _json_value(value) for value in row] for row in batch
+            )
+            yield buffer.getvalue().encode()
+
+    def ndjson(self, batches: Iterator[Sequence[tuple]]) -> Iterator[bytes]:
+        """Encode batches as one JSON object per line."""
+        for batch in batches:
+            yield "".join(
+                json.dumps({column: _json_value(value) for column, value in zip(EXPORT_COLUMNS, row)}) + "\n"
+                for row in batch
+            ).encode()
+
+    def parquet(self, batches: Iterator[Sequence[tuple]]) -> Iterator[bytes]:
+        """Encode batches as a Parquet file with one row group per batch."""
+        schema = pyarrow.schema([
+            ("id", pyarrow.string()),
+            ("logged_date", pyarrow.date32()),
+            ("logged_time", pyarrow.time64("us")),
+            ("meal_type", pyarrow.string()),
+            ("food_id", pyarrow.string()),
+            ("food_name", pyarrow.string()),
+            ("recipe_id", pyarrow.string()),
+            ("recipe_name", pyarrow.string()),
+            ("quantity", pyarrow.float64()),
+            ("unit", pyarrow.string()),
+            ("calories", pyarrow.float64()),
+            ("protein_g", pyarrow.float64()),
+            ("carbs_g", pyarrow.float64()),
+            ("fats_g", pyarrow.float64()),
+            ("notes", pyarrow.string()),
+            ("created_at", pyarrow.timestamp("us", tz="UTC")),
+        ])
+        sink = _ChunkSink()
+        writer = pyarrow.parquet.ParquetWriter(sink, schema)
+        try:
+            for batch in batches:
+                columns = list(zip(*batch))
+                arrays = [
+                    pyarrow.array(
+                        [
+                            None if value is None
+                            else str(value) if isinstance(value, UUID)
+                            else float(value) if isinstance(value, Decimal)
+                            else value
+                            for value in values
+                        ],
+                        type=field.type
+                    )
+                    for field, values in zip(schema, columns)
+                ]
+                writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+                yield sink.take()
+        finally:
+            writer.close()
+        yield sink.take()
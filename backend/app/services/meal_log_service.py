@@ -1,14 +1,21 @@
 """Meal log service for logging and tracking meals."""
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
-from datetime import date, datetime
+from sqlalchemy import Date, func, insert, literal, literal_column, select, true, union_all
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
 import uuid
 from fastapi import HTTPException, status
+from app.models.food import Food
 from app.models.meal_log import MealLog
+from app.models.recipe import Recipe
 from app.models.user import User
-from app.schemas.meal_log_schema import MealLogCreate, DailySummary
+from app.schemas.meal_log_schema import (
+    MealLogCreate, DailySummary, DailySummaryItem, MealTypeTotals, SummaryRangeResponse
+)
+from app.services.load_options import food_load_options, meal_log_load_options, recipe_load_options
+from app.services.nutrition_rollup_service import NutritionRollupService
 from app.utils.nutrition_calculator import NutritionCalculator
+from app.config import settings
 
 
 class MealLogService:
@@ -30,23 +37,212 @@ class MealLogService:
             Created meal log with calculated nutrition
         """
         # Validate that either food_id or recipe_id is provided
-        if not log_data.food_id and not log_data.recipe_id:
+        error = self._validate_source(log_data)
+        if error:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+
+        # Calculate nutrition based on food or recipe
+        nutrition = self._calculate_log_nutrition(log_data)
+
+        meal_log = self._build_meal_log(log_data, user_id, nutrition)
+
+        self.db.add(meal_log)
+        NutritionRollupService(self.db).add_log(meal_log)
+        self.db.commit()
+        self.db.refresh(meal_log)
+
+        return meal_log
+
+    def create_meal_logs(self, entries: List[MealLogCreate], user_id: str) -> List[MealLog]:
+        """
+        Create several meal log entries in one transaction.
+
+        Referenced foods and recipes are loaded with one query each, and
+        either every entry is saved or none is.
+
+        Args:
+            entries: Meal log data for each entry
+            user_id: User ID
+
+        Returns:
+            Created meal logs, in request order
+
+        Raises:
+            HTTPException: 400 if the batch is too large, 422 listing the
+                index and reason of every invalid entry
+        """
+        if len(entries) > settings.MEAL_LOG_BATCH_MAX_ENTRIES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Either food_id or recipe_id must be provided"
+                detail=f"A batch cannot contain more than {settings.MEAL_LOG_BATCH_MAX_ENTRIES} entries"
             )
 
-        if log_data.food_id and log_data.recipe_id:
+        food_ids = {entry.food_id for entry in entries if entry.food_id}
+        recipe_ids = {entry.recipe_id for entry in entries if entry.recipe_id}
+        foods: Dict[uuid.UUID, Food] = {}
+        recipes: Dict[uuid.UUID, Recipe] = {}
+        if food_ids:
+            foods = {
+                food.id: food
+                for food in self.db.query(Food).options(*food_load_options()).filter(Food.id.in_(food_ids))
+            }
+        if recipe_ids:
+            recipes = {
+                recipe.id: recipe
+                for recipe in self.db.query(Recipe).options(*recipe_load_options()).filter(Recipe.id.in_(recipe_ids))
+            }
+
+        meal_logs = []
+        errors = []
+        for index, entry in enumerate(entries):
+            error = self._validate_source(entry)
+            if not error and entry.food_id:
+                food = foods.get(entry.food_id)
+                if food and food.nutrition:
+                    nutrition = self._food_nutrition(food, float(entry.quantity), entry.unit)
+                else:
+                    error = "Food not found"
+            elif not error:
+                recipe = recipes.get(entry.recipe_id)
+                if recipe:
+                    nutrition = self._recipe_nutrition(recipe, float(entry.quantity))
+                else:
+                    error = "Recipe not found"
+            if error:
+                errors.append({"index": index, "detail": error})
+            else:
+                meal_logs.append(self._build_meal_log(entry, user_id, nutrition))
+
+        if errors:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=errors)
+
+        self.db.add_all(meal_logs)
+        NutritionRollupService(self.db).add_logs(meal_logs)
+        self.db.commit()
+
+        created = {
+            meal_log.id: meal_log
+            for meal_log in self.db.query(MealLog).options(*meal_log_load_options()).filter(
+                MealLog.id.in_([meal_log.id for meal_log in meal_logs])
+            )
+        }
+        return [created[meal_log.id] for meal_log in meal_logs]
+
+    def copy_meal_logs(
+        self,
+        user_id: str,
+        source_date: date,
+        target_dates: List[date],
+        meal_type: Optional[str] = None
+    ) -> int:
+        """
+        Copy a day's meal logs to other dates.
+
+        The copies are made with a single INSERT ... SELECT and keep the
+        source logs' calculated nutrition. On PostgreSQL the day totals are
+        updated in the same statement from the rows actually inserted.
+
+        Args:
+            user_id: User ID
+            source_date: Date to copy logs from
+            target_dates: Dates to copy the logs to
+            meal_type: Only copy logs of this meal type
+
+        Returns:
+            Number of meal logs created
+
+        Raises:
+            HTTPException: If the target dates are invalid
+        """
+        target_dates = sorted(set(target_dates))
+        if source_date in target_dates:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Target dates must differ from the source date"
+            )
+        if len(target_dates) > settings.MEAL_LOG_COPY_MAX_TARGET_DATES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot log both food and recipe in the same entry"
+                detail=f"Cannot copy to more than {settings.MEAL_LOG_COPY_MAX_TARGET_DATES} dates"
             )
 
-        # Calculate nutrition based on food or recipe
-        nutrition = self._calculate_log_nutrition(log_data)
+        targets = union_all(
+            *(select(literal(target_date, Date).label("target_date")) for target_date in target_dates)
+        ).subquery("targets")
+        conditions = [MealLog.user_id == user_id, MealLog.logged_date == source_date]
+        if meal_type:
+            conditions.append(MealLog.meal_type == meal_type)
+
+        copied_columns = [
+            "user_id", "food_id", "recipe_id", "quantity", "unit",
+            "calories", "protein_g", "carbs_g", "fats_g", "meal_type", "logged_time", "notes",
+        ]
+
+        def copies(*leading):
+            # One row per source log and target date
+            return select(
+                *leading,
+                *(getattr(MealLog, column) for column in copied_columns),
+                targets.c.target_date,
+            ).select_from(MealLog).join(targets, true()).where(*conditions)
+
+        rollup = NutritionRollupService(self.db)
+        new_id = self._new_uuid_sql()
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            # Totals come from the rows the INSERT returns, so logs added to
+            # or changed on the source date meanwhile can't skew them
+            copied = rollup.add_inserted_logs(
+                insert(MealLog).from_select(["id", *copied_columns, "logged_date"], copies(new_id))
+            )
+        else:
+            if new_id is not None:
+                # SQLite serializes writers, so the rollup below sees the same rows
+                result = self.db.execute(
+                    insert(MealLog).from_select(["id", *copied_columns, "logged_date"], copies(new_id))
+                )
+                copied = result.rowcount
+            else:
+                rows = [
+                    {"id": uuid.uuid4(), **dict(zip([*copied_columns, "logged_date"], row))}
+                    for row in self.db.execute(copies())
+                ]
+                if rows:
+                    self.db.execute(insert(MealLog), rows)
+                copied = len(rows)
+
+            if copied:
+                rollup.add_copied_logs(user_id, source_date, targets, meal_type)
+        self.db.commit()
 
-        # Create meal log
-        meal_log = MealLog(
+        return copied
+
+    def _new_uuid_sql(self):
+        """SQL expression generating a random UUID per row, if the backend has one."""
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            return func.gen_random_uuid()
+        if dialect == "sqlite":
+            # Version 4 UUID text, matching what uuid.uuid4() would store
+            return literal_column(
+                "lower(hex(randomblob(4))) || '-' || lower(hex(randomblob(2))) || '-4' || "
+                "substr(lower(hex(randomblob(2))), 2) || '-' || "
+                "substr('89ab', abs(random()) % 4 + 1, 1) || substr(lower(hex(randomblob(2))), 2) || '-' || "
+                "lower(hex(randomblob(6)))"
+            )
+        return None
+
+    def _validate_source(self, log_data: MealLogCreate) -> Optional[str]:
+        """Check that exactly one of food_id and recipe_id is set."""
+        if not log_data.food_id and not log_data.recipe_id:
+            return "Either food_id or recipe_id must be provided"
+        if log_data.food_id and log_data.recipe_id:
+            return "Cannot log both food and recipe in the same entry"
+        return None
+
+    def _build_meal_log(self, log_data: MealLogCreate, user_id: str, nutrition: dict) -> MealLog:
+        """Create an unsaved meal log with calculated nutrition."""
+        return MealLog(
             id=uuid.uuid4(),
             user_id=user_id,
             food_id=log_data.food_id,
@@ -63,12 +259,6 @@ class MealLogService:
             fats_g=nutrition['fats_g'],
         )
 
-        self.db.add(meal_log)
-        self.db.commit()
-        self.db.refresh(meal_log)
-
-        return meal_log
-
     def _calculate_log_nutrition(self, log_data: MealLogCreate) -> dict:
         """
         Calculate nutrition for a meal log entry.
@@ -79,49 +269,54 @@ class MealLogService:
         Returns:
             Dictionary with nutrition values
         """
-        from app.models.food import Food
-        from app.models.recipe import Recipe
-
         if log_data.food_id:
             # Get food and calculate nutrition
-            food = self.db.query(Food).filter(Food.id == log_data.food_id).first()
+            food = self.db.query(Food).options(*food_load_options()).filter(
+                Food.id == log_data.food_id
+            ).first()
             if not food or not food.nutrition:
                 raise HTTPException(status_code=404, detail="Food not found")
 
-            nutrition_info = {
-                'serving_size': float(food.nutrition.serving_size),
-                'serving_unit': food.nutrition.serving_unit,
-                'calories': float(food.nutrition.calories),
-                'protein_g': float(food.nutrition.protein_g),
-                'carbs_g': float(food.nutrition.carbs_g),
-                'fats_g': float(food.nutrition.fats_g),
-            }
-
-            return self.nutrition_calc.calculate_for_quantity(
-                nutrition_info,
-                float(log_data.quantity),
-                log_data.unit
-            )
+            return self._food_nutrition(food, float(log_data.quantity), log_data.unit)
 
         elif log_data.recipe_id:
             # Get recipe and calculate nutrition
-            from app.services.recipe_service import RecipeService
-            recipe_service = RecipeService(self.db)
-            nutrition = recipe_service.calculate_recipe_nutrition(str(log_data.recipe_id))
-
-            # If logging servings of a recipe
-            per_serving = nutrition['per_serving']
-            multiplier = float(log_data.quantity)  # quantity = number of servings
-
-            return {
-                'calories': per_serving['calories'] * multiplier,
-                'protein_g': per_serving['protein_g'] * multiplier,
-                'carbs_g': per_serving['carbs_g'] * multiplier,
-                'fats_g': per_serving['fats_g'] * multiplier,
-            }
+            recipe = self.db.query(Recipe).options(*recipe_load_options()).filter(
+                Recipe.id == log_data.recipe_id
+            ).first()
+            if not recipe:
+                raise HTTPException(status_code=404, detail="Recipe not found")
+
+            return self._recipe_nutrition(recipe, float(log_data.quantity))
 
         return {'calories': 0, 'protein_g': 0, 'carbs_g': 0, 'fats_g': 0}
 
+    def _food_nutrition(self, food: Food, quantity: float, unit: str) -> dict:
+        """Calculate nutrition for a quantity of a food loaded with its nutrition."""
+        nutrition_info = {
+            'serving_size': float(food.nutrition.serving_size),
+            'serving_unit': food.nutrition.serving_unit,
+            'calories': float(food.nutrition.calories),
+            'protein_g': float(food.nutrition.protein_g),
+            'carbs_g': float(food.nutrition.carbs_g),
+            'fats_g': float(food.nutrition.fats_g),
+        }
+
+        return self.nutrition_calc.calculate_for_quantity(nutrition_info, quantity, unit)
+
+    def _recipe_nutrition(self, recipe: Recipe, servings: float) -> dict:
+        """Calculate nutrition for servings of a recipe loaded with its ingredients."""
+        from app.services.recipe_service import RecipeService
+        per_serving = RecipeService(self.db).calculate_nutrition_for(recipe)['per_serving']
+
+        # quantity = number of servings
+        return {
+            'calories': per_serving['calories'] * servings,
+            'protein_g': per_serving['protein_g'] * servings,
+            'carbs_g': per_serving['carbs_g'] * servings,
+            'fats_g': per_serving['fats_g'] * servings,
+        }
+
     def get_daily_logs(self, user_id: str, log_date: date) -> List[MealLog]:
         """
         Get all meal logs for a specific date.
@@ -131,43 +326,72 @@ class MealLogService:
             log_date: Date to get logs for
 
         Returns:
-            List of meal logs
+            List of meal logs with their foods and recipes loaded
         """
-        logs = self.db.query(MealLog).filter(
+        logs = self.db.query(MealLog).options(*meal_log_load_options()).filter(
             MealLog.user_id == user_id,
             MealLog.logged_date == log_date
         ).order_by(MealLog.logged_time).all()
 
         return logs
 
-    def calculate_daily_summary(self, user_id: str, log_date: date) -> DailySummary:
+    def get_daily_logs_with_summary(self, user: User, log_date: date) -> Tuple[List[MealLog], DailySummary]:
+        """
+        Get a day's meal logs together with their summary.
+
+        Args:
+            user: User whose logs to get (targets are read from it)
+            log_date: Date to get logs for
+
+        Returns:
+            Tuple of meal logs and daily summary
+        """
+        logs = self.get_daily_logs(str(user.id), log_date)
+        return logs, self.calculate_daily_summary(str(user.id), log_date, user=user)
+
+    def calculate_daily_summary(self, user_id: str, log_date: date, user: Optional[User] = None) -> DailySummary:
         """
         Calculate daily nutrition summary.
 
+        Totals are read from the day's daily_nutrition_totals rows.
+
         Args:
             user_id: User ID
             log_date: Date to summarize
+            user: Already loaded user, to avoid looking up targets again
 
         Returns:
             Daily summary with totals and targets
         """
-        # Get all logs for the day
-        logs = self.get_daily_logs(user_id, log_date)
+        rows = NutritionRollupService(self.db).get_day(user_id, log_date)
+
+        by_meal_type = {
+            row.meal_type: MealTypeTotals(
+                calories=float(row.calories),
+                protein_g=float(row.protein_g),
+                carbs_g=float(row.carbs_g),
+                fats_g=float(row.fats_g),
+                entry_count=row.log_count,
+            )
+            for row in rows
+        }
 
         # Calculate totals
-        total_calories = sum(float(log.calories or 0) for log in logs)
-        total_protein = sum(float(log.protein_g or 0) for log in logs)
-        total_carbs = sum(float(log.carbs_g or 0) for log in logs)
-        total_fats = sum(float(log.fats_g or 0) for log in logs)
+        total_calories = sum(totals.calories for totals in by_meal_type.values())
+        total_protein = sum(totals.protein_g for totals in by_meal_type.values())
+        total_carbs = sum(totals.carbs_g for totals in by_meal_type.values())
+        total_fats = sum(totals.fats_g for totals in by_meal_type.values())
 
         # Get user targets
-        user = self.db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            user = self.db.query(User).filter(User.id == user_id).first()
 
         summary = DailySummary(
             total_calories=total_calories,
             total_protein_g=total_protein,
             total_carbs_g=total_carbs,
             total_fats_g=total_fats,
+            by_meal_type=by_meal_type,
             calorie_target=user.daily_calorie_target if user else None,
             protein_target_g=float(user.protein_target_g) if user and user.protein_target_g else None,
             carbs_target_g=float(user.carbs_target_g) if user and user.carbs_target_g else None,
@@ -186,6 +410,77 @@ class MealLogService:
 
         return summary
 
+    def get_summary_range(self, user_id: str, start_date: date, end_date: date) -> SummaryRangeResponse:
+        """
+        Summarize nutrition per day over a date range.
+
+        Args:
+            user_id: User ID
+            start_date: First date (inclusive)
+            end_date: Last date (inclusive)
+
+        Returns:
+            One summary per day (zeros for days without logs) and averages
+            over the days that have logs
+
+        Raises:
+            HTTPException: If the range is reversed or too long
+        """
+        days = (end_date - start_date).days + 1
+        if days < 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="end must not be before start"
+            )
+        if days > settings.MEAL_LOG_SUMMARY_MAX_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Date range cannot exceed {settings.MEAL_LOG_SUMMARY_MAX_DAYS} days"
+            )
+
+        rows = NutritionRollupService(self.db).get_daily_totals(user_id, start_date, end_date)
+        logged = {
+            logged_date: DailySummaryItem(
+                date=logged_date,
+                total_calories=float(calories),
+                total_protein_g=float(protein),
+                total_carbs_g=float(carbs),
+                total_fats_g=float(fats),
+                meal_count=int(count),
+            )
+            for logged_date, calories, protein, carbs, fats, count in rows
+        }
+
+        daily_summaries = []
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            daily_summaries.append(logged.get(day) or DailySummaryItem(
+                date=day,
+                total_calories=0,
+                total_protein_g=0,
+                total_carbs_g=0,
+                total_fats_g=0,
+                meal_count=0,
+            ))
+
+        def average(field: str) -> float:
+            if not logged:
+                return 0.0
+            return round(sum(getattr(item, field) for item in logged.values()) / len(logged), 2)
+
+        averages = {
+            "calories": average("total_calories"),
+            "protein_g": average("total_protein_g"),
+            "carbs_g": average("total_carbs_g"),
+            "fats_g": average("total_fats_g"),
+        }
+
+        return SummaryRangeResponse(
+            daily_summaries=daily_summaries,
+            averages=averages,
+            days_logged=len(logged)
+        )
+
     def delete_meal_log(self, log_id: str, user_id: str) -> bool:
         """
         Delete a meal log.
@@ -207,6 +502,7 @@ class MealLogService:
         if str(meal_log.user_id) != user_id:
             raise HTTPException(status_code=403, detail="Not authorized to delete this log")
 
+        NutritionRollupService(self.db).remove_log(meal_log)
         self.db.delete(meal_log)
         self.db.commit()
 
@@ -0,0 +1,306 @@
+"""Daily nutrition rollups maintained alongside meal logs."""
+from sqlalchemy.orm import Session
+from sqlalchemy import FromClause, Insert, delete, func, insert, literal_column, select, true, update
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import date
+from app.models.meal_log import DailyNutritionTotal, MealLog
+
+NUTRIENT_COLUMNS = ("calories", "protein_g", "carbs_g", "fats_g")
+
+KEY_COLUMNS = ("user_id", "logged_date", "meal_type")
+
+
+class NutritionRollupService:
+    """
+    Service for daily_nutrition_totals.
+
+    Meal log writes apply their nutrition as atomic increments in the same
+    transaction, so reads never have to re-aggregate meal_logs. Callers
+    commit; rebuild() repairs totals that drifted from the logs.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def add_log(self, meal_log: MealLog) -> None:
+        """
+        Add a meal log's nutrition to its day's totals.
+
+        Args:
+            meal_log: Meal log being created
+        """
+        self._increment(self._key(meal_log), self._amounts(meal_log, 1))
+
+    def add_logs(self, meal_logs: Iterable[MealLog]) -> None:
+        """
+        Add several meal logs, with one increment per day and meal type.
+
+        Args:
+            meal_logs: Meal logs being created
+        """
+        grouped: Dict[Tuple, dict] = {}
+        for meal_log in meal_logs:
+            key = tuple(self._key(meal_log).items())
+            amounts = self._amounts(meal_log, 1)
+            if key in grouped:
+                for column, amount in amounts.items():
+                    grouped[key][column] += amount
+            else:
+                grouped[key] = amounts
+        for key, amounts in grouped.items():
+            self._increment(dict(key), amounts)
+
+    def remove_log(self, meal_log: MealLog) -> None:
+        """
+        Subtract a meal log's nutrition from its day's totals.
+
+        Args:
+            meal_log: Meal log being deleted
+        """
+        key = self._key(meal_log)
+        self._increment(key, self._amounts(meal_log, -1))
+        self.db.execute(
+            delete(DailyNutritionTotal).where(
+                *self._key_filter(key),
+                DailyNutritionTotal.log_count <= 0
+            ).execution_options(synchronize_session=False)
+        )
+
+    def add_copied_logs(
+        self,
+        user_id: str,
+        source_date: date,
+        targets: FromClause,
+        meal_type: Optional[str] = None
+    ) -> None:
+        """
+        Add a day's logs, copied to other dates, to those dates' totals.
+
+        The source day is read again, so it must not have changed since
+        the copy; on PostgreSQL use add_inserted_logs instead.
+
+        Args:
+            user_id: User ID
+            source_date: Date the logs were copied from
+            targets: Selectable with one target_date column
+            meal_type: Only the logs of this meal type were copied
+        """
+        conditions = [MealLog.user_id == user_id, MealLog.logged_date == source_date]
+        if meal_type:
+            conditions.append(MealLog.meal_type == meal_type)
+        aggregate = select(
+            MealLog.user_id,
+            targets.c.target_date,
+            MealLog.meal_type,
+            *(func.coalesce(func.sum(getattr(MealLog, column)), 0) for column in NUTRIENT_COLUMNS),
+            func.count(MealLog.id),
+        ).select_from(MealLog).join(targets, true()).where(*conditions).group_by(
+            MealLog.user_id, targets.c.target_date, MealLog.meal_type
+        )
+        columns = [*KEY_COLUMNS, *NUTRIENT_COLUMNS, "log_count"]
+
+        dialect = self.db.get_bind().dialect.name
+        if dialect not in ("postgresql", "sqlite"):
+            target_dates = [row.target_date for row in self.db.execute(select(targets.c.target_date))]
+            self.rebuild(user_id, min(target_dates), max(target_dates))
+            return
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        stmt = dialect_insert(DailyNutritionTotal).from_select(columns, aggregate)
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=list(KEY_COLUMNS),
+            set_={
+                **{
+                    column: getattr(DailyNutritionTotal, column) + getattr(stmt.excluded, column)
+                    for column in columns[len(KEY_COLUMNS):]
+                },
+                "updated_at": func.now(),
+            }
+        ))
+
+    def add_inserted_logs(self, insert_logs: Insert) -> int:
+        """
+        Insert meal logs and add exactly the inserted rows to their totals.
+
+        PostgreSQL only: the INSERT runs as a data-modifying CTE and its
+        RETURNING rows are aggregated in the same statement, so the totals
+        can't drift from the copies under READ COMMITTED.
+
+        Args:
+            insert_logs: INSERT into meal_logs
+
+        Returns:
+            Number of meal logs inserted
+        """
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+        logs = insert_logs.returning(
+            *(getattr(MealLog, column) for column in (*KEY_COLUMNS, *NUTRIENT_COLUMNS, "id"))
+        ).cte("inserted_logs")
+        aggregate = select(
+            *(logs.c[column] for column in KEY_COLUMNS),
+            *(func.coalesce(func.sum(logs.c[column]), 0) for column in NUTRIENT_COLUMNS),
+            func.count(logs.c.id),
+        ).group_by(*(logs.c[column] for column in KEY_COLUMNS))
+        columns = [*KEY_COLUMNS, *NUTRIENT_COLUMNS, "log_count"]
+
+        stmt = dialect_insert(DailyNutritionTotal).from_select(columns, aggregate)
+        totals = stmt.on_conflict_do_update(
+            index_elements=list(KEY_COLUMNS),
+            set_={
+                **{
+                    column: getattr(DailyNutritionTotal, column) + getattr(stmt.excluded, column)
+                    for column in columns[len(KEY_COLUMNS):]
+                },
+                "updated_at": func.now(),
+            }
+        ).returning(literal_column("1")).cte("inserted_totals")
+
+        # Both CTEs run whether or not the outer query reads them
+        return self.db.execute(select(func.count()).select_from(logs).add_cte(totals)).scalar_one()
+
+    def get_day(self, user_id: str, log_date: date) -> List[DailyNutritionTotal]:
+        """
+        Get a day's totals per meal type.
+
+        Args:
+            user_id: User ID
+            log_date: Date to get totals for
+
+        Returns:
+            One row per meal type logged that day
+        """
+        return self.get_range(user_id, log_date, log_date)
+
+    def get_range(self, user_id: str, start_date: date, end_date: date) -> List[DailyNutritionTotal]:
+        """
+        Get totals per day and meal type for a date range.
+
+        Args:
+            user_id: User ID
+            start_date: First date (inclusive)
+            end_date: Last date (inclusive)
+
+        Returns:
+            Rows ordered by date
+        """
+        return self.db.query(DailyNutritionTotal).filter(
+            DailyNutritionTotal.user_id == user_id,
+            DailyNutritionTotal.logged_date >= start_date,
+            DailyNutritionTotal.logged_date <= end_date
+        ).order_by(DailyNutritionTotal.logged_date, DailyNutritionTotal.meal_type).all()
+
+    def get_daily_totals(self, user_id: str, start_date: date, end_date: date) -> list:
+        """
+        Get totals per day for a date range in one grouped query.
+
+        Args:
+            user_id: User ID
+            start_date: First date (inclusive)
+            end_date: Last date (inclusive)
+
+        Returns:
+            (date, calories, protein_g, carbs_g, fats_g, log_count) rows for
+            days with logs, ordered by date
+        """
+        return self.db.query(
+            DailyNutritionTotal.logged_date,
+            *(func.sum(getattr(DailyNutritionTotal, column)) for column in NUTRIENT_COLUMNS),
+            func.sum(DailyNutritionTotal.log_count),
+        ).filter(
+            DailyNutritionTotal.user_id == user_id,
+            DailyNutritionTotal.logged_date >= start_date,
+            DailyNutritionTotal.logged_date <= end_date
+        ).group_by(DailyNutritionTotal.logged_date).order_by(DailyNutritionTotal.logged_date).all()
+
+    def rebuild(
+        self,
+        user_id: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> int:
+        """
+        Recompute totals from meal_logs.
+
+        Args:
+            user_id: Only rebuild this user's totals
+            start_date: Only rebuild from this date (inclusive)
+            end_date: Only rebuild up to this date (inclusive)
+
+        Returns:
+            Number of total rows written
+        """
+        def scope(model):
+            conditions = []
+            if user_id is not None:
+                conditions.append(model.user_id == user_id)
+            if start_date is not None:
+                conditions.append(model.logged_date >= start_date)
+            if end_date is not None:
+                conditions.append(model.logged_date <= end_date)
+            return conditions
+
+        self.db.execute(
+            delete(DailyNutritionTotal).where(*scope(DailyNutritionTotal))
+            .execution_options(synchronize_session=False)
+        )
+
+        aggregate = select(
+            MealLog.user_id,
+            MealLog.logged_date,
+            MealLog.meal_type,
+            *(func.coalesce(func.sum(getattr(MealLog, column)), 0) for column in NUTRIENT_COLUMNS),
+            func.count(MealLog.id),
+        ).where(*scope(MealLog)).group_by(MealLog.user_id, MealLog.logged_date, MealLog.meal_type)
+
+        result = self.db.execute(
+            insert(DailyNutritionTotal).from_select(
+                [*KEY_COLUMNS, *NUTRIENT_COLUMNS, "log_count"], aggregate
+            )
+        )
+        return result.rowcount
+
+    def _key(self, meal_log: MealLog) -> dict:
+        return {column: getattr(meal_log, column) for column in KEY_COLUMNS}
+
+    def _amounts(self, meal_log: MealLog, sign: int) -> dict:
+        amounts = {column: sign * float(getattr(meal_log, column) or 0) for column in NUTRIENT_COLUMNS}
+        amounts["log_count"] = sign
+        return amounts
+
+    def _key_filter(self, key: dict) -> list:
+        return [getattr(DailyNutritionTotal, column) == value for column, value in key.items()]
+
+    def _increment(self, key: dict, amounts: dict) -> None:
+        """Atomically add amounts (negative to subtract) to a row, creating it if needed."""
+        dialect = self.db.get_bind().dialect.name
+        adding = amounts["log_count"] > 0
+        if adding and dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+            stmt = dialect_insert(DailyNutritionTotal).values(**key, **amounts)
+            self.db.execute(stmt.on_conflict_do_update(
+                index_elements=list(KEY_COLUMNS),
+                set_={
+                    **{
+                        column: getattr(DailyNutritionTotal, column) + getattr(stmt.excluded, column)
+                        for column in amounts
+                    },
+                    "updated_at": func.now(),
+                }
+            ))
+            return
+
+        updated = self.db.execute(
+            update(DailyNutritionTotal).where(*self._key_filter(key)).values(
+                {column: getattr(DailyNutritionTotal, column) + amount for column, amount in amounts.items()}
+            ).execution_options(synchronize_session=False)
+        )
+        if adding and updated.rowcount == 0:
+            self.db.execute(insert(DailyNutritionTotal).values(**key, **amounts))
@@ -6,6 +6,7 @@ from fastapi import HTTPException, status
 from app.models.recipe import Recipe, RecipeIngredient
 from app.models.food import Food
 from app.schemas.recipe_schema import RecipeCreate, RecipeUpdate, RecipeResponse, NutritionSummary
+from app.services.load_options import recipe_load_options
 from app.utils.nutrition_calculator import NutritionCalculator
 
 
@@ -69,10 +70,24 @@ class RecipeService:
         Returns:
             Dictionary with total and per_serving nutrition
         """
-        recipe = self.db.query(Recipe).filter(Recipe.id == recipe_id).first()
+        recipe = self.db.query(Recipe).options(*recipe_load_options()).filter(
+            Recipe.id == recipe_id
+        ).first()
         if not recipe:
             raise HTTPException(status_code=404, detail="Recipe not found")
 
+        return self.calculate_nutrition_for(recipe)
+
+    def calculate_nutrition_for(self, recipe: Recipe) -> dict:
+        """
+        Calculate total and per-serving nutrition for a loaded recipe.
+
+        Args:
+            recipe: Recipe, ideally loaded with recipe_load_options()
+
+        Returns:
+            Dictionary with total and per_serving nutrition
+        """
         total_nutrition = {
             'calories': 0.0,
             'protein_g': 0.0,
@@ -124,7 +139,9 @@ class RecipeService:
         Raises:
             HTTPException: If recipe not found or user doesn't have permission
         """
-        recipe = self.db.query(Recipe).filter(Recipe.id == recipe_id).first()
+        recipe = self.db.query(Recipe).options(*recipe_load_options()).filter(
+            Recipe.id == recipe_id
+        ).first()
         if not recipe:
             raise HTTPException(status_code=404, detail="Recipe not found")
 
@@ -147,7 +164,7 @@ class RecipeService:
             List of recipes
         """
         offset = (page - 1) * limit
-        recipes = self.db.query(Recipe).filter(
+        recipes = self.db.query(Recipe).options(*recipe_load_options()).filter(
             Recipe.user_id == user_id
         ).offset(offset).limit(limit).all()
 
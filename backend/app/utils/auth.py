@@ -1,9 +1,16 @@
 """Authentication utilities for JWT and password hashing."""
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, Optional
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 import bcrypt
 from app.config import settings
+from app.utils.revocation import revocation_list
 
 
 def hash_password(password: str) -> str:
@@ -23,7 +30,7 @@ def hash_password(password: str) -> str:
     password_bytes = password.encode('utf-8')[:72]
 
     # Generate salt and hash
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
 
     # Return as string for database storage
@@ -52,6 +59,156 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a hash was made with a different cost than configured.
+
+    Args:
+        hashed_password: Hashed password (string from database)
+
+    Returns:
+        True if the hash should be recomputed at BCRYPT_ROUNDS
+    """
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+class PasswordHasherPool:
+    """
+    Bounded thread pool for bcrypt work.
+
+    bcrypt releases the GIL, so hashing runs in parallel on these threads
+    without tying up the event loop or the threadpool that serves sync
+    endpoints. At most max_workers hashes run at once and max_queue more
+    may wait; beyond that new calls are rejected with 503 instead of
+    piling up behind a login burst.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._running = 0
+        self._queued = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "peak_queued": 0,
+            "wait_ms_total": 0.0,
+            "run_ms_total": 0.0,
+        }
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a password function on the pool.
+
+        Args:
+            fn: Function to run
+            *args: Arguments for fn
+
+        Returns:
+            Result of fn
+
+        Raises:
+            HTTPException: If too many calls are already waiting
+        """
+        with self._lock:
+            if self._queued + self._running >= self.max_workers + self.max_queue:
+                self._stats["rejected"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many authentication requests, try again shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._queued += 1
+            self._stats["submitted"] += 1
+            self._stats["peak_queued"] = max(self._stats["peak_queued"], self._queued)
+
+        future = self._executor.submit(self._timed, fn, args, time.monotonic())
+        future.add_done_callback(self._release_if_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool occupancy and timing counters.
+
+        Returns:
+            Dictionary of queue and timing metrics
+        """
+        with self._lock:
+            completed = self._stats["completed"]
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._queued,
+                "submitted": self._stats["submitted"],
+                "completed": completed,
+                "rejected": self._stats["rejected"],
+                "peak_queued": self._stats["peak_queued"],
+                "avg_wait_ms": round(self._stats["wait_ms_total"] / completed, 1) if completed else 0.0,
+                "avg_run_ms": round(self._stats["run_ms_total"] / completed, 1) if completed else 0.0,
+            }
+
+    def _release_if_cancelled(self, future) -> None:
+        # A call cancelled while queued never reaches _timed
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def _timed(self, fn: Callable[..., Any], args: tuple, submitted_at: float) -> Any:
+        started = time.monotonic()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            finished = time.monotonic()
+            with self._lock:
+                self._running -= 1
+                self._stats["completed"] += 1
+                self._stats["wait_ms_total"] += (started - submitted_at) * 1000
+                self._stats["run_ms_total"] += (finished - started) * 1000
+
+
+password_pool = PasswordHasherPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password on the password pool.
+
+    Args:
+        password: Plain text password
+
+    Returns:
+        Hashed password as a string
+    """
+    return await password_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the password pool.
+
+    Args:
+        plain_password: Plain text password
+        hashed_password: Hashed password (string from database)
+
+    Returns:
+        True if password matches, False otherwise
+    """
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(user_id: str) -> str:
     """
     Create JWT access token.
@@ -66,7 +223,8 @@ def create_access_token(user_id: str) -> str:
     to_encode = {
         "sub": str(user_id),
         "exp": expire,
-        "type": "access"
+        "type": "access",
+        "jti": uuid.uuid4().hex
     }
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
@@ -85,26 +243,51 @@ def create_refresh_token(user_id: str) -> str:
     to_encode = {
         "sub": str(user_id),
         "exp": expire,
-        "type": "refresh"
+        "type": "refresh",
+        "jti": uuid.uuid4().hex
     }
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-def verify_token(token: str) -> Optional[dict]:
+def verify_token(token: str, check_revocation: bool = True) -> Optional[dict]:
     """
     Verify and decode JWT token.
 
     Args:
         token: JWT token to verify
+        check_revocation: Reject tokens revoked through revoke_token
 
     Returns:
-        Decoded token data or None if invalid
+        Decoded token data or None if invalid or revoked
 
     Raises:
         JWTError: If token is invalid
     """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
         return None
+
+    # Tokens issued before jti was added cannot be revoked
+    jti = payload.get("jti")
+    if check_revocation and jti and revocation_list.is_revoked(jti):
+        return None
+    return payload
+
+
+async def revoke_token(payload: dict) -> bool:
+    """
+    Revoke a decoded token until it expires.
+
+    Args:
+        payload: Decoded token data
+
+    Returns:
+        True if the revocation was stored
+
+    Raises:
+        ValueError: If the token has no jti claim
+    """
+    if not payload.get("jti"):
+        raise ValueError("Token has no jti claim")
+    return await revocation_list.revoke(payload["jti"], payload["exp"])
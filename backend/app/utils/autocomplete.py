@@ -0,0 +1,271 @@
+"""In-memory prefix index for food name autocomplete."""
+import bisect
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from app.utils.cache import publish_worker_message, register_message_handler
+
+# Tokens are indexed by every prefix up to this length. Longer query tokens
+# are looked up by their first MAX_PREFIX_LENGTH characters and then verified.
+MAX_PREFIX_LENGTH = 12
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Worker message carrying foods inserted by another worker
+AUTOCOMPLETE_ADD_OP = "autocomplete_add"
+
+
+def fold_text(text: str) -> str:
+    """
+    Lowercase text and strip accents for matching.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Case- and accent-folded text
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into folded word tokens.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        List of tokens
+    """
+    return _TOKEN_RE.findall(fold_text(text))
+
+
+class AutocompleteIndex:
+    """
+    Thread-safe prefix index over food names and brands.
+
+    Every token of a food's name and brand is indexed under each of its
+    prefixes, and the whole folded name is indexed under its own prefixes.
+    Buckets are kept sorted by (name length, name) so a lookup walks the
+    best candidates first and stops as soon as it has enough results.
+    Buckets are never changed in place: writers replace them with updated
+    copies, so a lookup can walk the buckets it found without the lock.
+    Only ids, names and brands are kept in memory.
+    """
+
+    def __init__(self, max_prefix_length: int = MAX_PREFIX_LENGTH):
+        self.max_prefix_length = max_prefix_length
+        # food_id -> (sort key, name, brand, " "-joined tokens)
+        self._entries: Dict[str, Tuple[Tuple[int, str, str], str, Optional[str], str]] = {}
+        # token prefix -> sorted list of sort keys
+        self._token_prefixes: Dict[str, List[Tuple[int, str, str]]] = {}
+        # folded name prefix -> sorted list of sort keys
+        self._name_prefixes: Dict[str, List[Tuple[int, str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, food_id, name: str, brand: Optional[str] = None) -> None:
+        """
+        Add or replace a food in the index.
+
+        Args:
+            food_id: Food ID
+            name: Food name
+            brand: Optional brand name
+        """
+        key, entry = self._make_entry(food_id, name, brand)
+        sort_key, _, _, tokens = entry
+        folded_name = sort_key[1]
+
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = entry
+            for index, words in ((self._token_prefixes, tokens.split()), (self._name_prefixes, (folded_name,))):
+                for prefix in self._prefixes_of(words):
+                    bucket = list(index.get(prefix, ()))
+                    bisect.insort(bucket, sort_key)
+                    index[prefix] = bucket
+
+    def remove(self, food_id) -> None:
+        """
+        Remove a food from the index.
+
+        Args:
+            food_id: Food ID
+        """
+        with self._lock:
+            self._remove_locked(str(food_id))
+
+    def build(self, rows: Iterable[Tuple[object, str, Optional[str]]]) -> int:
+        """
+        Replace the index contents.
+
+        Buckets are filled unsorted and sorted once at the end, which is
+        much faster than repeated add() calls for a full catalog load.
+
+        Args:
+            rows: Iterable of (food_id, name, brand) tuples
+
+        Returns:
+            Number of indexed foods
+        """
+        entries = {}
+        token_prefixes: Dict[str, List[Tuple[int, str, str]]] = {}
+        name_prefixes: Dict[str, List[Tuple[int, str, str]]] = {}
+
+        for food_id, name, brand in rows:
+            key, entry = self._make_entry(food_id, name, brand)
+            entries.pop(key, None)
+            entries[key] = entry
+
+        for sort_key, _, _, tokens in entries.values():
+            for prefix in self._prefixes_of(tokens.split()):
+                token_prefixes.setdefault(prefix, []).append(sort_key)
+            for prefix in self._prefixes_of((sort_key[1],)):
+                name_prefixes.setdefault(prefix, []).append(sort_key)
+        for bucket in token_prefixes.values():
+            bucket.sort()
+        for bucket in name_prefixes.values():
+            bucket.sort()
+
+        with self._lock:
+            self._entries = entries
+            self._token_prefixes = token_prefixes
+            self._name_prefixes = name_prefixes
+        return len(entries)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries = {}
+            self._token_prefixes = {}
+            self._name_prefixes = {}
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Optional[str]]]:
+        """
+        Find foods whose name or brand tokens start with every query token.
+
+        Names starting with the query are ranked first, then shorter names.
+
+        Args:
+            query: Partial text typed by the user
+            limit: Maximum number of suggestions
+
+        Returns:
+            List of dicts with id, name and brand
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        folded_query = " ".join(tokens)
+
+        # Writers replace buckets rather than change them, so the ones
+        # found under the lock can be walked after releasing it
+        with self._lock:
+            buckets = []
+            for token in tokens:
+                bucket = self._token_prefixes.get(token[:self.max_prefix_length])
+                if not bucket:
+                    return []
+                buckets.append(bucket)
+            name_candidates = self._name_prefixes.get(folded_query[:self.max_prefix_length], ())
+            token_candidates = min(buckets, key=len)
+            entries = self._entries
+
+        results = []
+        seen: Set[str] = set()
+
+        # Names starting with the whole query rank first, then any food
+        # matching every token, walking the smallest bucket
+        for _, folded_name, key in name_candidates:
+            if len(results) >= limit:
+                break
+            entry = entries.get(key)
+            if entry and folded_name.startswith(folded_query) and self._matches(entry, tokens):
+                results.append(entry)
+                seen.add(key)
+        for _, _, key in token_candidates:
+            if len(results) >= limit:
+                break
+            entry = entries.get(key)
+            # Entries removed since the copy are skipped
+            if entry and key not in seen and self._matches(entry, tokens):
+                results.append(entry)
+                seen.add(key)
+
+        return [{"id": entry[0][2], "name": entry[1], "brand": entry[2]} for entry in results]
+
+    @staticmethod
+    def _make_entry(food_id, name: str, brand: Optional[str]):
+        key = str(food_id)
+        name_tokens = tokenize(name)
+        tokens = " " + " ".join(dict.fromkeys(name_tokens + tokenize(brand or "")))
+        return key, ((len(name), " ".join(name_tokens), key), name, brand, tokens)
+
+    def _prefixes_of(self, tokens: Iterable[str]) -> Set[str]:
+        return {
+            token[:length]
+            for token in tokens
+            for length in range(1, min(len(token), self.max_prefix_length) + 1)
+        }
+
+    @staticmethod
+    def _matches(entry, tokens: List[str]) -> bool:
+        # Entry tokens are stored as " tok1 tok2 ...", so " " + t occurring
+        # in it means some token starts with t
+        haystack = entry[3]
+        return all(" " + t in haystack for t in tokens)
+
+    def _remove_locked(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if not entry:
+            return
+        sort_key, _, _, tokens = entry
+        for index, words in ((self._token_prefixes, tokens.split()), (self._name_prefixes, (sort_key[1],))):
+            for prefix in self._prefixes_of(words):
+                bucket = index.get(prefix)
+                if bucket is None:
+                    continue
+                position = bisect.bisect_left(bucket, sort_key)
+                if position < len(bucket) and bucket[position] == sort_key:
+                    bucket = bucket[:position] + bucket[position + 1:]
+                if bucket:
+                    index[prefix] = bucket
+                else:
+                    del index[prefix]
+
+
+# Process-wide index, built at startup and updated as foods are inserted
+autocomplete_index = AutocompleteIndex()
+
+
+async def publish_autocomplete_entries(foods: Sequence) -> None:
+    """
+    Add foods saved by this worker to every other worker's index.
+
+    Errors are logged and ignored; the other indexes catch up at restart.
+
+    Args:
+        foods: Objects with id, name and brand attributes
+    """
+    if not foods:
+        return
+    entries = [[str(food.id), food.name, food.brand] for food in foods]
+    try:
+        await publish_worker_message(AUTOCOMPLETE_ADD_OP, entries)
+    except Exception as e:
+        print(f"Autocomplete publish error: {e}")
+
+
+def _apply_published_entries(entries: List[List[Optional[str]]]) -> None:
+    for food_id, name, brand in entries:
+        autocomplete_index.add(food_id, name, brand)
+
+
+register_message_handler(AUTOCOMPLETE_ADD_OP, _apply_published_entries)
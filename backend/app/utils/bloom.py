@@ -0,0 +1,52 @@
+"""Compact probabilistic set membership."""
+import hashlib
+import math
+from typing import Iterator
+
+
+class BloomFilter:
+    """
+    Bloom filter over strings.
+
+    Sized for `capacity` items at the given false positive rate. Lookups
+    never miss an added item; a hit only means the item is probably
+    present. Items cannot be removed, so callers rebuild the filter to
+    drop them.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item: str) -> None:
+        """
+        Add an item.
+
+        Args:
+            item: Item to add
+        """
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
@@ -1,35 +1,318 @@
-"""Redis caching utilities."""
+"""Redis caching utilities with an in-process LRU tier."""
+import asyncio
+import fnmatch
 import json
-from typing import Any, Optional
+import math
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
 import redis.asyncio as redis
 from app.config import settings
+from app.utils.cache_codec import cache_codec
 
-# Create Redis client
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+# Create Redis client (binary values, see app.utils.cache_codec)
+redis_client = redis.from_url(settings.REDIS_URL)
+
+# Pub/sub channel used to evict local copies in every worker
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Redis sorted set of cache keys per tag, scored by each key's expiry
+# time and maintained by cache_set
+TAG_KEY_PREFIX = "cache_tags:"
+
+# Keys removed per UNLINK call during incremental invalidation
+DELETE_BATCH_SIZE = 500
+
+# Prefix for short-lived cross-worker locks
+LOCK_KEY_PREFIX = "lock:"
+
+# Deletes the lock only if it still holds our token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Identifies this worker's own invalidation messages
+WORKER_ID = uuid.uuid4().hex
+
+# Handlers for worker messages other than cache invalidations, by op
+_message_handlers: Dict[str, Callable[[Any], None]] = {}
+
+# Keys longer than this are truncated in KeyHitTracker reports
+REPORT_KEY_MAX_LENGTH = 100
+
+# Returned by LocalCache.get for missing keys (cached values may be falsy)
+MISSING = object()
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with per-entry TTL.
+
+    Limits apply both to the number of entries and to their approximate
+    size in bytes (the length of the serialized value). Safe to use from
+    the event loop and from threadpool handlers.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, default_ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        # key -> (value, expires_at, size, tags)
+        self._data: "OrderedDict[str, Tuple[Any, float, int, Tuple[str, ...]]]" = OrderedDict()
+        # tag -> keys carrying it
+        self._tags: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> Any:
+        """
+        Get a value if present and not expired.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or MISSING
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            if entry[1] <= time.monotonic():
+                self._pop(key)
+                return MISSING
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        size: int,
+        ttl: Optional[float] = None,
+        tags: Iterable[str] = ()
+    ) -> None:
+        """
+        Store a value, evicting least recently used entries if needed.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            size: Approximate size of the value in bytes
+            ttl: Time to live in seconds (capped at the default TTL)
+            tags: Tags the entry can be invalidated by
+        """
+        ttl = self.default_ttl if ttl is None else min(ttl, self.default_ttl)
+        if size > self.max_bytes or ttl <= 0:
+            return
+        tags = tuple(tags)
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (value, time.monotonic() + ttl, size, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._pop(next(iter(self._data)))
+
+    def delete(self, key: str) -> None:
+        """Remove a key."""
+        with self._lock:
+            self._pop(key)
+
+    def delete_pattern(self, pattern: str) -> None:
+        """Remove keys matching a glob-style pattern."""
+        with self._lock:
+            for key in [k for k in self._data if fnmatch.fnmatchcase(k, pattern)]:
+                self._pop(key)
+
+    def delete_tag(self, tag: str) -> None:
+        """Remove every key carrying a tag."""
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._pop(key)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def _pop(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry[2]
+        for tag in entry[3]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class KeyHitTracker:
+    """
+    Bounded per-key outcome counters.
+
+    Keeps counters for the most recently seen max_keys keys; the least
+    recently seen key is dropped when a new one arrives. Safe to use from
+    the event loop and from threadpool handlers.
+    """
+
+    def __init__(self, max_keys: int, outcomes: Iterable[str]):
+        self.max_keys = max_keys
+        self.outcomes = tuple(outcomes)
+        self._counts: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, key: str, outcome: str) -> None:
+        """
+        Count one lookup of a key.
+
+        Args:
+            key: Cache key or query
+            outcome: One of the tracker's outcomes
+        """
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = dict.fromkeys(self.outcomes, 0)
+                if len(self._counts) > self.max_keys:
+                    self._counts.popitem(last=False)
+            else:
+                self._counts.move_to_end(key)
+            counts[outcome] += 1
+
+    def report(self, hit_outcomes: Iterable[str], limit: int = 20) -> Dict[str, Any]:
+        """
+        Get hit rates overall and for the most looked-up keys.
+
+        Args:
+            hit_outcomes: Outcomes that count as hits
+            limit: Maximum number of per-key rows
+
+        Returns:
+            Totals per outcome with the overall hit rate, and per-key
+            counters (most lookups first); keys are cut to
+            REPORT_KEY_MAX_LENGTH characters
+        """
+        hit_outcomes = tuple(hit_outcomes)
+        with self._lock:
+            rows = [(key, dict(counts)) for key, counts in self._counts.items()]
+
+        def with_hit_rate(counts: Dict[str, int]) -> Dict[str, Any]:
+            lookups = sum(counts.values())
+            hits = sum(counts[outcome] for outcome in hit_outcomes)
+            return {"lookups": lookups, **counts, "hit_rate": round(hits / lookups, 3) if lookups else 0.0}
+
+        totals = dict.fromkeys(self.outcomes, 0)
+        for _, counts in rows:
+            for outcome, count in counts.items():
+                totals[outcome] += count
+        top = sorted(
+            ({"key": key[:REPORT_KEY_MAX_LENGTH], **with_hit_rate(counts)} for key, counts in rows),
+            key=lambda row: row["lookups"],
+            reverse=True
+        )
+        return {"tracked_keys": len(rows), **with_hit_rate(totals), "top_keys": top[:limit]}
+
+    def clear(self) -> None:
+        """Drop all counters."""
+        with self._lock:
+            self._counts.clear()
+
+
+local_cache = LocalCache(
+    max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+    max_bytes=settings.CACHE_LOCAL_MAX_BYTES,
+    default_ttl=settings.CACHE_LOCAL_TTL_SECONDS,
+)
+
+_stats: Dict[str, int] = {
+    "local_hits": 0,
+    "local_misses": 0,
+    "redis_hits": 0,
+    "redis_misses": 0,
+    "redis_errors": 0,
+    "swr_fresh_hits": 0,
+    "swr_stale_hits": 0,
+    "swr_early_refreshes": 0,
+}
+
+_listener_task: Optional[asyncio.Task] = None
+
+
+def cache_stats() -> Dict[str, Any]:
+    """
+    Get hit/miss counters per cache tier.
+
+    Returns:
+        Dictionary of counters and local tier occupancy
+    """
+    return {
+        **_stats,
+        "local_entries": len(local_cache),
+        "local_bytes": local_cache.size_bytes,
+    }
+
+
+def reset_cache_stats() -> None:
+    """Reset hit/miss counters."""
+    for name in _stats:
+        _stats[name] = 0
 
 
 async def cache_get(key: str) -> Optional[Any]:
     """
     Get value from cache.
 
+    Checks the in-process tier first and falls back to Redis, keeping a
+    local copy of Redis hits.
+
     Args:
         key: Cache key
 
     Returns:
         Cached value or None if not found
     """
+    value = local_cache.get(key)
+    if value is not MISSING:
+        _stats["local_hits"] += 1
+        return value
+    _stats["local_misses"] += 1
+
     try:
-        value = await redis_client.get(key)
-        if value:
-            return json.loads(value)
+        raw = await redis_client.get(key)
+        if raw:
+            _stats["redis_hits"] += 1
+            value = cache_codec.decode(raw)
+            local_cache.set(key, value, len(raw))
+            return value
+        _stats["redis_misses"] += 1
         return None
     except Exception as e:
         # Log error but don't fail the request
+        _stats["redis_errors"] += 1
         print(f"Cache get error: {e}")
         return None
 
 
-async def cache_set(key: str, value: Any, ttl: int = 3600) -> bool:
+async def cache_set(key: str, value: Any, ttl: int = 3600, tags: Optional[List[str]] = None) -> bool:
     """
     Set value in cache.
 
@@ -37,12 +320,28 @@ async def cache_set(key: str, value: Any, ttl: int = 3600) -> bool:
         key: Cache key
         value: Value to cache
         ttl: Time to live in seconds (default 1 hour)
+        tags: Tags to invalidate the key by (see cache_invalidate_tag)
 
     Returns:
         True if successful, False otherwise
     """
+    tags = tags or []
     try:
-        await redis_client.setex(key, ttl, json.dumps(value))
+        raw = cache_codec.encode(value)
+        now = time.time()
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.setex(key, ttl, raw)
+        for tag in tags:
+            tag_key = TAG_KEY_PREFIX + tag
+            pipe.zadd(tag_key, {key: now + ttl})
+            # Drop members whose keys have expired so the set tracks live keys only
+            pipe.zremrangebyscore(tag_key, "-inf", now)
+            # Keep the tag set alive at least as long as its longest-lived member
+            pipe.expire(tag_key, ttl, nx=True)
+            pipe.expire(tag_key, ttl, gt=True)
+        await pipe.execute()
+        local_cache.set(key, value, len(raw), ttl, tags)
+        await _publish_invalidation("key", key)
         return True
     except Exception as e:
         # Log error but don't fail the request
@@ -50,6 +349,81 @@ async def cache_set(key: str, value: Any, ttl: int = 3600) -> bool:
         return False
 
 
+class CacheEntry(NamedTuple):
+    """Value read with cache_get_swr."""
+    value: Any
+    # Past its soft expiry; the value is served but out of date
+    stale: bool
+    # Caller should recompute the value in the background
+    refresh: bool
+    # When the stored value goes stale; identifies the write that stored it
+    soft_expires_at: Optional[float] = None
+
+
+async def cache_set_swr(
+    key: str,
+    value: Any,
+    soft_ttl: float,
+    hard_ttl: int,
+    delta: float = 0.0,
+    tags: Optional[List[str]] = None
+) -> bool:
+    """
+    Set a value that is served stale between its soft and hard expiry.
+
+    Args:
+        key: Cache key
+        value: Value to cache
+        soft_ttl: Seconds until the value should be refreshed
+        hard_ttl: Seconds until the value is dropped from the cache
+        delta: Seconds it took to compute the value
+        tags: Tags to invalidate the key by (see cache_invalidate_tag)
+
+    Returns:
+        True if successful, False otherwise
+    """
+    envelope = {"value": value, "soft_expires_at": time.time() + soft_ttl, "delta": delta}
+    return await cache_set(key, envelope, ttl=hard_ttl, tags=tags)
+
+
+async def cache_get_swr(key: str, beta: float = 1.0) -> Optional[CacheEntry]:
+    """
+    Get a value stored with cache_set_swr.
+
+    Past the soft expiry the value is returned as stale with a refresh
+    request. Before it, a refresh is requested early with a probability
+    that grows as expiry nears and with the cost of recomputing the value
+    (XFetch), so hot keys do not all expire at the same moment.
+
+    Args:
+        key: Cache key
+        beta: Early refresh aggressiveness; 0 disables early refresh
+
+    Returns:
+        Cache entry or None if not found
+    """
+    envelope = await cache_get(key)
+    if envelope is None:
+        return None
+    if not isinstance(envelope, dict) or "soft_expires_at" not in envelope:
+        # Written by plain cache_set; only the hard TTL applies
+        return CacheEntry(envelope, stale=False, refresh=False)
+
+    now = time.time()
+    value = envelope["value"]
+    if now >= envelope["soft_expires_at"]:
+        _stats["swr_stale_hits"] += 1
+        return CacheEntry(value, stale=True, refresh=True, soft_expires_at=envelope["soft_expires_at"])
+
+    gap = -envelope["delta"] * beta * math.log(1.0 - random.random())
+    if now + gap >= envelope["soft_expires_at"]:
+        _stats["swr_early_refreshes"] += 1
+        return CacheEntry(value, stale=False, refresh=True, soft_expires_at=envelope["soft_expires_at"])
+
+    _stats["swr_fresh_hits"] += 1
+    return CacheEntry(value, stale=False, refresh=False, soft_expires_at=envelope["soft_expires_at"])
+
+
 async def cache_delete(key: str) -> bool:
     """
     Delete value from cache.
@@ -60,29 +434,234 @@ async def cache_delete(key: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
+    local_cache.delete(key)
     try:
         await redis_client.delete(key)
+        await _publish_invalidation("key", key)
         return True
     except Exception as e:
         print(f"Cache delete error: {e}")
         return False
 
 
+async def cache_evict_local(key: str) -> bool:
+    """
+    Drop a key from the local tier of every worker.
+
+    For values only ever cached in process; unlike cache_delete, Redis
+    holds nothing to delete and is only used to notify the other workers.
+
+    Args:
+        key: Cache key
+
+    Returns:
+        True if the other workers were notified
+    """
+    local_cache.delete(key)
+    try:
+        await _publish_invalidation("key", key)
+        return True
+    except Exception as e:
+        print(f"Cache evict error: {e}")
+        return False
+
+
+async def cache_invalidate_tag(tag: str) -> bool:
+    """
+    Delete every key stored with a tag.
+
+    The tag set is renamed first, so keys tagged while the invalidation
+    runs land in a fresh set and survive. Members are then read with ZSCAN
+    and removed with UNLINK in batches, costing O(members) without
+    blocking Redis.
+
+    Args:
+        tag: Tag name (e.g. "food_search")
+
+    Returns:
+        True if successful, False otherwise
+    """
+    local_cache.delete_tag(tag)
+    tag_key = TAG_KEY_PREFIX + tag
+    draining_key = f"{tag_key}:invalidating:{uuid.uuid4().hex}"
+    try:
+        try:
+            await redis_client.rename(tag_key, draining_key)
+        except redis.ResponseError:
+            # No such tag: nothing cached under it
+            await _publish_invalidation("tag", tag)
+            return True
+
+        batch = []
+        async for key, _ in redis_client.zscan_iter(draining_key, count=DELETE_BATCH_SIZE):
+            batch.append(key)
+            if len(batch) >= DELETE_BATCH_SIZE:
+                await redis_client.unlink(*batch)
+                batch = []
+        if batch:
+            await redis_client.unlink(*batch)
+        await redis_client.unlink(draining_key)
+        await _publish_invalidation("tag", tag)
+        return True
+    except Exception as e:
+        print(f"Cache invalidate tag error: {e}")
+        return False
+
+
 async def cache_delete_pattern(pattern: str) -> bool:
     """
     Delete all keys matching pattern.
 
+    Uses incremental SCAN instead of KEYS so Redis keeps serving other
+    clients; prefer cache_invalidate_tag where the keys are tagged.
+
     Args:
         pattern: Key pattern (e.g., "food_*")
 
     Returns:
         True if successful, False otherwise
     """
+    local_cache.delete_pattern(pattern)
     try:
-        keys = await redis_client.keys(pattern)
-        if keys:
-            await redis_client.delete(*keys)
+        batch = []
+        async for key in redis_client.scan_iter(match=pattern, count=DELETE_BATCH_SIZE):
+            batch.append(key)
+            if len(batch) >= DELETE_BATCH_SIZE:
+                await redis_client.unlink(*batch)
+                batch = []
+        if batch:
+            await redis_client.unlink(*batch)
+        await _publish_invalidation("pattern", pattern)
         return True
     except Exception as e:
         print(f"Cache delete pattern error: {e}")
         return False
+
+
+async def cache_acquire_lock(name: str, ttl: float) -> Optional[str]:
+    """
+    Try to take a short-lived lock shared by all workers.
+
+    If Redis is unreachable the lock is treated as acquired, so callers
+    degrade to uncoordinated work instead of failing.
+
+    Args:
+        name: Lock name
+        ttl: Seconds before the lock expires on its own
+
+    Returns:
+        Token to release the lock with, or None if another holder has it
+    """
+    token = uuid.uuid4().hex
+    try:
+        acquired = await redis_client.set(LOCK_KEY_PREFIX + name, token, nx=True, px=int(ttl * 1000))
+        return token if acquired else None
+    except Exception as e:
+        print(f"Cache lock error: {e}")
+        return token
+
+
+async def cache_release_lock(name: str, token: str) -> bool:
+    """
+    Release a lock taken with cache_acquire_lock.
+
+    Args:
+        name: Lock name
+        token: Token returned when the lock was acquired
+
+    Returns:
+        True if the lock was still ours and has been released
+    """
+    try:
+        return bool(await redis_client.eval(RELEASE_LOCK_SCRIPT, 1, LOCK_KEY_PREFIX + name, token))
+    except Exception as e:
+        print(f"Cache unlock error: {e}")
+        return False
+
+
+async def _publish_invalidation(op: str, target: str) -> None:
+    """Tell other workers to drop their local copies."""
+    await publish_worker_message(op, target)
+
+
+async def publish_worker_message(op: str, target: Any) -> None:
+    """
+    Send a message to every other worker on INVALIDATION_CHANNEL.
+
+    Args:
+        op: Message type, dispatched to the handler registered for it
+        target: JSON-serializable payload
+    """
+    message = json.dumps({"op": op, "target": target, "origin": WORKER_ID})
+    await redis_client.publish(INVALIDATION_CHANNEL, message)
+
+
+def register_message_handler(op: str, handler: Callable[[Any], None]) -> None:
+    """
+    Apply worker messages of a given type with handler.
+
+    Args:
+        op: Message type passed to publish_worker_message
+        handler: Called with the message payload in the listener task
+    """
+    _message_handlers[op] = handler
+
+
+def handle_invalidation(message: str) -> None:
+    """
+    Apply an invalidation message from another worker to the local tier.
+
+    Other message types go to the handler registered for them.
+
+    Args:
+        message: JSON message published on INVALIDATION_CHANNEL
+    """
+    data = json.loads(message)
+    if data.get("origin") == WORKER_ID:
+        return
+    if data["op"] == "key":
+        local_cache.delete(data["target"])
+    elif data["op"] == "pattern":
+        local_cache.delete_pattern(data["target"])
+    elif data["op"] == "tag":
+        local_cache.delete_tag(data["target"])
+    elif data["op"] in _message_handlers:
+        _message_handlers[data["op"]](data["target"])
+
+
+async def _listen_for_invalidations() -> None:
+    """Subscribe to invalidation messages, reconnecting on errors."""
+    while True:
+        try:
+            pubsub = redis_client.pubsub()
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Messages may have been missed while disconnected
+            local_cache.clear()
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    handle_invalidation(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Cache invalidation listener error: {e}")
+            local_cache.clear()
+            await asyncio.sleep(1)
+
+
+def start_invalidation_listener() -> None:
+    """Start the background pub/sub listener for this worker."""
+    global _listener_task
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_listen_for_invalidations())
+
+
+async def stop_invalidation_listener() -> None:
+    """Stop the background pub/sub listener."""
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
@@ -0,0 +1,143 @@
+"""Versioned binary encoding for cache values."""
+import json
+import zlib
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Dict, Tuple
+from uuid import UUID
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# First header byte: serialization format. Ids never collide with the first
+# byte of a JSON document, so values written before the header existed
+# (plain JSON text) are still readable.
+FORMAT_JSON = 0x01
+FORMAT_MSGPACK = 0x02
+
+# Second header byte: compression
+COMPRESSION_NONE = 0x00
+COMPRESSION_ZLIB = 0x01
+
+
+def _to_primitive(value: Any) -> Any:
+    """Convert types the encoders don't support natively."""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not cache serializable")
+
+
+def _json_dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=_to_primitive)
+    return json.dumps(value, separators=(",", ":"), default=_to_primitive).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, default=_to_primitive, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
+
+
+# format id -> (encoder, decoder, available)
+FORMATS: Dict[int, Tuple[Callable[[Any], bytes], Callable[[bytes], Any], bool]] = {
+    FORMAT_JSON: (_json_dumps, _json_loads, True),
+    FORMAT_MSGPACK: (_msgpack_dumps, _msgpack_loads, msgpack is not None),
+}
+
+SERIALIZERS = {"json": FORMAT_JSON, "msgpack": FORMAT_MSGPACK}
+
+
+class CacheCodec:
+    """
+    Encoder/decoder for cache payloads.
+
+    Encoded values are a two-byte header (format, compression) followed by
+    the payload. Payloads above the threshold are zlib-compressed when that
+    makes them smaller. Any known format can be decoded regardless of the
+    one configured for writing, so the format can be rolled forward
+    without flushing the cache.
+    """
+
+    def __init__(self, serializer: str = "json", compression_threshold: int = 1024, compression_level: int = 1):
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unknown cache serializer: {serializer}")
+        self.format = SERIALIZERS[serializer]
+        if not FORMATS[self.format][2]:
+            raise ValueError(f"Cache serializer '{serializer}' requires the {serializer} package")
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+
+    def encode(self, value: Any) -> bytes:
+        """
+        Serialize a value for storage.
+
+        Args:
+            value: JSON-compatible value (datetimes, UUIDs and Decimals are
+                stored as strings)
+
+        Returns:
+            Encoded bytes
+        """
+        payload = FORMATS[self.format][0](value)
+        compression = COMPRESSION_NONE
+        if self.compression_threshold and len(payload) > self.compression_threshold:
+            compressed = zlib.compress(payload, self.compression_level)
+            if len(compressed) < len(payload):
+                payload, compression = compressed, COMPRESSION_ZLIB
+        return bytes((self.format, compression)) + payload
+
+    def decode(self, data: bytes) -> Any:
+        """
+        Deserialize a stored value.
+
+        Args:
+            data: Encoded bytes
+
+        Returns:
+            Decoded value
+
+        Raises:
+            ValueError: If the format or compression is not supported here
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if not data or data[0] not in FORMATS:
+            # Legacy plain JSON value
+            return _json_loads(data)
+
+        encoder, decoder, available = FORMATS[data[0]]
+        if not available:
+            raise ValueError(f"Cache format {data[0]} is not supported by this worker")
+
+        payload = data[2:]
+        if data[1] == COMPRESSION_ZLIB:
+            payload = zlib.decompress(payload)
+        elif data[1] != COMPRESSION_NONE:
+            raise ValueError(f"Unknown cache compression {data[1]}")
+        return decoder(payload)
+
+
+cache_codec = CacheCodec(
+    serializer=settings.CACHE_SERIALIZER,
+    compression_threshold=settings.CACHE_COMPRESSION_THRESHOLD,
+    compression_level=settings.CACHE_COMPRESSION_LEVEL,
+)
@@ -0,0 +1,126 @@
+"""Shared pooled async HTTP clients for external APIs."""
+import time
+from typing import Any, Dict
+from urllib.parse import urlsplit
+import httpx
+from app.config import settings
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx (httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """Connection-pooling transport that records per-host usage counters."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.max_connections = kwargs["limits"].max_connections
+        self.http2 = kwargs.get("http2", False)
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_seconds = 0.0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started = time.perf_counter()
+        try:
+            return await super().handle_async_request(request)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_seconds += time.perf_counter() - started
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get usage counters and current pool occupancy.
+
+        Returns:
+            Dictionary of counters for this host
+        """
+        connections = self._pool.connections
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "avg_request_ms": round(self.total_seconds / self.requests * 1000, 2) if self.requests else 0.0,
+            "connections": len(connections),
+            "idle_connections": idle,
+            "max_connections": self.max_connections,
+            "http2": self.http2,
+        }
+
+
+class HTTPClientPool:
+    """
+    Application-scoped async HTTP clients, one per upstream host.
+
+    Each host gets its own keep-alive connection pool, so connection
+    limits apply per host and a slow provider cannot exhaust connections
+    needed by another. Clients are created lazily and closed on shutdown.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, InstrumentedTransport] = {}
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        """
+        Get the shared client for the host of a URL.
+
+        Args:
+            url: Any URL on the upstream host
+
+        Returns:
+            Pooled client for that host
+        """
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            transport = InstrumentedTransport(
+                http2=settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST,
+                    max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_PER_HOST,
+                    keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+                ),
+            )
+            client = httpx.AsyncClient(
+                transport=transport,
+                timeout=settings.FOOD_PROVIDER_TIMEOUT_SECONDS,
+            )
+            self._clients[host] = client
+            self._transports[host] = transport
+        return client
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get pool usage per host.
+
+        Returns:
+            Dictionary mapping host to usage counters
+        """
+        return {host: transport.stats() for host, transport in self._transports.items()}
+
+    async def aclose(self) -> None:
+        """Close every client and its connections."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._transports.clear()
+        for client in clients:
+            await client.aclose()
+
+
+# Process-wide client pool, closed by the application shutdown hook
+http_clients = HTTPClientPool()
@@ -0,0 +1,146 @@
+"""Event loop lag and blocking-callback detection."""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """
+    Measure event loop lag and capture what is blocking the loop.
+
+    A heartbeat task sleeps for `interval` and records how late it wakes up
+    (the loop lag). A watchdog thread notices when the heartbeat stops
+    beating for longer than `threshold` and samples the loop thread's
+    stack while the offending callback is still running, so sync database
+    or bcrypt calls made from async code show up with their call site.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        interval: float = 0.05,
+        max_events: int = 20,
+        stack_limit: int = 25
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.stack_limit = stack_limit
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self.blocked_count = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._lag_total = 0.0
+        self._beats = 0
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        # Stack sampled by the watchdog for the stall in progress
+        self._pending: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        """Start monitoring the running event loop."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop monitoring."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await asyncio.get_running_loop().run_in_executor(None, self._watchdog.join)
+        self._watchdog = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get loop lag figures and recent blocking events.
+
+        Returns:
+            Dictionary of lag measurements in milliseconds and events
+        """
+        with self._lock:
+            return {
+                "running": self.running,
+                "threshold_ms": round(self.threshold * 1000, 1),
+                "lag_ms_last": round(self.last_lag * 1000, 1),
+                "lag_ms_max": round(self.max_lag * 1000, 1),
+                "lag_ms_avg": round(self._lag_total / self._beats * 1000, 1) if self._beats else 0.0,
+                "blocked_count": self.blocked_count,
+                "recent_blocks": list(self.events),
+            }
+
+    def reset(self) -> None:
+        """Drop recorded measurements and events."""
+        with self._lock:
+            self.events.clear()
+            self.blocked_count = 0
+            self.last_lag = self.max_lag = self._lag_total = 0.0
+            self._beats = 0
+            self._pending = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            with self._lock:
+                self._last_beat = now
+                self.last_lag = lag
+                self.max_lag = max(self.max_lag, lag)
+                self._lag_total += lag
+                self._beats += 1
+                event, self._pending = self._pending, None
+                if lag < self.threshold:
+                    continue
+                event = event or {"detected_at": time.time(), "stack": None}
+                event["blocked_ms"] = round(lag * 1000, 1)
+                self.events.append(event)
+                self.blocked_count += 1
+            logger.warning(
+                "Event loop blocked for %.1f ms\n%s",
+                lag * 1000,
+                event["stack"] or "(no stack sample)"
+            )
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.interval / 2):
+            with self._lock:
+                stalled = time.monotonic() - self._last_beat - self.interval
+                if stalled < self.threshold or self._pending is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                stack = traceback.format_stack(frame, limit=self.stack_limit) if frame else []
+                self._pending = {"detected_at": time.time(), "stack": "".join(stack)}
+
+
+loop_monitor = LoopMonitor(
+    threshold=settings.LOOP_MONITOR_THRESHOLD_MS / 1000,
+    interval=settings.LOOP_MONITOR_INTERVAL_MS / 1000,
+)
@@ -0,0 +1,307 @@
+"""Token bucket rate limiting shared across workers through Redis."""
+import fnmatch
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+from app.utils import cache
+from app.utils.auth import verify_token
+
+# Refills each bucket (KEYS[i], with rate ARGV[2i-1] and capacity ARGV[2i])
+# for the time elapsed since its last use, then takes one token from every
+# bucket only if all of them have one, so a request denied by one limit
+# does not drain the others. Redis time is used so all workers agree on
+# the clock. Returns {allowed (0/1), seconds until every bucket has a token}.
+TOKEN_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens = {}
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local capacity = tonumber(ARGV[2 * i])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    available = math.min(capacity, available + math.max(0, now - ts) * rate)
+    if available < 1 then
+        retry_after = math.max(retry_after, (1 - available) / rate)
+    end
+    tokens[i] = available
+end
+local allowed = 0
+if retry_after == 0 then
+    allowed = 1
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local capacity = tonumber(ARGV[2 * i])
+    redis.call('HSET', key, 'tokens', tokens[i] - allowed, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000) + 1000)
+end
+return {allowed, tostring(retry_after)}
+"""
+
+RATE_LIMIT_KEY_PREFIX = "rate_limit:"
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+SCOPES = ("ip", "user")
+
+
+class RateLimitRule:
+    """
+    One token bucket per client for a route.
+
+    Parsed from "<scope>:<count>/<period>", e.g. "ip:10/minute" allows
+    bursts of 10 requests per client IP, refilled evenly over a minute.
+    The "user" scope keys authenticated requests by user id and falls back
+    to the client IP for anonymous ones.
+    """
+
+    def __init__(self, spec: str):
+        try:
+            scope, limit = spec.split(":", 1)
+            count, period = limit.split("/", 1)
+            self.capacity = int(count)
+            self.rate = self.capacity / PERIODS[period]
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid rate limit rule: {spec!r}")
+        if scope not in SCOPES or self.capacity <= 0:
+            raise ValueError(f"Invalid rate limit rule: {spec!r}")
+        self.scope = scope
+        self.spec = spec
+
+
+class LocalTokenBuckets:
+    """
+    In-process token buckets used when Redis is unavailable.
+
+    Holds at most max_keys buckets; the least recently used is dropped
+    first (a dropped bucket simply starts full again).
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> (tokens, last refill time)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, buckets: List[Tuple[str, float, int]]) -> Tuple[bool, float]:
+        """
+        Take a token from every bucket, or from none if any is empty.
+
+        Args:
+            buckets: (key, tokens added per second, bucket size) per bucket
+
+        Returns:
+            Whether the request is allowed and seconds until it would be
+        """
+        now = time.monotonic()
+        with self._lock:
+            refilled = []
+            retry_after = 0.0
+            for key, rate, capacity in buckets:
+                tokens, ts = self._buckets.pop(key, (capacity, now))
+                tokens = min(capacity, tokens + (now - ts) * rate)
+                if tokens < 1:
+                    retry_after = max(retry_after, (1 - tokens) / rate)
+                refilled.append((key, tokens))
+            allowed = retry_after == 0
+            for key, tokens in refilled:
+                self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+    def clear(self) -> None:
+        """Drop all buckets."""
+        with self._lock:
+            self._buckets.clear()
+
+
+class RateLimiter:
+    """
+    Route-level rate limiter.
+
+    Buckets live in Redis so every worker draws from the same one. When a
+    Redis call fails the limiter switches to in-process buckets and only
+    tries Redis again after redis_retry_seconds, so an outage costs one
+    failed call per interval rather than one per request.
+    """
+
+    def __init__(self, rules: Dict[str, List[str]], local_max_keys: int, redis_retry_seconds: float):
+        self.rules = {route: [RateLimitRule(spec) for spec in specs] for route, specs in rules.items()}
+        self.local = LocalTokenBuckets(local_max_keys)
+        self.redis_retry_seconds = redis_retry_seconds
+        self._redis_down_until = 0.0
+        self._stats = {"allowed": 0, "limited": 0, "redis_errors": 0, "local_checks": 0}
+
+    def rules_for(self, method: str, path: str) -> List[RateLimitRule]:
+        """
+        Get the rules matching a request.
+
+        Args:
+            method: HTTP method
+            path: Request path
+
+        Returns:
+            Rules of every matching "<METHOD> <path glob>" entry
+        """
+        route = f"{method} {path}"
+        return [
+            rule
+            for pattern, rules in self.rules.items()
+            if fnmatch.fnmatchcase(route, pattern)
+            for rule in rules
+        ]
+
+    async def check(self, method: str, path: str, client_ip: str, user_id: Optional[str]) -> float:
+        """
+        Take a token from every bucket the request falls into.
+
+        Tokens are only taken when all buckets have one, so a request
+        denied by one rule does not count against the others.
+
+        Args:
+            method: HTTP method
+            path: Request path
+            client_ip: Client IP address
+            user_id: Authenticated user id, if any
+
+        Returns:
+            0 if the request is allowed, otherwise seconds to wait
+        """
+        buckets = []
+        for rule in self.rules_for(method, path):
+            identity = f"user:{user_id}" if rule.scope == "user" and user_id else f"ip:{client_ip}"
+            key = f"{RATE_LIMIT_KEY_PREFIX}{method} {path}:{rule.spec}:{identity}"
+            buckets.append((key, rule.rate, rule.capacity))
+        if not buckets:
+            return 0.0
+        allowed, retry_after = await self._hit(buckets)
+        self._stats["allowed" if allowed else "limited"] += 1
+        return 0.0 if allowed else retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get limiter counters.
+
+        Returns:
+            Allowed/limited request counts and backend health
+        """
+        return {**self._stats, "redis_available": time.monotonic() >= self._redis_down_until}
+
+    def reset(self) -> None:
+        """Drop local buckets and counters."""
+        self.local.clear()
+        self._redis_down_until = 0.0
+        for name in self._stats:
+            self._stats[name] = 0
+
+    async def _hit(self, buckets: List[Tuple[str, float, int]]) -> Tuple[bool, float]:
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                keys = [key for key, _, _ in buckets]
+                args = [value for _, rate, capacity in buckets for value in (rate, capacity)]
+                allowed, retry_after = await cache.redis_client.eval(
+                    TOKEN_BUCKET_SCRIPT, len(keys), *keys, *args
+                )
+                return bool(int(allowed)), float(retry_after)
+            except Exception as e:
+                self._stats["redis_errors"] += 1
+                self._redis_down_until = time.monotonic() + self.redis_retry_seconds
+                print(f"Rate limit error: {e}")
+        self._stats["local_checks"] += 1
+        return self.local.hit(buckets)
+
+
+rate_limiter = RateLimiter(
+    rules=settings.RATE_LIMIT_RULES,
+    local_max_keys=settings.RATE_LIMIT_LOCAL_MAX_KEYS,
+    redis_retry_seconds=settings.RATE_LIMIT_REDIS_RETRY_SECONDS,
+)
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware answering 429 with Retry-After once a bucket is empty.
+
+    Only requests matching a rule in RATE_LIMIT_RULES are checked.
+    """
+
+    def __init__(self, app, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        if not self.limiter.rules_for(method, path):
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        retry_after = await self.limiter.check(method, path, client_ip(scope, headers), user_id_from(headers))
+        if retry_after == 0:
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps({"detail": "Too many requests"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def client_ip(scope, headers: Dict[str, str]) -> str:
+    """
+    Get the client address of a request.
+
+    Args:
+        scope: ASGI scope
+        headers: Lowercase request headers
+
+    Returns:
+        Client IP as recorded by the outermost trusted proxy when
+        RATE_LIMIT_TRUSTED_PROXY_HOPS is set, else the peer address
+    """
+    hops = settings.RATE_LIMIT_TRUSTED_PROXY_HOPS
+    forwarded = [entry.strip() for entry in headers.get("x-forwarded-for", "").split(",") if entry.strip()]
+    # Entries left of the ones our proxies appended are client-supplied
+    if hops > 0 and len(forwarded) >= hops:
+        return forwarded[-hops]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def user_id_from(headers: Dict[str, str]) -> Optional[str]:
+    """
+    Get the user id from a valid bearer access token.
+
+    Args:
+        headers: Lowercase request headers
+
+    Returns:
+        User id or None for anonymous requests
+    """
+    authorization = headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return None
+    # Identity only selects the bucket; get_current_user enforces revocation
+    payload = verify_token(authorization[7:], check_revocation=False)
+    if not payload or payload.get("type") != "access":
+        return None
+    return payload.get("sub")
@@ -0,0 +1,181 @@
+"""Access token revocation list mirrored into each worker."""
+import asyncio
+import time
+from typing import Any, Dict, Optional
+import redis
+from app.config import settings
+from app.utils import cache
+from app.utils.bloom import BloomFilter
+
+# Sorted set of revoked token ids scored by token expiry (unix seconds)
+REVOKED_TOKENS_KEY = "revoked_tokens"
+
+# Announces newly revoked token ids to every worker
+REVOCATION_CHANNEL = "token:revoked"
+
+# Confirms filter hits from sync code (verify_token runs in the threadpool)
+sync_redis_client = redis.from_url(settings.REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+
+class RevocationList:
+    """
+    Revoked token ids, checked in-process through a bloom filter.
+
+    Redis holds the authoritative list. Each worker keeps a bloom filter
+    of it, rebuilt when (re)subscribing and every rebuild_interval seconds
+    so expired entries drop out, and updated from pub/sub in between. A
+    token absent from the filter is accepted without any I/O; only filter
+    hits are confirmed against Redis.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, rebuild_interval: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rebuild_interval = rebuild_interval
+        self.filter = BloomFilter(capacity, error_rate)
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "checks": 0,
+            "filter_hits": 0,
+            "confirmed": 0,
+            "false_positives": 0,
+            "confirm_errors": 0,
+            "rebuilds": 0,
+        }
+
+    def is_revoked(self, jti: str) -> bool:
+        """
+        Check whether a token id has been revoked.
+
+        If Redis cannot confirm a filter hit the token is treated as
+        revoked, since a hit is far more likely to be genuine.
+
+        Args:
+            jti: Token id
+
+        Returns:
+            True if the token is revoked
+        """
+        self._stats["checks"] += 1
+        if jti not in self.filter:
+            return False
+
+        self._stats["filter_hits"] += 1
+        try:
+            expires_at = sync_redis_client.zscore(REVOKED_TOKENS_KEY, jti)
+        except Exception as e:
+            self._stats["confirm_errors"] += 1
+            print(f"Token revocation check error: {e}")
+            return True
+
+        if expires_at is not None and expires_at > time.time():
+            self._stats["confirmed"] += 1
+            return True
+        self._stats["false_positives"] += 1
+        return False
+
+    async def revoke(self, jti: str, expires_at: float) -> bool:
+        """
+        Revoke a token until it expires.
+
+        Args:
+            jti: Token id
+            expires_at: Token expiry (unix seconds)
+
+        Returns:
+            True if the revocation was stored in Redis
+        """
+        self.filter.add(jti)
+        try:
+            pipe = cache.redis_client.pipeline(transaction=False)
+            pipe.zadd(REVOKED_TOKENS_KEY, {jti: expires_at})
+            pipe.zremrangebyscore(REVOKED_TOKENS_KEY, "-inf", time.time())
+            pipe.publish(REVOCATION_CHANNEL, jti)
+            await pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Token revocation error: {e}")
+            return False
+
+    async def reload(self) -> None:
+        """Rebuild the filter from the revocation list in Redis."""
+        now = time.time()
+        await cache.redis_client.zremrangebyscore(REVOKED_TOKENS_KEY, "-inf", now)
+        jtis = await cache.redis_client.zrangebyscore(REVOKED_TOKENS_KEY, now, "+inf")
+        rebuilt = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+        for jti in jtis:
+            rebuilt.add(jti.decode() if isinstance(jti, bytes) else jti)
+        self.filter = rebuilt
+        self._stats["rebuilds"] += 1
+
+    def handle_message(self, data: Any) -> None:
+        """
+        Apply a revocation announced by another worker.
+
+        Args:
+            data: Revoked token id
+        """
+        self.filter.add(data.decode() if isinstance(data, bytes) else data)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get filter occupancy and check counters.
+
+        Returns:
+            Dictionary of counters
+        """
+        return {
+            **self._stats,
+            "filter_entries": len(self.filter),
+            "filter_bytes": self.filter.size_bytes,
+        }
+
+    def reset(self) -> None:
+        """Empty the filter and reset counters."""
+        self.filter = BloomFilter(self.capacity, self.error_rate)
+        for name in self._stats:
+            self._stats[name] = 0
+
+    def start(self) -> None:
+        """Start syncing the filter for this worker."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sync())
+
+    async def stop(self) -> None:
+        """Stop syncing the filter."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sync(self) -> None:
+        """Subscribe to revocations and rebuild periodically, reconnecting on errors."""
+        while True:
+            try:
+                pubsub = cache.redis_client.pubsub()
+                # Subscribe before loading so nothing revoked in between is missed
+                await pubsub.subscribe(REVOCATION_CHANNEL)
+                await self.reload()
+                rebuilt_at = time.monotonic()
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None and message["type"] == "message":
+                        self.handle_message(message["data"])
+                    if time.monotonic() - rebuilt_at >= self.rebuild_interval:
+                        await self.reload()
+                        rebuilt_at = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Token revocation listener error: {e}")
+                await asyncio.sleep(1)
+
+
+revocation_list = RevocationList(
+    capacity=settings.REVOCATION_FILTER_CAPACITY,
+    error_rate=settings.REVOCATION_FILTER_ERROR_RATE,
+    rebuild_interval=settings.REVOCATION_FILTER_REBUILD_SECONDS,
+)
@@ -0,0 +1,78 @@
+"""In-process request coalescing."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key.
+
+    The first caller for a key starts the work; callers arriving while it
+    is in flight await the same result instead of repeating it. The work
+    runs as its own task, so a cancelled caller does not abort it for the
+    others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Coalescing key
+            fn: Coroutine function producing the result
+
+        Returns:
+            Result of fn (shared with concurrent callers)
+        """
+        return await asyncio.shield(self.start(key, fn))
+
+    def start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """
+        Start fn unless a call with the same key is already in flight.
+
+        The call is registered before this returns, so it is visible to
+        callers arriving before the task first runs.
+
+        Args:
+            key: Coalescing key
+            fn: Coroutine function producing the result
+
+        Returns:
+            Future of the call in flight for the key
+        """
+        future = self._in_flight.get(key)
+        if future is not None and not future.done():
+            self.followers += 1
+            return future
+
+        self.leaders += 1
+        task = asyncio.ensure_future(fn())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._discard(key, task))
+        return task
+
+    def __contains__(self, key: str) -> bool:
+        future = self._in_flight.get(key)
+        return future is not None and not future.done()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get coalescing counters.
+
+        Returns:
+            Leader and follower call counts and keys in flight
+        """
+        return {
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "in_flight": len(self._in_flight),
+        }
+
+    def _discard(self, key: str, task: asyncio.Future) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
@@ -0,0 +1,67 @@
+"""Benchmark cache encodings for typical food search payloads.
+
+Usage (from backend/):
+    python -m benchmarks.cache_codec_benchmark
+"""
+import json
+import timeit
+import uuid
+from datetime import datetime, timezone
+from app.schemas.food_schema import FoodResponse
+from app.services.food_providers import MockFoodProvider
+from app.utils.cache_codec import CacheCodec, msgpack
+
+REPEAT = 200
+
+
+def make_payload(count: int) -> list:
+    """Build `count` serialized FoodResponse dicts, as cached by food search."""
+    foods = []
+    for i in range(count):
+        data = MockFoodProvider.MOCK_FOODS[i % len(MockFoodProvider.MOCK_FOODS)]
+        foods.append(FoodResponse(
+            id=uuid.uuid4(),
+            name=f"{data['name']} #{i}",
+            brand=data["brand"],
+            description=data["description"],
+            source=data["source"],
+            source_id=f"{data['source_id']}{i}",
+            is_verified=True,
+            created_at=datetime.now(timezone.utc),
+            nutrition={"id": uuid.uuid4(), **data["nutrition"]},
+        ).model_dump(mode="json"))
+    return foods
+
+
+def time_us(fn) -> float:
+    """Average runtime of fn in microseconds."""
+    return min(timeit.repeat(fn, number=REPEAT, repeat=3)) / REPEAT * 1_000_000
+
+
+def main():
+    codecs = {
+        "legacy json.dumps": None,
+        "json": CacheCodec("json", compression_threshold=0),
+        "json+zlib": CacheCodec("json", compression_threshold=1024),
+    }
+    if msgpack is not None:
+        codecs["msgpack"] = CacheCodec("msgpack", compression_threshold=0)
+        codecs["msgpack+zlib"] = CacheCodec("msgpack", compression_threshold=1024)
+
+    print(f"{'payload':<10} {'encoding':<18} {'bytes':>8} {'encode us':>10} {'decode us':>10}")
+    for count in (1, 20, 100):
+        payload = make_payload(count)
+        for name, codec in codecs.items():
+            if codec is None:
+                encoded = json.dumps(payload).encode()
+                encode = lambda: json.dumps(payload)  # noqa: E731
+                decode = lambda: json.loads(encoded)  # noqa: E731
+            else:
+                encoded = codec.encode(payload)
+                encode = lambda: codec.encode(payload)  # noqa: E731
+                decode = lambda: codec.decode(encoded)  # noqa: E731
+            print(f"{count:>3} foods  {name:<18} {len(encoded):>8} {time_us(encode):>10.1f} {time_us(decode):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
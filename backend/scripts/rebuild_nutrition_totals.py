@@ -0,0 +1,29 @@
+"""Rebuild daily_nutrition_totals from meal_logs to repair drift.
+
+Usage (from backend/):
+    python -m scripts.rebuild_nutrition_totals [--user USER_ID] [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+"""
+import argparse
+from datetime import date
+from app.database import SessionLocal
+from app.services.nutrition_rollup_service import NutritionRollupService
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user", help="only rebuild this user's totals")
+    parser.add_argument("--start", type=date.fromisoformat, help="first date to rebuild")
+    parser.add_argument("--end", type=date.fromisoformat, help="last date to rebuild")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rows = NutritionRollupService(db).rebuild(args.user, args.start, args.end)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Rebuilt {rows} daily nutrition total rows")
+
+
+if __name__ == "__main__":
+    main()
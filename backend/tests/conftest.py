@@ -1,12 +1,36 @@
 """Pytest configuration and fixtures."""
+import os
+
+# Keep app startup from touching the configured PostgreSQL database
+os.environ.setdefault("TESTING", "1")
+# Minimum bcrypt cost keeps password fixtures fast
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("METRICS_TOKEN", "test-metrics-token")
+
+import fnmatch
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
 import pytest
-from sqlalchemy import create_engine
+import pytest_asyncio
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from fastapi.testclient import TestClient
-from app.database import Base, get_db
+from app.database import Base, get_async_db, get_db
 from app.main import app
 from app.models.user import User
 from app.utils.auth import hash_password, create_access_token
+from app.services.food_service import food_search_hits
+from app.utils.autocomplete import autocomplete_index
+from app.utils import cache
+from app.utils.cache import local_cache, reset_cache_stats
+from app.utils.loop_monitor import LoopMonitor
+from app.utils.rate_limit import rate_limiter
+from app.utils.revocation import revocation_list
 import uuid
 
 # Test database URL (use SQLite for tests)
@@ -17,6 +41,11 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Same database through aiosqlite; NullPool because TestClient and
+# pytest-asyncio tests run on separate event loops
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 @pytest.fixture(scope="function")
 def db():
@@ -30,6 +59,40 @@ def db():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest_asyncio.fixture
+async def async_db(db):
+    """Async session on the test database."""
+    async with TestingAsyncSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def query_counter():
+    """Record SQL statements executed against the test database."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture(autouse=True)
+def reset_in_memory_state():
+    """Clear process-wide in-memory state between tests."""
+    autocomplete_index.clear()
+    local_cache.clear()
+    reset_cache_stats()
+    food_search_hits.clear()
+    rate_limiter.reset()
+    revocation_list.reset()
+    yield
+    autocomplete_index.clear()
+    local_cache.clear()
+
+
 @pytest.fixture(scope="function")
 def client(db):
     """Create test client."""
@@ -39,12 +102,29 @@ def client(db):
         finally:
             pass
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as async_db:
+            yield async_db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def no_loop_blocking(client):
+    """Fail the test if a request handler blocks the client's event loop."""
+    monitor = LoopMonitor(threshold=0.2, interval=0.02)
+    client.portal.call(monitor.start)
+    yield monitor
+    client.portal.call(monitor.stop)
+    if monitor.events:
+        event = monitor.events[0]
+        pytest.fail(f"Event loop blocked for {event['blocked_ms']} ms:\n{event['stack']}")
+
+
 @pytest.fixture
 def test_user(db):
     """Create a test user."""
@@ -70,3 +150,172 @@ def auth_headers(test_user):
     """Create authentication headers."""
     token = create_access_token(str(test_user.id))
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def metrics_headers():
+    """Authorization headers for /metrics."""
+    return {"Authorization": f"Bearer {os.environ['METRICS_TOKEN']}"}
+
+
+class FakePipeline:
+    """Collects commands and runs them on execute()."""
+
+    def __init__(self, fake):
+        self.fake = fake
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    async def execute(self):
+        return [await getattr(self.fake, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the async Redis client."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.published = []
+        self.scans = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, script, numkeys, *args):
+        # Only the compare-and-delete lock release script is used
+        key, token = args
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def expire(self, key, ttl, nx=False, gt=False):
+        current = self.ttls.get(key)
+        if (nx and current is None) or (gt and current is not None and ttl > current):
+            self.ttls[key] = ttl
+
+    async def rename(self, src, dst):
+        if src not in self.data:
+            raise cache.redis.ResponseError("no such key")
+        self.data[dst] = self.data.pop(src)
+
+    async def zscan_iter(self, key, count=None):
+        self.scans += 1
+        for member, score in list(self.data.get(key, {}).items()):
+            yield member, score
+
+    async def scan_iter(self, match=None, count=None):
+        self.scans += 1
+        for key in list(self.data):
+            if fnmatch.fnmatchcase(key, match):
+                yield key
+
+    async def unlink(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def delete(self, *keys):
+        await self.unlink(*keys)
+
+    async def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    async def zscore(self, key, member):
+        return self.data.get(key, {}).get(member)
+
+    async def zrangebyscore(self, key, low, high):
+        low, high = float(low), float(high)
+        return [m for m, score in sorted(self.data.get(key, {}).items(), key=lambda i: i[1]) if low <= score <= high]
+
+    async def zremrangebyscore(self, key, low, high):
+        members = self.data.get(key, {})
+        for member in [m for m, score in members.items() if float(low) <= score <= float(high)]:
+            del members[member]
+
+    async def keys(self, pattern):
+        raise AssertionError("KEYS blocks Redis and must not be used")
+
+    async def publish(self, channel, message):
+        try:
+            message = json.loads(message)
+        except ValueError:
+            pass
+        self.published.append((channel, message))
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Replace the Redis client with an in-memory fake."""
+    fake = FakeRedis()
+    monkeypatch.setattr(cache, "redis_client", fake)
+    return fake
+
+
+class StubFoodAPI:
+    """
+    Local HTTP server mimicking the OpenFoodFacts and USDA search endpoints.
+
+    OpenFoodFacts is served under /off (GET /off/search) and USDA under
+    /usda (GET /usda/foods/search). Responses, per-call delays and status
+    codes can be set per provider; received requests are recorded.
+    """
+
+    def __init__(self):
+        self.responses = {"off": {"products": []}, "usda": {"foods": []}}
+        self.delays = {"off": [], "usda": []}
+        self.statuses = {"off": 200, "usda": 200}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                provider = "off" if url.path == "/off/search" else "usda"
+                stub.requests.append((provider, parse_qs(url.query)))
+                if stub.delays[provider]:
+                    time.sleep(stub.delays[provider].pop(0))
+                body = json.dumps(stub.responses[provider]).encode()
+                self.send_response(stub.statuses[provider])
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.off_url = f"{self.base_url}/off"
+        self.usda_url = f"{self.base_url}/usda"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def food_api_stub():
+    """Run a stub OpenFoodFacts/USDA server for the duration of a test."""
+    stub = StubFoodAPI()
+    yield stub
+    stub.close()
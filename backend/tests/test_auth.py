@@ -1,4 +1,13 @@
 """Tests for authentication endpoints."""
+import asyncio
+import time
+import bcrypt
+import pytest
+from fastapi import HTTPException
+from app.api.deps import load_cached_user, user_cache_key
+from app.config import settings
+from app.utils import cache
+from app.utils.auth import PasswordHasherPool, password_needs_rehash, verify_password
 
 
 def test_register_user_success(client):
@@ -73,3 +82,86 @@ def test_get_current_user_without_auth(client):
     """Test accessing protected endpoint without authentication."""
     response = client.get("/api/v1/users/me")
     assert response.status_code == 403  # FastAPI HTTPBearer returns 403
+
+
+def test_current_user_is_cached_between_requests(client, test_user, auth_headers, query_counter):
+    """Test repeated authenticated requests skip the users lookup."""
+    client.get("/api/v1/users/me", headers=auth_headers)
+    query_counter.clear()
+
+    response = client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == test_user.email
+    assert not [s for s in query_counter if "FROM users" in s]
+
+
+def test_profile_update_invalidates_cached_user(client, test_user, auth_headers, fake_redis, monkeypatch):
+    """Test PATCH handlers persist through a cached user and evict it."""
+    deleted = []
+
+    async def record_delete(*keys):
+        deleted.extend(keys)
+
+    monkeypatch.setattr(fake_redis, "delete", record_delete)
+    client.get("/api/v1/users/me", headers=auth_headers)
+
+    response = client.patch("/api/v1/users/me/goals", json={"daily_calorie_target": 1800}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["daily_calorie_target"] == 1800
+
+    response = client.patch("/api/v1/users/me", json={"first_name": "Renamed"}, headers=auth_headers)
+    assert response.json()["first_name"] == "Renamed"
+    assert response.json()["daily_calorie_target"] == 1800
+
+    response = client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.json()["first_name"] == "Renamed"
+    assert ("cache:invalidate", {"op": "key", "target": f"auth_user:{test_user.id}", "origin": cache.WORKER_ID}) in fake_redis.published
+    # The user is only cached in process, so Redis has nothing to delete
+    assert deleted == []
+
+
+def test_cached_user_snapshot_leaves_out_password_hash(client, db, test_user, auth_headers):
+    """Test credentials aren't cached but still load for handlers reading them."""
+    client.get("/api/v1/users/me", headers=auth_headers)
+
+    snapshot = cache.local_cache.get(user_cache_key(test_user.id))
+    assert snapshot["email"] == test_user.email
+    assert "password_hash" not in snapshot
+
+    password_hash = test_user.password_hash
+    db.expunge_all()
+    user = load_cached_user(db, str(test_user.id))
+    assert user.password_hash == password_hash
+
+
+def test_login_rehashes_outdated_cost(client, db, test_user):
+    """Test hashes made at another bcrypt cost are replaced on login."""
+    test_user.password_hash = bcrypt.hashpw(b"password123", bcrypt.gensalt(rounds=5)).decode()
+    db.commit()
+    assert password_needs_rehash(test_user.password_hash)
+
+    response = client.post("/api/v1/auth/login", json={"email": test_user.email, "password": "password123"})
+    assert response.status_code == 200
+
+    db.refresh(test_user)
+    assert test_user.password_hash.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert not password_needs_rehash(test_user.password_hash)
+    assert verify_password("password123", test_user.password_hash)
+
+
+@pytest.mark.asyncio
+async def test_password_pool_reports_and_bounds_its_queue():
+    """Test the password pool tracks its work and rejects overflow."""
+    pool = PasswordHasherPool(max_workers=1, max_queue=1)
+
+    results = await asyncio.gather(
+        *(pool.run(time.sleep, 0.05) for _ in range(3)),
+        return_exceptions=True
+    )
+
+    assert results.count(None) == 2
+    [rejected] = [r for r in results if isinstance(r, HTTPException)]
+    assert rejected.status_code == 503
+    stats = pool.stats()
+    assert (stats["submitted"], stats["completed"], stats["rejected"]) == (2, 2, 1)
+    assert (stats["queued"], stats["running"]) == (0, 0)
@@ -0,0 +1,199 @@
+"""Tests for the two-tier cache."""
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+import pytest
+from app.utils import cache
+from app.utils.cache_codec import CacheCodec, cache_codec, msgpack, COMPRESSION_ZLIB
+from app.utils.cache import (
+    LocalCache, MISSING, local_cache, cache_get, cache_set, cache_delete,
+    cache_get_swr, cache_set_swr,
+    cache_delete_pattern, cache_invalidate_tag, cache_stats, handle_invalidation,
+    INVALIDATION_CHANNEL, TAG_KEY_PREFIX,
+)
+
+
+@pytest.mark.asyncio
+async def test_local_tier_serves_hot_keys(fake_redis):
+    """Test reads are served locally after the first Redis hit."""
+    await cache_set("food_search:apple", [{"name": "Apple"}], ttl=60)
+    assert cache_codec.decode(fake_redis.data["food_search:apple"]) == [{"name": "Apple"}]
+
+    assert await cache_get("food_search:apple") == [{"name": "Apple"}]
+    local_cache.clear()
+    assert await cache_get("food_search:apple") == [{"name": "Apple"}]
+    assert await cache_get("food_search:apple") == [{"name": "Apple"}]
+    assert await cache_get("food_search:missing") is None
+
+    stats = cache_stats()
+    assert stats["local_hits"] == 2
+    assert stats["local_misses"] == 2
+    assert stats["redis_hits"] == 1
+    assert stats["redis_misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_deletes_evict_local_copies_and_notify_workers(fake_redis):
+    """Test deletes clear both tiers and publish invalidations."""
+    await cache_set("food_search:a", [1])
+    await cache_set("food_search:b", [2])
+    await cache_set("user:1", {"id": 1})
+
+    await cache_delete("user:1")
+    await cache_delete_pattern("food_search:*")
+
+    assert local_cache.get("user:1") is MISSING
+    assert local_cache.get("food_search:a") is MISSING
+    assert fake_redis.data == {}
+    assert fake_redis.scans == 1
+    assert [(c, m["op"], m["target"]) for c, m in fake_redis.published[-2:]] == [
+        (INVALIDATION_CHANNEL, "key", "user:1"),
+        (INVALIDATION_CHANNEL, "pattern", "food_search:*"),
+    ]
+
+
+def test_invalidation_messages_from_other_workers():
+    """Test pub/sub messages evict local entries, except our own."""
+    local_cache.set("food_search:a", [1], size=3)
+    local_cache.set("food_search:b", [2], size=3)
+
+    handle_invalidation(json.dumps({"op": "key", "target": "food_search:a", "origin": cache.WORKER_ID}))
+    assert local_cache.get("food_search:a") == [1]
+
+    handle_invalidation(json.dumps({"op": "key", "target": "food_search:a", "origin": "other"}))
+    assert local_cache.get("food_search:a") is MISSING
+
+    handle_invalidation(json.dumps({"op": "pattern", "target": "food_*", "origin": "other"}))
+    assert local_cache.get("food_search:b") is MISSING
+
+
+def test_local_cache_limits_and_expiry():
+    """Test entry, byte and TTL limits of the local tier."""
+    lru = LocalCache(max_entries=2, max_bytes=100, default_ttl=60)
+    lru.set("a", 1, size=10)
+    lru.set("b", 2, size=10)
+    lru.get("a")
+    lru.set("c", 3, size=10)
+    assert lru.get("b") is MISSING
+    assert lru.get("a") == 1
+
+    lru.set("big", 4, size=95)
+    assert len(lru) == 1
+    assert lru.size_bytes == 95
+    lru.set("too-big", 5, size=101)
+    assert lru.get("too-big") is MISSING
+
+    lru.set("short", 6, size=1, ttl=0.01)
+    time.sleep(0.02)
+    assert lru.get("short") is MISSING
+
+
+@pytest.mark.asyncio
+async def test_tag_invalidation(fake_redis):
+    """Test tagged keys are removed in both tiers without touching others."""
+    await cache_set("food_search:apple", [1], ttl=60, tags=["food_search"])
+    await cache_set("food_search:pear", [2], ttl=600, tags=["food_search"])
+    await cache_set("profile:1", {"id": 1}, ttl=60, tags=["profile"])
+
+    assert set(fake_redis.data[TAG_KEY_PREFIX + "food_search"]) == {"food_search:apple", "food_search:pear"}
+    assert fake_redis.ttls[TAG_KEY_PREFIX + "food_search"] == 600
+
+    assert await cache_invalidate_tag("food_search")
+
+    assert set(fake_redis.data) == {"profile:1", TAG_KEY_PREFIX + "profile"}
+    assert local_cache.get("food_search:pear") is MISSING
+    assert local_cache.get("profile:1") == {"id": 1}
+    assert fake_redis.published[-1][1]["op"] == "tag"
+
+    # Unknown tags are a no-op
+    assert await cache_invalidate_tag("nothing")
+
+
+@pytest.mark.asyncio
+async def test_tag_set_drops_expired_members(fake_redis, monkeypatch):
+    """Test writing to a tag prunes members whose keys have expired."""
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    await cache_set("food_search:apple", [1], ttl=60, tags=["food_search"])
+    await cache_set("food_search:pear", [2], ttl=600, tags=["food_search"])
+
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    await cache_set("food_search:plum", [3], ttl=60, tags=["food_search"])
+
+    assert fake_redis.data[TAG_KEY_PREFIX + "food_search"] == {
+        "food_search:pear": now + 600,
+        "food_search:plum": now + 180,
+    }
+
+
+def test_local_cache_tag_index():
+    """Test local tag eviction and bookkeeping on overwrite."""
+    lru = LocalCache(max_entries=10, max_bytes=100, default_ttl=60)
+    lru.set("a", 1, size=1, tags=["t"])
+    lru.set("b", 2, size=1, tags=["t", "u"])
+    lru.set("a", 3, size=1)
+
+    lru.delete_tag("t")
+    assert lru.get("a") == 3
+    assert lru.get("b") is MISSING
+    lru.delete_tag("u")
+    assert len(lru) == 1
+
+
+@pytest.mark.parametrize("serializer", ["json", "msgpack"])
+def test_codec_round_trip_and_compression(serializer):
+    """Test encoding round-trips and large payloads are compressed."""
+    if serializer == "msgpack" and msgpack is None:
+        pytest.skip("msgpack not installed")
+    codec = CacheCodec(serializer, compression_threshold=256)
+    created = datetime(2025, 10, 19, 10, 0, tzinfo=timezone.utc)
+    food_id = uuid.uuid4()
+    small = {"id": food_id, "created_at": created, "calories": 165.0}
+    large = [{"name": f"Food {i}", "brand": "Generic", "calories": i} for i in range(100)]
+
+    encoded_small = codec.encode(small)
+    assert encoded_small[1] == 0
+    assert codec.decode(encoded_small) == {
+        "id": str(food_id), "created_at": created.isoformat(), "calories": 165.0,
+    }
+
+    encoded_large = codec.encode(large)
+    assert encoded_large[1] == COMPRESSION_ZLIB
+    assert len(encoded_large) < len(json.dumps(large))
+    assert codec.decode(encoded_large) == large
+
+    # Readers decode any known format, whatever they are configured to write
+    assert CacheCodec("json").decode(encoded_large) == large
+
+
+def test_codec_reads_legacy_json_values():
+    """Test values stored as plain JSON before the header existed decode."""
+    assert CacheCodec().decode(b'[{"name": "Apple"}]') == [{"name": "Apple"}]
+    assert CacheCodec().decode('{"a": 1}') == {"a": 1}
+    with pytest.raises(ValueError):
+        CacheCodec("pickle")
+
+
+@pytest.mark.asyncio
+async def test_swr_entries_go_stale_then_refresh_early(fake_redis, monkeypatch):
+    """Test soft expiry and probabilistic early refresh."""
+    await cache_set_swr("fresh", [1], soft_ttl=60, hard_ttl=120)
+    await cache_set_swr("stale", [2], soft_ttl=-1, hard_ttl=120)
+    await cache_set_swr("costly", [3], soft_ttl=5, hard_ttl=120, delta=10)
+    await cache_set("plain", [4])
+
+    assert (await cache_get_swr("fresh"))[:3] == ([1], False, False)
+    assert (await cache_get_swr("stale"))[:3] == ([2], True, True)
+    assert await cache_get_swr("plain") == ([4], False, False, None)
+    assert await cache_get_swr("missing") is None
+
+    # A draw of 1 - e^-1 puts the refresh horizon at delta seconds out
+    monkeypatch.setattr(cache.random, "random", lambda: 1 - 0.36787944117144233)
+    assert (await cache_get_swr("costly"))[:3] == ([3], False, True)
+    assert (await cache_get_swr("costly", beta=0))[:3] == ([3], False, False)
+
+    stats = cache_stats()
+    assert stats["swr_fresh_hits"] == 2
+    assert stats["swr_stale_hits"] == 1
+    assert stats["swr_early_refreshes"] == 1
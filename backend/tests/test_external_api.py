@@ -0,0 +1,191 @@
+"""Tests for external food provider fan-out."""
+import pytest
+import pytest_asyncio
+from app.config import settings
+from app.services.external_api_service import ExternalAPIService
+from app.services.food_providers import OpenFoodFactsProvider, USDAProvider
+from app.utils.http_client import http_clients
+
+OFF_PRODUCTS = {"products": [
+    {
+        "code": "3017620422003",
+        "product_name": "Nutella",
+        "brands": "Ferrero, Nutella",
+        "nutriments": {
+            "energy-kcal_100g": 539,
+            "proteins_100g": 6.3,
+            "carbohydrates_100g": 57.5,
+            "fat_100g": 30.9,
+            "sodium_100g": 0.0428,
+        },
+    },
+    {"code": "123", "product_name": "No energy", "nutriments": {}},
+]}
+
+USDA_FOODS = {"foods": [
+    {
+        "fdcId": 171077,
+        "description": "Chicken, broilers or fryers, breast, raw",
+        "foodNutrients": [
+            {"nutrientNumber": "208", "value": 120},
+            {"nutrientNumber": "203", "value": 22.5},
+            {"nutrientNumber": "204", "value": 2.6},
+            {"nutrientNumber": "307", "value": 45},
+        ],
+    },
+]}
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def close_http_clients():
+    """Close pooled clients so they are not reused across event loops."""
+    yield
+    await http_clients.aclose()
+
+
+def _service(stub, **kwargs):
+    """Build a service querying both providers on the stub server."""
+    providers = [
+        OpenFoodFactsProvider(base_url=stub.off_url),
+        USDAProvider(base_url=stub.usda_url, api_key="TEST"),
+    ]
+    return ExternalAPIService(providers=providers, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_search_all_merges_providers(food_api_stub):
+    """Test both providers are queried and their results normalized."""
+    food_api_stub.responses["off"] = OFF_PRODUCTS
+    food_api_stub.responses["usda"] = USDA_FOODS
+
+    results = await _service(food_api_stub, hedge_delay=0).search_all("nutella", 10)
+
+    assert [(food["source"], food["source_id"]) for food in results] == [
+        ("openfoodfacts", "3017620422003"),
+        ("usda", "171077"),
+    ]
+    assert results[0]["brand"] == "Ferrero"
+    assert results[0]["nutrition"]["sodium_mg"] == pytest.approx(42.8)
+    assert results[1]["nutrition"]["calories"] == 120
+    assert results[1]["nutrition"]["carbs_g"] == 0
+    queries = dict(food_api_stub.requests)
+    assert queries["off"]["search_terms"] == ["nutella"]
+    assert queries["usda"]["api_key"] == ["TEST"]
+
+
+@pytest.mark.asyncio
+async def test_search_all_returns_partial_results_at_deadline(food_api_stub):
+    """Test a slow provider is dropped when the deadline hits."""
+    food_api_stub.responses["off"] = OFF_PRODUCTS
+    food_api_stub.responses["usda"] = USDA_FOODS
+    food_api_stub.delays["usda"] = [1.0]
+
+    service = _service(food_api_stub, deadline=0.3, hedge_delay=0)
+    results = await service.search_all("nutella", 10)
+
+    assert [food["source"] for food in results] == ["openfoodfacts"]
+
+
+@pytest.mark.asyncio
+async def test_search_all_ignores_failing_provider(food_api_stub):
+    """Test a provider error does not fail the whole search."""
+    food_api_stub.responses["usda"] = USDA_FOODS
+    food_api_stub.statuses["off"] = 500
+
+    results = await _service(food_api_stub, hedge_delay=0).search_all("chicken", 10)
+
+    assert [food["source"] for food in results] == ["usda"]
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged(food_api_stub):
+    """Test a duplicate request wins when the first one is slow."""
+    food_api_stub.responses["usda"] = USDA_FOODS
+    food_api_stub.delays["usda"] = [1.5]
+
+    service = ExternalAPIService(
+        providers=[USDAProvider(base_url=food_api_stub.usda_url)],
+        deadline=1.0,
+        hedge_delay=0.1,
+    )
+    results = await service.search_all("chicken", 10)
+
+    assert [food["source_id"] for food in results] == ["171077"]
+    assert len(food_api_stub.requests) == 2
+
+
+def test_parsers_treat_malformed_numbers_as_missing():
+    """Test bad numeric fields drop only that field and long brands are cut."""
+    food = OpenFoodFactsProvider.parse_product({
+        "code": "42",
+        "product_name": "Granola",
+        "brands": "B" * 300 + ", Other",
+        "nutriments": {"energy-kcal_100g": "410", "proteins_100g": "", "fat_100g": "n/a", "sodium_100g": [1]},
+    })
+    assert food["brand"] == "B" * 255
+    assert food["nutrition"]["calories"] == 410
+    assert (food["nutrition"]["protein_g"], food["nutrition"]["fats_g"]) == (0, 0)
+    assert food["nutrition"]["sodium_mg"] is None
+
+    assert OpenFoodFactsProvider.parse_product(
+        {"code": "43", "product_name": "Mystery", "nutriments": {"energy-kcal_100g": "unknown"}}
+    ) is None
+
+    food = USDAProvider.parse_food({
+        "fdcId": 1,
+        "description": "Oats",
+        "brandOwner": "Q" * 300,
+        "foodNutrients": [{"nutrientNumber": "208", "value": 389}, {"nutrientNumber": "203", "value": ""}],
+    })
+    assert food["brand"] == "Q" * 255
+    assert food["nutrition"]["protein_g"] == 0
+
+
+def test_merge_results_interleaves_and_dedupes():
+    """Test round-robin merge with duplicates removed."""
+    a = [{"source": "usda", "source_id": "1"}, {"source": "usda", "source_id": "2"}]
+    b = [{"source": "usda", "source_id": "1"}, {"source": "openfoodfacts", "source_id": "9"}]
+
+    merged = ExternalAPIService.merge_results([a, b], limit=10)
+
+    assert [food["source_id"] for food in merged] == ["1", "2", "9"]
+    assert len(ExternalAPIService.merge_results([a, b], limit=2)) == 2
+
+
+@pytest.mark.asyncio
+async def test_default_provider_uses_mock_data():
+    """Test the default configuration serves built-in demo data."""
+    results = await ExternalAPIService().search_all("chicken", 10)
+    assert [food["name"] for food in results] == ["Chicken Breast, Raw"]
+
+
+@pytest.mark.asyncio
+async def test_provider_requests_reuse_pooled_connections(food_api_stub):
+    """Test repeated searches share one keep-alive connection per host."""
+    food_api_stub.responses["usda"] = USDA_FOODS
+    provider = USDAProvider(base_url=food_api_stub.usda_url)
+
+    for _ in range(3):
+        await provider.search("chicken", 5)
+
+    stats = http_clients.stats()[food_api_stub.base_url]
+    assert stats["requests"] == 3
+    assert stats["errors"] == 0
+    assert stats["connections"] == 1
+    assert stats["idle_connections"] == 1
+
+
+def test_metrics_endpoint_reports_http_pool(client, metrics_headers):
+    """Test pool usage is exposed on /metrics."""
+    response = client.get("/metrics", headers=metrics_headers)
+    assert response.status_code == 200
+    assert "http_client" in response.json()
+
+
+def test_metrics_endpoint_requires_token(client, auth_headers, monkeypatch):
+    """Test /metrics rejects other credentials and is hidden without a token."""
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers=auth_headers).status_code == 401
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 404
@@ -0,0 +1,436 @@
+"""Tests for food search."""
+import asyncio
+import json
+import uuid
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import async_database_url
+from app.models.food import Food, NutritionInfo
+from app.services.food_search_service import FoodSearchService, normalize_query
+from app.services import food_service
+from app.services.food_service import AsyncFoodService, FoodService, food_search_cache_key, food_search_flight, food_search_hits
+from app.utils.cache import (
+    INVALIDATION_CHANNEL, cache_get_swr, cache_set, cache_set_swr, handle_invalidation, local_cache,
+)
+from app.utils.autocomplete import AUTOCOMPLETE_ADD_OP, AutocompleteIndex, autocomplete_index
+
+
+def _add_food(db, name, brand=None, source="custom", source_id=None):
+    """Insert a food with basic nutrition."""
+    food = Food(id=uuid.uuid4(), name=name, brand=brand, source=source, source_id=source_id)
+    db.add(food)
+    db.flush()
+    db.add(NutritionInfo(
+        id=uuid.uuid4(),
+        food_id=food.id,
+        serving_size=100,
+        serving_unit="g",
+        calories=100,
+        protein_g=10,
+        carbs_g=10,
+        fats_g=1,
+    ))
+    db.commit()
+    return food
+
+
+def test_search_ranks_exact_then_prefix_matches(db):
+    """Test exact and prefix matches are ranked ahead of substring matches."""
+    _add_food(db, "Roasted Chicken Thigh")
+    _add_food(db, "Chicken Breast, Raw")
+    _add_food(db, "Chicken")
+    _add_food(db, "Beef Steak")
+
+    results = FoodSearchService(db).search("chicken")
+
+    assert [food.name for food in results] == [
+        "Chicken",
+        "Chicken Breast, Raw",
+        "Roasted Chicken Thigh",
+    ]
+
+
+def test_search_matches_brand_and_escapes_wildcards(db):
+    """Test brand matches are found and LIKE wildcards are literal."""
+    _add_food(db, "Greek Yogurt", brand="Fage")
+    _add_food(db, "100% Orange Juice")
+    _add_food(db, "Orange")
+
+    assert [food.name for food in FoodSearchService(db).search("fage")] == ["Greek Yogurt"]
+    assert [food.name for food in FoodSearchService(db).search("100%")] == ["100% Orange Juice"]
+    assert FoodSearchService(db).search("   ") == []
+
+
+def test_search_endpoint_returns_local_results(client, db, auth_headers, no_loop_blocking):
+    """Test the search endpoint serves ranked local results."""
+    for name in ["Apple Pie", "Apple", "Green Apple", "Apple Juice", "Apple Sauce"]:
+        _add_food(db, name)
+
+    response = client.get("/api/v1/foods/search?q=apple", headers=auth_headers)
+    assert response.status_code == 200
+    names = [food["name"] for food in response.json()]
+    assert names[0] == "Apple"
+    assert names[-1] == "Green Apple"
+
+
+def test_autocomplete_index_prefix_matching():
+    """Test multi-token prefix lookups, ranking and removal."""
+    index = AutocompleteIndex(max_prefix_length=4)
+    index.add("1", "Chicken Breast", "Tyson")
+    index.add("2", "Chickpeas, Canned")
+    index.add("3", "Roast Chicken")
+    index.add("4", "Jalapeño Peppers")
+
+    assert [s["id"] for s in index.search("chick")] == ["1", "2", "3"]
+    assert [s["id"] for s in index.search("chi bre")] == ["1"]
+    assert [s["id"] for s in index.search("tyson")] == ["1"]
+    assert [s["id"] for s in index.search("jalapeno")] == ["4"]
+    assert [s["id"] for s in index.search("chickpeas")] == ["2"]
+    assert index.search("chickens") == []
+    assert index.search("xyz") == []
+
+    index.remove("1")
+    assert [s["id"] for s in index.search("chick")] == ["2", "3"]
+    assert index.search("tyson") == []
+
+
+def test_autocomplete_index_replaces_buckets_on_write():
+    """Test writers never change a bucket a lookup may be walking."""
+    index = AutocompleteIndex(max_prefix_length=4)
+    index.add("1", "Chicken Breast")
+    bucket = index._token_prefixes["chic"]
+    snapshot = list(bucket)
+
+    index.add("2", "Chickpeas")
+    index.remove("1")
+
+    assert bucket == snapshot
+    assert [s["id"] for s in index.search("chic")] == ["2"]
+
+
+def test_autocomplete_endpoint_sees_custom_foods(client, auth_headers):
+    """Test foods created through the API are immediately suggested."""
+    response = client.post("/api/v1/foods", headers=auth_headers, json={
+        "name": "Protein Pancakes",
+        "brand": "Kodiak",
+        "nutrition": {"serving_size": 50, "serving_unit": "g", "calories": 190},
+    })
+    assert response.status_code == 201
+    food_id = response.json()["id"]
+
+    response = client.get("/api/v1/foods/autocomplete?q=kod", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == [{"id": food_id, "name": "Protein Pancakes", "brand": "Kodiak"}]
+
+
+def test_autocomplete_entries_reach_other_workers(client, auth_headers, fake_redis):
+    """Test created foods are published to and applied by other workers."""
+    response = client.post("/api/v1/foods", headers=auth_headers, json={
+        "name": "Oat Milk",
+        "brand": "Oatly",
+        "nutrition": {"serving_size": 240, "serving_unit": "ml", "calories": 120},
+    })
+    food_id = response.json()["id"]
+    channel, message = fake_redis.published[-1]
+    assert (channel, message["op"]) == (INVALIDATION_CHANNEL, AUTOCOMPLETE_ADD_OP)
+    assert message["target"] == [[food_id, "Oat Milk", "Oatly"]]
+
+    # As received by a worker that hasn't seen the food
+    autocomplete_index.clear()
+    handle_invalidation(json.dumps({**message, "origin": "other"}))
+    assert [s["id"] for s in autocomplete_index.search("oatl")] == [food_id]
+
+
+def _external_food(source_id, name):
+    """Build an external API result."""
+    return {
+        "name": name,
+        "brand": "Generic",
+        "source": "usda",
+        "source_id": source_id,
+        "nutrition": {"serving_size": 100, "serving_unit": "g", "calories": 50, "protein_g": 1},
+    }
+
+
+def test_save_external_foods_batches_inserts(db, query_counter):
+    """Test external results are upserted with a fixed number of statements."""
+    existing = _add_food(db, "Existing Food", source="usda", source_id="1")
+    batch = [_external_food(str(i), f"Food {i}") for i in range(1, 21)]
+    batch.append(_external_food("5", "Duplicate of Food 5"))
+
+    query_counter.clear()
+    foods = FoodService(db)._save_external_foods(batch)
+
+    # existing-key lookup, foods insert, nutrition insert, reload + nutrition
+    assert len([s for s in query_counter if not s.startswith(("BEGIN", "COMMIT"))]) == 5
+    assert [food.source_id for food in foods] == [str(i) for i in range(1, 21)]
+    assert foods[0].id == existing.id
+    assert foods[4].name == "Food 5"
+    assert all(food.nutrition is not None for food in foods)
+    assert db.query(Food).count() == 20
+    assert [s["name"] for s in autocomplete_index.search("food 2")] == ["Food 2", "Food 20"]
+
+
+def test_save_external_foods_skips_conflicting_rows(db):
+    """Test rows inserted concurrently are not duplicated."""
+    service = FoodService(db)
+    service._insert_foods_ignoring_conflicts([{
+        "id": uuid.uuid4(), "name": "Raced", "brand": None, "source": "usda",
+        "source_id": "42", "description": None, "is_verified": True,
+    }])
+    inserted = service._insert_foods_ignoring_conflicts([{
+        "id": uuid.uuid4(), "name": "Raced again", "brand": None, "source": "usda",
+        "source_id": "42", "description": None, "is_verified": True,
+    }])
+
+    assert inserted == set()
+    assert db.query(Food).filter(Food.source_id == "42").count() == 1
+
+
+class CountingExternalAPI:
+    """External API stand-in that counts and slows down searches."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def search_all(self, query, limit=20):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return [_external_food("900", "Dragon Fruit")]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_searches_fetch_once(db, fake_redis):
+    """Test concurrent cache misses for one query share a single external fetch."""
+    external = CountingExternalAPI()
+    services = [FoodService(db) for _ in range(5)]
+    for service in services:
+        service.external_api = external
+
+    results = await asyncio.gather(*(service.search_foods("dragon") for service in services))
+
+    assert external.calls == 1
+    assert all([food.name for food in result] == ["Dragon Fruit"] for result in results)
+    assert food_search_flight.stats()["in_flight"] == 0
+    assert not [key for key in fake_redis.data if key.startswith("lock:")]
+
+
+@pytest.mark.asyncio
+async def test_search_waits_for_worker_holding_lock(db, fake_redis):
+    """Test a worker that loses the lock reuses the holder's cached result."""
+    fake_redis.data["lock:food_search:kiwi"] = "other-worker"
+    external = CountingExternalAPI()
+    service = FoodService(db)
+    service.external_api = external
+
+    async def other_worker_finishes():
+        await asyncio.sleep(0.1)
+        await cache_set("food_search:kiwi", [{
+            "id": str(uuid.uuid4()), "name": "Kiwi", "brand": None, "source": "usda",
+            "source_id": "7", "is_verified": True, "created_at": "2024-01-01T00:00:00",
+        }])
+
+    results, _ = await asyncio.gather(service.search_foods("kiwi"), other_worker_finishes())
+
+    assert external.calls == 0
+    assert [food.name for food in results] == ["Kiwi"]
+
+
+@pytest.mark.asyncio
+async def test_stale_search_served_while_refreshing(db, fake_redis):
+    """Test a stale cached search is returned at once and refreshed in the background."""
+    stale = [{
+        "id": str(uuid.uuid4()), "name": "Old Dragon Fruit", "brand": None, "source": "usda",
+        "source_id": "1", "is_verified": True, "created_at": "2024-01-01T00:00:00",
+    }]
+    await cache_set_swr("food_search:dragon", stale, soft_ttl=-1, hard_ttl=60)
+    external = CountingExternalAPI()
+    service = FoodService(db)
+    service.external_api = external
+
+    results = await service.search_foods("dragon")
+    assert [food.name for food in results] == ["Old Dragon Fruit"]
+
+    await asyncio.gather(*food_service._background_tasks)
+    local_cache.clear()
+    refreshed = await cache_get_swr("food_search:dragon")
+
+    assert external.calls == 1
+    assert not refreshed.stale
+    assert [food["name"] for food in refreshed.value] == ["Dragon Fruit"]
+    assert food_service.background_stats["succeeded"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_early_refresh_replaces_fresh_entry(db, fake_redis, monkeypatch):
+    """Test an early refresh fetches again although the entry isn't stale yet."""
+    cached = [{
+        "id": str(uuid.uuid4()), "name": "Old Dragon Fruit", "brand": None, "source": "usda",
+        "source_id": "1", "is_verified": True, "created_at": "2024-01-01T00:00:00",
+    }]
+    await cache_set_swr("food_search:dragon", cached, soft_ttl=30, hard_ttl=60, delta=10)
+    # A draw this close to 1 puts the refresh horizon past the soft expiry
+    monkeypatch.setattr("app.utils.cache.random.random", lambda: 0.999)
+    external = CountingExternalAPI()
+    service = FoodService(db)
+    service.external_api = external
+    succeeded = food_service.background_stats["succeeded"]
+
+    results = await service.search_foods("dragon")
+    assert [food.name for food in results] == ["Old Dragon Fruit"]
+
+    await asyncio.gather(*food_service._background_tasks)
+    local_cache.clear()
+    refreshed = await cache_get_swr("food_search:dragon", beta=0)
+
+    assert external.calls == 1
+    assert [food["name"] for food in refreshed.value] == ["Dragon Fruit"]
+    assert food_service.background_stats["succeeded"] == succeeded + 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_skipped_after_another_worker_rewrote_entry(db, fake_redis):
+    """Test a queued refresh reuses an entry written after it was queued."""
+    await cache_set_swr("food_search:dragon", [], soft_ttl=30, hard_ttl=60)
+    seen = (await cache_get_swr("food_search:dragon", beta=0)).soft_expires_at
+    await cache_set_swr("food_search:dragon", [], soft_ttl=40, hard_ttl=60)
+    external = CountingExternalAPI()
+    service = FoodService(db)
+    service.external_api = external
+
+    await service._background_search("dragon", 20, "food_search:dragon", seen)
+
+    assert external.calls == 0
+
+
+def test_normalize_query_folds_equivalent_spellings():
+    """Test case, whitespace, accents and plurals normalize to one key."""
+    assert normalize_query("  Chicken   BREAST ") == "chicken breast"
+    assert normalize_query("Crème Brûlée") == "creme brulee"
+    assert normalize_query("Crème", fold_accents=False) == "crème"
+    assert normalize_query("ＡＰＰＬＥ") == "apple"
+    assert normalize_query("Blueberries Tomatoes Peaches Apples", stem=True) == "blueberry tomato peach apple"
+    assert normalize_query("hummus grass kiwis", stem=True) == "hummus grass kiwi"
+    assert food_search_cache_key("Chicken ") == food_search_cache_key("CHICKENS") == "food_search:chicken"
+
+
+class EmptyExternalAPI(CountingExternalAPI):
+    """External API stand-in that never finds anything."""
+
+    async def search_all(self, query, limit=20):
+        self.calls += 1
+        return []
+
+
+@pytest.mark.asyncio
+async def test_empty_searches_are_cached_briefly(db, fake_redis):
+    """Test searches without results are negatively cached and reported."""
+    external = EmptyExternalAPI()
+    service = FoodService(db)
+    service.external_api = external
+
+    assert await service.search_foods("Zzyzx ") == []
+    assert await service.search_foods("zzyzx") == []
+    assert external.calls == 1
+    assert "food_search:zzyzx" in fake_redis.data
+
+    # Local foods created after the negative entry are still found
+    _add_food(db, "Zzyzx Bar")
+    assert [food.name for food in await service.search_foods("ZZYZX")] == ["Zzyzx Bar"]
+    assert external.calls == 1
+
+    report = food_search_hits.report(hit_outcomes=("local", "hit", "negative_hit"))
+    assert report["tracked_keys"] == 1
+    assert (report["lookups"], report["miss"], report["negative_hit"]) == (3, 1, 2)
+    assert report["hit_rate"] == 0.667
+    assert report["top_keys"][0]["key"] == "food_search:zzyzx"
+    assert report["top_keys"][0]["negative_hit"] == 2
+
+
+@pytest.mark.asyncio
+async def test_background_search_returns_local_results_then_enriches(db, fake_redis):
+    """Test background mode answers from the local DB and fills the cache later."""
+    _add_food(db, "Dragon Fruit Bowl")
+    external = CountingExternalAPI()
+    services = [FoodService(db) for _ in range(3)]
+    for service in services:
+        service.external_api = external
+
+    first = [await service.search_foods("dragon", background=True) for service in services]
+    assert all([food.name for food in results] == ["Dragon Fruit Bowl"] for results in first)
+    assert all(service.enrichment_pending for service in services)
+    assert food_service.background_stats["deduplicated"] >= 2
+
+    await asyncio.gather(*food_service._background_tasks)
+    service = FoodService(db)
+    service.external_api = external
+    enriched = await service.search_foods("dragon", background=True)
+
+    assert external.calls == 1
+    assert not service.enrichment_pending
+    assert [food.name for food in enriched] == ["Dragon Fruit Bowl", "Dragon Fruit"]
+
+
+def test_search_endpoint_flags_pending_enrichment(client, auth_headers, fake_redis):
+    """Test the search endpoint tells clients enrichment is still running."""
+    response = client.get("/api/v1/foods/search?q=zzyzx&background=true", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["X-Enrichment-Pending"] == "true"
+
+    response = client.get("/api/v1/foods/search?q=zzyzx", headers=auth_headers)
+    assert "X-Enrichment-Pending" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_shared_search_survives_leader_session_closing(db, async_db, fake_redis):
+    """Test followers get results after the leader is cancelled and its session closed."""
+    external = CountingExternalAPI()
+    follower_db = AsyncSession(bind=async_db.bind, expire_on_commit=False)
+    leader, follower = AsyncFoodService(async_db), AsyncFoodService(follower_db)
+    leader.external_api = follower.external_api = external
+
+    leader_task = asyncio.create_task(leader.search_foods("dragon"))
+    while food_search_flight.stats()["in_flight"] == 0:
+        await asyncio.sleep(0.005)
+    follower_task = asyncio.create_task(follower.search_foods("dragon"))
+
+    # The leader's request goes away and get_async_db closes its session
+    leader_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader_task
+    await async_db.close()
+    reused = []
+    event.listen(async_db.sync_session, "after_begin", lambda *args: reused.append(args))
+
+    results = await follower_task
+    await follower_db.close()
+    assert [food.name for food in results] == ["Dragon Fruit"]
+    assert external.calls == 1
+    # The shared search ran on its own session, not the closed one
+    assert reused == []
+
+
+@pytest.mark.asyncio
+async def test_async_service_searches_and_saves_without_sync_session(db, async_db, fake_redis):
+    """Test the AsyncSession-backed service runs the full search flow."""
+    _add_food(db, "Dragon Fruit Bowl")
+    service = AsyncFoodService(async_db)
+    service.external_api = CountingExternalAPI()
+
+    results = await service.search_foods("dragon")
+
+    assert [food.name for food in results] == ["Dragon Fruit Bowl", "Dragon Fruit"]
+    assert results[1].nutrition.calories == 50
+    db.expire_all()
+    assert db.query(Food).filter(Food.source_id == "900").count() == 1
+    # Sync operations that would call Session methods aren't inherited
+    assert not hasattr(service, "get_food_by_id")
+    assert not hasattr(service, "_save_external_foods")
+
+
+def test_async_database_url_maps_drivers():
+    """Test sync URLs map to their async drivers."""
+    assert async_database_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert async_database_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
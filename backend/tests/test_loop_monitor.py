@@ -0,0 +1,50 @@
+"""Tests for event loop lag monitoring."""
+import asyncio
+import time
+import pytest
+from app.utils.loop_monitor import LoopMonitor
+
+
+def _hog_the_loop(seconds):
+    """Block the calling thread like a sync DB or bcrypt call would."""
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_blocking_callback_is_reported_with_its_stack():
+    """Test a callback holding the loop is recorded with a stack sample."""
+    monitor = LoopMonitor(threshold=0.1, interval=0.02)
+    await monitor.start()
+    await asyncio.sleep(0.05)
+    _hog_the_loop(0.3)
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    assert monitor.blocked_count == 1
+    [event] = monitor.events
+    assert event["blocked_ms"] >= 250
+    assert "_hog_the_loop" in event["stack"]
+
+    stats = monitor.stats()
+    assert not stats["running"]
+    assert stats["lag_ms_max"] >= 250
+    assert stats["recent_blocks"] == [event]
+
+
+@pytest.mark.asyncio
+async def test_cooperative_code_is_not_reported():
+    """Test awaiting code does not trigger blocking reports."""
+    monitor = LoopMonitor(threshold=0.1, interval=0.02)
+    await monitor.start()
+    await asyncio.gather(*(asyncio.sleep(0.05) for _ in range(100)))
+    await monitor.stop()
+
+    assert monitor.blocked_count == 0
+    assert monitor.stats()["lag_ms_max"] < 100
+
+
+def test_metrics_report_event_loop(client, metrics_headers):
+    """Test /metrics exposes the loop monitor."""
+    response = client.get("/metrics", headers=metrics_headers)
+    assert response.status_code == 200
+    assert response.json()["event_loop"]["running"] is False
@@ -0,0 +1,356 @@
+"""Tests for meal logging."""
+import csv
+import io
+import json
+import uuid
+import pytest
+from datetime import date
+from app.models.food import Food, NutritionInfo
+from app.models.meal_log import DailyNutritionTotal, MealLog
+from app.models.recipe import Recipe, RecipeIngredient
+from app.schemas.meal_log_schema import MealLogCreate, MealLogResponse
+from app.services.meal_log_export import EXPORT_COLUMNS, MealLogExporter
+from app.services.meal_log_service import MealLogService
+from app.services.nutrition_rollup_service import NutritionRollupService
+
+LOG_DATE = date(2024, 3, 1)
+
+
+def _add_food(db, name="Oatmeal"):
+    """Insert a food with nutrition per 100 g."""
+    food = Food(id=uuid.uuid4(), name=name, source="custom")
+    db.add(food)
+    db.flush()
+    db.add(NutritionInfo(
+        id=uuid.uuid4(), food_id=food.id, serving_size=100, serving_unit="g",
+        calories=100, protein_g=10, carbs_g=20, fats_g=5,
+    ))
+    db.commit()
+    return food
+
+
+def _add_recipe(db, user, foods):
+    """Insert a recipe using each food once."""
+    recipe = Recipe(id=uuid.uuid4(), user_id=user.id, name="Bowl", servings=2)
+    db.add(recipe)
+    db.flush()
+    for idx, food in enumerate(foods):
+        db.add(RecipeIngredient(
+            id=uuid.uuid4(), recipe_id=recipe.id, food_id=food.id,
+            quantity=100, unit="g", display_order=idx,
+        ))
+    db.commit()
+    return recipe
+
+
+def _add_log(db, user, food, meal_type, calories, logged_date=LOG_DATE, recipe=None):
+    """Insert a meal log with fixed macros and count it in the rollup."""
+    log = MealLog(
+        id=uuid.uuid4(), user_id=user.id, quantity=1, unit="serving",
+        food_id=food.id if food else None, recipe_id=recipe.id if recipe else None,
+        meal_type=meal_type, logged_date=logged_date,
+        calories=calories, protein_g=10, carbs_g=20, fats_g=5,
+    )
+    db.add(log)
+    NutritionRollupService(db).add_log(log)
+    db.commit()
+    return log
+
+
+def test_daily_summary_breaks_down_by_meal_type(db, test_user, query_counter):
+    """Test the summary is one rollup lookup and reuses the loaded user."""
+    test_user.daily_calorie_target = 2000
+    db.commit()
+    food = _add_food(db)
+    _add_log(db, test_user, food, "breakfast", 300)
+    _add_log(db, test_user, food, "breakfast", 200)
+    _add_log(db, test_user, food, "dinner", 700)
+    _add_log(db, test_user, food, "dinner", 999, logged_date=date(2024, 3, 2))
+
+    db.refresh(test_user)
+    query_counter.clear()
+    logs, summary = MealLogService(db).get_daily_logs_with_summary(test_user, LOG_DATE)
+
+    assert len([s for s in query_counter if "FROM daily_nutrition_totals" in s]) == 1
+    assert not [s for s in query_counter if "FROM users" in s]
+    assert len(logs) == 3
+    assert summary.total_calories == 1200
+    assert summary.total_protein_g == 30
+    assert summary.calorie_remaining == 800
+    assert summary.by_meal_type["breakfast"].calories == 500
+    assert summary.by_meal_type["breakfast"].entry_count == 2
+    assert summary.by_meal_type["dinner"].fats_g == 5
+    assert "lunch" not in summary.by_meal_type
+
+
+def test_get_meal_logs_endpoint_returns_breakdown(client, db, test_user, auth_headers):
+    """Test the endpoint returns logs with the per-meal breakdown."""
+    food = _add_food(db)
+    _add_log(db, test_user, food, "lunch", 450)
+
+    response = client.get(f"/api/v1/meal-logs?date={LOG_DATE}", headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["logs"]) == 1
+    assert data["summary"]["total_calories"] == 450
+    assert data["summary"]["by_meal_type"]["lunch"]["entry_count"] == 1
+
+
+def test_daily_logs_serialize_without_lazy_loads(db, test_user, query_counter):
+    """Test serializing a day's logs takes a fixed number of queries."""
+    foods = [_add_food(db, name=f"Food {i}") for i in range(6)]
+    for food in foods:
+        _add_log(db, test_user, food, "snack", 100)
+    for i in range(2):
+        _add_log(db, test_user, None, "dinner", 400, recipe=_add_recipe(db, test_user, foods[i * 3:i * 3 + 3]))
+    user_id = str(test_user.id)
+    db.expunge_all()
+
+    query_counter.clear()
+    logs = MealLogService(db).get_daily_logs(user_id, LOG_DATE)
+    responses = [MealLogResponse.model_validate(log) for log in logs]
+
+    # logs, food, food nutrition, recipe, ingredients, ingredient food, its nutrition
+    assert len([s for s in query_counter if s.lstrip().upper().startswith("SELECT")]) <= 7
+    assert len(responses) == 8
+    recipe_logs = [r for r in responses if r.recipe]
+    assert len(recipe_logs) == 2
+    assert all(i.food.nutrition for r in recipe_logs for i in r.recipe.ingredients)
+
+
+def test_rollup_follows_created_and_deleted_logs(db, test_user):
+    """Test creating and deleting logs increments and decrements the day's totals."""
+    food = _add_food(db)
+    service = MealLogService(db)
+    log_data = MealLogCreate(food_id=food.id, quantity=150, unit="g", meal_type="lunch", logged_date=LOG_DATE)
+    first = service.create_meal_log(log_data, str(test_user.id))
+    second = service.create_meal_log(log_data, str(test_user.id))
+
+    (row,) = NutritionRollupService(db).get_day(str(test_user.id), LOG_DATE)
+    assert row.meal_type == "lunch"
+    assert row.log_count == 2
+    assert float(row.calories) == 300
+    assert float(row.protein_g) == 30
+
+    service.delete_meal_log(str(first.id), str(test_user.id))
+    db.expire_all()
+    (row,) = NutritionRollupService(db).get_day(str(test_user.id), LOG_DATE)
+    assert row.log_count == 1
+    assert float(row.calories) == 150
+
+    service.delete_meal_log(str(second.id), str(test_user.id))
+    assert NutritionRollupService(db).get_day(str(test_user.id), LOG_DATE) == []
+
+
+def test_rebuild_repairs_drifted_totals(db, test_user):
+    """Test rebuild recomputes totals from the logs."""
+    food = _add_food(db)
+    _add_log(db, test_user, food, "breakfast", 300)
+    _add_log(db, test_user, food, "dinner", 500, logged_date=date(2024, 3, 2))
+    # Logs written behind the service's back leave the rollup stale
+    db.add(MealLog(
+        id=uuid.uuid4(), user_id=test_user.id, food_id=food.id, quantity=1, unit="serving",
+        meal_type="breakfast", logged_date=LOG_DATE, calories=200, protein_g=0, carbs_g=0, fats_g=0,
+    ))
+    db.query(DailyNutritionTotal).filter(DailyNutritionTotal.meal_type == "dinner").delete()
+    db.commit()
+
+    rollup = NutritionRollupService(db)
+    assert rollup.rebuild(user_id=str(test_user.id)) == 2
+    db.commit()
+
+    rows = rollup.get_range(str(test_user.id), LOG_DATE, date(2024, 3, 2))
+    assert [(r.logged_date, r.meal_type, float(r.calories), r.log_count) for r in rows] == [
+        (LOG_DATE, "breakfast", 500, 2),
+        (date(2024, 3, 2), "dinner", 500, 1),
+    ]
+
+
+def test_summary_range_fills_empty_days(client, db, test_user, auth_headers):
+    """Test the range summary returns every day and averages logged days."""
+    food = _add_food(db)
+    _add_log(db, test_user, food, "breakfast", 300)
+    _add_log(db, test_user, food, "dinner", 500)
+    _add_log(db, test_user, food, "lunch", 400, logged_date=date(2024, 3, 3))
+    _add_log(db, test_user, food, "lunch", 900, logged_date=date(2024, 3, 8))
+
+    response = client.get("/api/v1/meal-logs/summary?start=2024-03-01&end=2024-03-07", headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [d["date"] for d in data["daily_summaries"]] == [f"2024-03-0{i}" for i in range(1, 8)]
+    assert data["daily_summaries"][0]["total_calories"] == 800
+    assert data["daily_summaries"][0]["meal_count"] == 2
+    assert data["daily_summaries"][1]["total_calories"] == 0
+    assert data["daily_summaries"][1]["meal_count"] == 0
+    assert data["daily_summaries"][2]["total_calories"] == 400
+    assert data["averages"]["calories"] == 600
+    assert data["days_logged"] == 2
+    assert "days_logged" not in data["averages"]
+
+
+def test_summary_range_rejects_invalid_ranges(client, auth_headers):
+    """Test reversed and overly long ranges are rejected."""
+    reversed_range = client.get("/api/v1/meal-logs/summary?start=2024-03-07&end=2024-03-01", headers=auth_headers)
+    too_long = client.get("/api/v1/meal-logs/summary?start=2023-01-01&end=2024-12-31", headers=auth_headers)
+
+    assert reversed_range.status_code == 400
+    assert too_long.status_code == 400
+
+
+def test_batch_creates_all_entries_in_one_transaction(client, db, test_user, auth_headers, query_counter):
+    """Test a batch resolves foods and recipes in bulk and commits once."""
+    foods = [_add_food(db, name=f"Food {i}") for i in range(3)]
+    recipe = _add_recipe(db, test_user, foods)
+    entries = [
+        {"food_id": str(food.id), "quantity": 50, "unit": "g", "meal_type": "lunch", "logged_date": str(LOG_DATE)}
+        for food in foods
+    ]
+    entries.append({"recipe_id": str(recipe.id), "quantity": 1, "unit": "serving",
+                    "meal_type": "dinner", "logged_date": str(LOG_DATE)})
+
+    query_counter.clear()
+    response = client.post("/api/v1/meal-logs/batch", json={"entries": entries}, headers=auth_headers)
+
+    assert response.status_code == 201
+    logs = response.json()["logs"]
+    assert [log["meal_type"] for log in logs] == ["lunch", "lunch", "lunch", "dinner"]
+    assert logs[0]["calories"] == 50
+    assert logs[3]["calories"] == 150  # 300 g of ingredients over 2 servings
+    assert not [s for s in query_counter if "foods.id = ?" in s or "recipes.id = ?" in s]
+    assert len([s for s in query_counter if s.startswith("INSERT INTO meal_logs")]) == 1
+
+    summary = MealLogService(db).calculate_daily_summary(str(test_user.id), LOG_DATE)
+    assert summary.by_meal_type["lunch"].entry_count == 3
+    assert summary.total_calories == 300
+
+
+def test_batch_reports_invalid_entries_and_saves_nothing(client, db, test_user, auth_headers):
+    """Test an invalid entry rejects the whole batch with per-entry errors."""
+    food = _add_food(db)
+    valid = {"food_id": str(food.id), "quantity": 1, "unit": "serving", "meal_type": "snack", "logged_date": str(LOG_DATE)}
+    entries = [
+        valid,
+        {**valid, "food_id": str(uuid.uuid4())},
+        {"quantity": 1, "unit": "serving", "meal_type": "snack", "logged_date": str(LOG_DATE)},
+    ]
+
+    response = client.post("/api/v1/meal-logs/batch", json={"entries": entries}, headers=auth_headers)
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == [
+        {"index": 1, "detail": "Food not found"},
+        {"index": 2, "detail": "Either food_id or recipe_id must be provided"},
+    ]
+    assert db.query(MealLog).count() == 0
+    assert db.query(DailyNutritionTotal).count() == 0
+
+
+def test_copy_meal_to_several_days(client, db, test_user, auth_headers):
+    """Test copying one meal type repeats its logs and totals on each target date."""
+    food = _add_food(db)
+    _add_log(db, test_user, food, "breakfast", 300)
+    _add_log(db, test_user, food, "breakfast", 200)
+    _add_log(db, test_user, food, "dinner", 700)
+    # Existing totals on a target date are added to, not replaced
+    _add_log(db, test_user, food, "breakfast", 100, logged_date=date(2024, 3, 3))
+
+    response = client.post("/api/v1/meal-logs/copy", json={
+        "source_date": str(LOG_DATE),
+        "target_dates": ["2024-03-02", "2024-03-03", "2024-03-02"],
+        "meal_type": "breakfast",
+    }, headers=auth_headers)
+
+    assert response.status_code == 201
+    assert response.json() == {"copied": 4}
+
+    service = MealLogService(db)
+    copies = service.get_daily_logs(str(test_user.id), date(2024, 3, 2))
+    assert sorted(float(log.calories) for log in copies) == [200, 300]
+    assert all(log.food_id == food.id and log.meal_type == "breakfast" for log in copies)
+    assert len({log.id for log in copies}) == 2
+
+    summary = service.calculate_daily_summary(str(test_user.id), date(2024, 3, 3))
+    assert summary.by_meal_type["breakfast"].entry_count == 3
+    assert summary.total_calories == 600
+    assert "dinner" not in summary.by_meal_type
+
+    # The incremented rollup matches a rebuild from the logs
+    before = [(r.logged_date, r.meal_type, float(r.calories), r.log_count)
+              for r in NutritionRollupService(db).get_range(str(test_user.id), LOG_DATE, date(2024, 3, 3))]
+    NutritionRollupService(db).rebuild(str(test_user.id))
+    db.commit()
+    after = [(r.logged_date, r.meal_type, float(r.calories), r.log_count)
+             for r in NutritionRollupService(db).get_range(str(test_user.id), LOG_DATE, date(2024, 3, 3))]
+    assert before == after
+
+
+def test_copy_rejects_source_date_as_target(client, auth_headers):
+    """Test a day cannot be copied onto itself."""
+    response = client.post("/api/v1/meal-logs/copy", json={
+        "source_date": str(LOG_DATE),
+        "target_dates": [str(LOG_DATE)],
+    }, headers=auth_headers)
+
+    assert response.status_code == 400
+
+
+def test_export_streams_csv_and_ndjson(client, db, test_user, auth_headers):
+    """Test the export includes food and recipe names in both text formats."""
+    foods = [_add_food(db, name="Oatmeal"), _add_food(db, name="Rice")]
+    recipe = _add_recipe(db, test_user, foods)
+    _add_log(db, test_user, foods[0], "breakfast", 300)
+    _add_log(db, test_user, None, "dinner", 400, logged_date=date(2024, 3, 2), recipe=recipe)
+
+    response = client.get("/api/v1/meal-logs/export?format=csv", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="meal-logs.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert tuple(rows[0].keys()) == EXPORT_COLUMNS
+    assert [(r["logged_date"], r["food_name"], r["recipe_name"]) for r in rows] == [
+        ("2024-03-01", "Oatmeal", ""),
+        ("2024-03-02", "", "Bowl"),
+    ]
+
+    response = client.get("/api/v1/meal-logs/export?format=ndjson&start=2024-03-02", headers=auth_headers)
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["recipe_name"] == "Bowl"
+    assert lines[0]["calories"] == 400
+
+
+def test_export_encodes_one_chunk_per_batch(db, test_user):
+    """Test rows are fetched and encoded in fixed-size batches."""
+    food = _add_food(db)
+    for i in range(5):
+        _add_log(db, test_user, food, "snack", 100 + i)
+
+    exporter = MealLogExporter(db, batch_size=2)
+    chunks = list(exporter.csv(exporter.batches(str(test_user.id))))
+
+    # header, then batches of 2, 2 and 1 rows
+    assert [chunk.count(b"\n") for chunk in chunks] == [1, 2, 2, 1]
+
+
+def test_export_parquet_round_trips(db, test_user):
+    """Test the streamed Parquet chunks form a readable file."""
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    food = _add_food(db, name="Oatmeal")
+    for i in range(5):
+        _add_log(db, test_user, food, "snack", 100 + i)
+
+    exporter = MealLogExporter(db, batch_size=2)
+    data = b"".join(exporter.parquet(exporter.batches(str(test_user.id))))
+
+    parquet_file = pyarrow_parquet.ParquetFile(io.BytesIO(data))
+    assert parquet_file.metadata.num_row_groups == 3
+    table = pyarrow_parquet.read_table(io.BytesIO(data))
+    assert tuple(table.column_names) == EXPORT_COLUMNS
+    assert table.column("calories").to_pylist() == [100, 101, 102, 103, 104]
+    assert set(table.column("food_name").to_pylist()) == {"Oatmeal"}
+    assert table.column("logged_date").to_pylist() == [LOG_DATE] * 5
@@ -0,0 +1,137 @@
+"""Tests for token bucket rate limiting."""
+import pytest
+from app.config import settings
+from app.utils.rate_limit import LocalTokenBuckets, RateLimiter, RateLimitRule, client_ip, rate_limiter
+
+
+class FailingRedis:
+    """Redis client whose scripts always fail."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def eval(self, *args):
+        self.calls += 1
+        raise ConnectionError("redis down")
+
+
+class ScriptedRedis:
+    """Redis client answering the bucket script with fixed replies."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.keys = []
+
+    async def eval(self, script, numkeys, *args):
+        self.keys.extend(args[:numkeys])
+        return self.replies.pop(0)
+
+
+def test_rules_parse_scope_and_rate():
+    """Test rule specs and their validation."""
+    rule = RateLimitRule("ip:10/minute")
+    assert (rule.scope, rule.capacity, rule.rate) == ("ip", 10, 10 / 60)
+    for spec in ["10/minute", "host:10/minute", "ip:ten/minute", "ip:10/fortnight", "ip:0/second"]:
+        with pytest.raises(ValueError):
+            RateLimitRule(spec)
+
+
+def test_local_buckets_refill_over_time(monkeypatch):
+    """Test the in-process buckets allow bursts and then refill evenly."""
+    now = [100.0]
+    monkeypatch.setattr("app.utils.rate_limit.time.monotonic", lambda: now[0])
+    buckets = LocalTokenBuckets(max_keys=10)
+
+    assert [buckets.hit([("k", 1.0, 2)])[0] for _ in range(3)] == [True, True, False]
+    assert buckets.hit([("k", 1.0, 2)]) == (False, 1.0)
+    now[0] += 0.5
+    assert buckets.hit([("k", 1.0, 2)]) == (False, 0.5)
+    now[0] += 0.5
+    assert buckets.hit([("k", 1.0, 2)]) == (True, 0.0)
+
+
+@pytest.mark.asyncio
+async def test_denied_request_does_not_drain_other_buckets(monkeypatch):
+    """Test tokens are only taken when every matching bucket has one."""
+    monkeypatch.setattr("app.utils.cache.redis_client", FailingRedis())
+    limiter = RateLimiter(
+        {"GET /search": ["user:1/minute", "ip:3/minute"]}, local_max_keys=10, redis_retry_seconds=60
+    )
+
+    assert await limiter.check("GET", "/search", "1.2.3.4", "u1") == 0
+    # u1's bucket is empty; its rejected requests leave the shared IP bucket alone
+    for _ in range(5):
+        assert await limiter.check("GET", "/search", "1.2.3.4", "u1") > 0
+    assert await limiter.check("GET", "/search", "1.2.3.4", "u2") == 0
+    assert await limiter.check("GET", "/search", "1.2.3.4", "u3") == 0
+    assert await limiter.check("GET", "/search", "1.2.3.4", "u4") > 0
+
+
+@pytest.mark.asyncio
+async def test_user_scope_keys_by_user_and_uses_redis(monkeypatch):
+    """Test per-user buckets are keyed in Redis by user id, else by IP."""
+    fake = ScriptedRedis([[1, b"0"], [0, b"2.5"], [1, b"0"]])
+    monkeypatch.setattr("app.utils.cache.redis_client", fake)
+    limiter = RateLimiter({"GET /api/v1/foods/*": ["user:2/minute"]}, local_max_keys=10, redis_retry_seconds=5)
+
+    assert await limiter.check("GET", "/api/v1/foods/search", "1.2.3.4", "u1") == 0
+    assert await limiter.check("GET", "/api/v1/foods/search", "1.2.3.4", "u1") == 2.5
+    assert await limiter.check("GET", "/api/v1/foods/search", "1.2.3.4", None) == 0
+    assert await limiter.check("POST", "/api/v1/foods", "1.2.3.4", None) == 0
+
+    assert fake.keys[0].endswith(":user:2/minute:user:u1")
+    assert fake.keys[2].endswith(":user:2/minute:ip:1.2.3.4")
+    assert len(fake.keys) == 3
+    assert limiter.stats()["limited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_outage_falls_back_to_local_buckets(monkeypatch):
+    """Test a Redis failure switches to local buckets without retrying every request."""
+    fake = FailingRedis()
+    monkeypatch.setattr("app.utils.cache.redis_client", fake)
+    limiter = RateLimiter({"POST /login": ["ip:2/minute"]}, local_max_keys=10, redis_retry_seconds=60)
+
+    waits = [await limiter.check("POST", "/login", "1.2.3.4", None) for _ in range(3)]
+
+    assert waits[:2] == [0, 0]
+    assert waits[2] > 0
+    assert fake.calls == 1
+    stats = limiter.stats()
+    assert stats["redis_available"] is False
+    assert stats["local_checks"] == 3
+
+
+def test_login_returns_429_with_retry_after(client, test_user, monkeypatch):
+    """Test the middleware rejects a login burst per client IP."""
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXY_HOPS", 1)
+    credentials = {"email": test_user.email, "password": "wrong-password"}
+    capacity = RateLimitRule(settings.RATE_LIMIT_RULES["POST /api/v1/auth/login"][0]).capacity
+
+    for _ in range(capacity):
+        response = client.post("/api/v1/auth/login", json=credentials, headers={"X-Forwarded-For": "10.0.0.1"})
+        assert response.status_code == 401
+
+    # Entries prepended by the client don't select another bucket
+    response = client.post("/api/v1/auth/login", json=credentials, headers={"X-Forwarded-For": "6.6.6.6, 10.0.0.1"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    response = client.post("/api/v1/auth/login", json=credentials, headers={"X-Forwarded-For": "10.0.0.2"})
+    assert response.status_code == 401
+    assert rate_limiter.stats()["limited"] == 1
+
+
+def test_client_ip_uses_trusted_proxy_hops(monkeypatch):
+    """Test the client IP is read from the right of X-Forwarded-For."""
+    scope = {"client": ("192.168.0.9", 5000)}
+    headers = {"x-forwarded-for": "6.6.6.6, 203.0.113.7, 10.0.0.2"}
+
+    assert client_ip(scope, headers) == "192.168.0.9"
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXY_HOPS", 1)
+    assert client_ip(scope, headers) == "10.0.0.2"
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXY_HOPS", 2)
+    assert client_ip(scope, headers) == "203.0.113.7"
+    # Fewer entries than trusted proxies: the header can't be trusted
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXY_HOPS", 4)
+    assert client_ip(scope, headers) == "192.168.0.9"
@@ -0,0 +1,104 @@
+"""Tests for access token revocation."""
+import time
+import uuid
+import pytest
+from app.utils import revocation
+from app.utils.auth import create_refresh_token, verify_token
+from app.utils.bloom import BloomFilter
+from app.utils.revocation import REVOCATION_CHANNEL, REVOKED_TOKENS_KEY, revocation_list
+
+
+class SyncRedisView:
+    """Sync facade over the fake async Redis for filter-hit confirmation."""
+
+    def __init__(self, fake):
+        self.fake = fake
+        self.calls = 0
+
+    def zscore(self, key, member):
+        self.calls += 1
+        return self.fake.data.get(key, {}).get(member)
+
+
+@pytest.fixture
+def sync_redis(fake_redis, monkeypatch):
+    """Point revocation confirmations at the fake Redis."""
+    view = SyncRedisView(fake_redis)
+    monkeypatch.setattr(revocation, "sync_redis_client", view)
+    return view
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test added items are always found and false positives stay rare."""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [uuid.uuid4().hex for _ in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10000))
+    assert false_positives < 300
+    assert bloom.size_bytes < 1300
+
+
+def test_logout_revokes_access_token(client, auth_headers, fake_redis, sync_redis):
+    """Test a logged-out token is rejected and the revocation is broadcast."""
+    assert client.get("/api/v1/users/me", headers=auth_headers).status_code == 200
+
+    response = client.post("/api/v1/auth/logout", headers=auth_headers)
+    assert response.status_code == 204
+
+    assert client.get("/api/v1/users/me", headers=auth_headers).status_code == 401
+    [(channel, jti)] = fake_redis.published
+    assert channel == REVOCATION_CHANNEL
+    assert jti in fake_redis.data[REVOKED_TOKENS_KEY]
+    assert revocation_list.stats()["confirmed"] == 1
+
+
+def test_logout_revokes_refresh_token(client, test_user, auth_headers, fake_redis, sync_redis):
+    """Test a refresh token sent to logout is revoked with the access token."""
+    other_user_token = create_refresh_token(str(uuid.uuid4()))
+    response = client.post(
+        "/api/v1/auth/logout", headers=auth_headers, json={"refresh_token": other_user_token}
+    )
+    assert response.status_code == 400
+    assert fake_redis.published == []
+
+    refresh_token = create_refresh_token(str(test_user.id))
+    response = client.post("/api/v1/auth/logout", headers=auth_headers, json={"refresh_token": refresh_token})
+    assert response.status_code == 204
+
+    assert verify_token(refresh_token) is None
+    assert verify_token(other_user_token) is not None
+    assert len(fake_redis.data[REVOKED_TOKENS_KEY]) == 2
+
+
+def test_unrevoked_tokens_skip_redis(client, auth_headers, sync_redis):
+    """Test tokens missing from the filter are accepted without a Redis call."""
+    for _ in range(3):
+        assert client.get("/api/v1/users/me", headers=auth_headers).status_code == 200
+
+    assert sync_redis.calls == 0
+    assert revocation_list.stats()["checks"] == 3
+
+
+def test_filter_false_positive_is_confirmed_against_redis(sync_redis):
+    """Test a filter hit without a Redis entry is accepted."""
+    revocation_list.handle_message(b"not-really-revoked")
+
+    assert not revocation_list.is_revoked("not-really-revoked")
+    assert sync_redis.calls == 1
+    assert revocation_list.stats()["false_positives"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reload_drops_expired_revocations(fake_redis):
+    """Test rebuilding the filter keeps only unexpired revocations."""
+    now = time.time()
+    await fake_redis.zadd(REVOKED_TOKENS_KEY, {b"expired": now - 10, b"active": now + 600})
+
+    await revocation_list.reload()
+
+    assert "active" in revocation_list.filter
+    assert "expired" not in revocation_list.filter
+    assert list(fake_redis.data[REVOKED_TOKENS_KEY]) == [b"active"]